@@ -0,0 +1,80 @@
+import argparse as _argparse
+import asyncio as _asyncio
+import json as _json
+import os as _os
+
+
+def parse_args() -> _argparse.Namespace:
+    parser = _argparse.ArgumentParser(description='Benchmark the bot against a local stand-in of the PSS API.')
+    parser.add_argument('--latency', type=float, default=0.05, help='Mean response time of the stand-in in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests failing with an API error')
+    parser.add_argument('--maintenance-interval', type=float, default=0.0, help='Seconds between maintenance windows')
+    parser.add_argument('--maintenance-duration', type=float, default=0.0, help='Duration of maintenance windows in seconds')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the synthetic data')
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    parser_chatlog = subparsers.add_parser('chatlog', help='Benchmark ChatLogger.log_chat. Requires DATABASE_URL to point to a development database.')
+    parser_chatlog.add_argument('-k', '--channel-keys', type=int, default=10, help='Number of PSS channel keys to poll')
+    parser_chatlog.add_argument('-l', '--loggers', type=int, default=1, help='Number of Chat Loggers per channel key')
+    parser_chatlog.add_argument('-t', '--ticks', type=int, default=20, help='Number of polls to run')
+    parser_chatlog.add_argument('-i', '--interval', type=float, default=0.0, help='Seconds to wait between polls')
+    parser_chatlog.add_argument('--messages-per-minute', type=float, default=600.0, help='Messages generated per channel key per minute')
+
+    parser_fleets = subparsers.add_parser('fleets', help='Benchmark the fleet retrieval of Fleets.update. Doesn\'t need a database.')
+    parser_fleets.add_argument('-g', '--guilds', type=int, default=10, help='Number of guilds updating their fleets concurrently')
+    parser_fleets.add_argument('-f', '--fleets', type=int, default=10, help='Number of fleets per guild')
+    parser_fleets.add_argument('-r', '--rounds', type=int, default=5, help='Number of updates per guild')
+    parser_fleets.add_argument('-i', '--interval', type=float, default=0.0, help='Seconds to wait between rounds')
+    parser_fleets.add_argument('--alliances', type=int, default=500, help='Number of alliances served by the stand-in')
+
+    parser_login = subparsers.add_parser('login', help='Benchmark PssApiDiscordBot.pssapi_login. Doesn\'t need a database.')
+    parser_login.add_argument('-c', '--callers', type=int, default=20, help='Number of concurrent callers')
+    parser_login.add_argument('-n', '--calls', type=int, default=50, help='Number of calls per caller')
+    parser_login.add_argument('-i', '--interval', type=float, default=0.01, help='Seconds to wait between the calls of a caller')
+    parser_login.add_argument('-d', '--devices', type=int, default=3, help='Number of login devices')
+    parser_login.add_argument('--token-lifetime', type=float, default=1.0, help='Lifetime of access tokens in seconds')
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    # Settings are read on import, so they need to be in place before importing the bot
+    _os.environ['PSS_API_FAKE'] = '1'
+    _os.environ['PSS_API_FAKE_LATENCY'] = str(args.latency)
+    _os.environ['PSS_API_FAKE_ERROR_RATE'] = str(args.error_rate)
+    _os.environ['PSS_API_FAKE_MAINTENANCE_INTERVAL'] = str(args.maintenance_interval)
+    _os.environ['PSS_API_FAKE_MAINTENANCE_DURATION'] = str(args.maintenance_duration)
+    _os.environ['PSS_API_FAKE_SEED'] = str(args.seed)
+
+    if args.benchmark == 'chatlog':
+        _os.environ['PSS_API_FAKE_MESSAGES_PER_MINUTE'] = str(args.messages_per_minute)
+        # Poll every channel key on every tick
+        _os.environ.setdefault('CHAT_LOG_POLL_INTERVAL_MIN', '0')
+        _os.environ.setdefault('CHAT_LOG_POLL_INTERVAL_MAX', '0')
+        _os.environ.setdefault('CHAT_LOG_REQUESTS_PER_MINUTE', '1000000')
+        _os.environ.setdefault('PSS_API_RATE_LIMIT', '1000000')
+
+        from src.benchmarks import chat_log
+
+        results = _asyncio.run(chat_log.run(args.channel_keys, args.loggers, args.ticks, args.interval))
+        chat_log.print_results(results)
+    elif args.benchmark == 'fleets':
+        _os.environ['PSS_API_FAKE_ALLIANCE_COUNT'] = str(args.alliances)
+
+        from src.benchmarks import fleets
+
+        results = _asyncio.run(fleets.run(args.guilds, args.fleets, args.rounds, args.interval))
+        fleets.print_results(results)
+    elif args.benchmark == 'login':
+        _os.environ['PSS_DEVICE_IDS'] = _json.dumps([f'benchmark-device-{i}' for i in range(1, args.devices + 1)])
+        _os.environ['PSS_ACCESS_TOKEN_LIFETIME'] = str(args.token_lifetime)
+        _os.environ['PSS_ACCESS_TOKEN_REFRESH_MARGIN'] = str(args.token_lifetime / 4)
+
+        from src.benchmarks import pssapi_login
+
+        results = _asyncio.run(pssapi_login.run(args.callers, args.calls, args.interval))
+        pssapi_login.print_results(results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+import asyncio as _asyncio
+import time as _time
+import tracemalloc as _tracemalloc
+from typing import Any as _Any
+from typing import Dict as _Dict
+from typing import List as _List
+
+from . import common as _common
+from ..cogs.chatlogger import ChatLogger as _ChatLogger
+from .. import model as _model
+
+
+
+# ---------- Constants ----------
+
+BENCHMARK_CHANNEL_KEY_PREFIX: str = 'benchmark-'
+BENCHMARK_GUILD_ID: int = 1
+
+
+
+
+
+# ---------- Benchmark ----------
+
+async def run(channel_key_count: int, logger_count: int, tick_count: int, tick_interval: float = 0.0) -> _Dict[str, _Any]:
+    """
+    Creates `logger_count` Chat Loggers for each of `channel_key_count` channel keys and runs `tick_count` polls of the chat logger against the configured PSS API, which should be the local stand-in. Checkpoints and outbox rows are written to the configured database. Everything created gets removed afterwards.
+    """
+    await _model.setup_model()
+    await _delete_benchmark_data()
+    await _create_loggers(channel_key_count, logger_count)
+
+    bot = _common.BenchmarkBot()
+    cog = _ChatLogger(bot)
+    cog.watch_log_chat.cancel()
+    cog.deliver_chat_log.cancel()
+
+    tick_durations: _List[float] = []
+    _tracemalloc.start()
+    started_at = _time.perf_counter()
+    try:
+        for _ in range(tick_count):
+            tick_started_at = _time.perf_counter()
+            await cog.log_chat()
+            tick_durations.append(_time.perf_counter() - tick_started_at)
+            if tick_interval > 0:
+                await _asyncio.sleep(tick_interval)
+        duration = _time.perf_counter() - started_at
+        _, peak_memory = _tracemalloc.get_traced_memory()
+    finally:
+        _tracemalloc.stop()
+        cog.cog_unload()
+        await _asyncio.sleep(0.1)
+        archived_message_count, logged_message_count = await _get_message_counts()
+        await _delete_benchmark_data()
+        await _model.CHAT_ALERT_INDEX.close()
+
+    return {
+        'channel_keys': channel_key_count,
+        'loggers_per_channel_key': logger_count,
+        'ticks': tick_count,
+        'duration': duration,
+        'archived_messages': archived_message_count,
+        'logged_messages': logged_message_count,
+        'archived_messages_per_second': archived_message_count / duration if duration else 0.0,
+        'logged_messages_per_second': logged_message_count / duration if duration else 0.0,
+        'tick_duration': _common.get_duration_stats(tick_durations),
+        'pss_api_requests': getattr(bot.pssapi_client, 'request_count', None),
+        'traced_memory_peak': peak_memory,
+        'max_rss': _common.get_max_rss(),
+    }
+
+
+def print_results(results: _Dict[str, _Any]) -> None:
+    print(f'Channel keys:          {results["channel_keys"]} x {results["loggers_per_channel_key"]} Chat Loggers')
+    print(f'Ticks:                 {results["ticks"]} in {results["duration"]:.2f} s')
+    print(f'PSS API requests:      {results["pss_api_requests"]}')
+    print(f'Messages archived:     {results["archived_messages"]} ({results["archived_messages_per_second"]:.1f}/s)')
+    print(f'Messages logged:       {results["logged_messages"]} ({results["logged_messages_per_second"]:.1f}/s)')
+    print(f'Tick duration:         {_common.format_duration_stats(results["tick_duration"])}')
+    print(f'Traced memory peak:    {results["traced_memory_peak"] / 1024 / 1024:.1f} MiB')
+    print(f'Max RSS:               {results["max_rss"] / 1024 / 1024:.1f} MiB')
+
+
+
+
+
+# ---------- Helper ----------
+
+async def _create_loggers(channel_key_count: int, logger_count: int) -> None:
+    async with _model.orm.create_async_session() as session:
+        for channel_key_index in range(channel_key_count):
+            for logger_index in range(logger_count):
+                pss_chat_logger = _model.PssChatLogger.make(
+                    BENCHMARK_GUILD_ID,
+                    channel_key_index * logger_count + logger_index + 1,
+                    f'{BENCHMARK_CHANNEL_KEY_PREFIX}{channel_key_index}',
+                    f'Benchmark {channel_key_index}-{logger_index}',
+                )
+                session.add(pss_chat_logger)
+        await session.commit()
+
+
+async def _delete_benchmark_data() -> None:
+    pattern = f'{BENCHMARK_CHANNEL_KEY_PREFIX}%'
+    chat_logger_ids = f'SELECT {_model.PssChatLogger.ID_COLUMN_NAME} FROM {_model.PssChatLogger.TABLE_NAME} WHERE pss_channel_key LIKE $1'
+    await _model.database.try_execute(f'DELETE FROM {_model.chat_log.PssChatLogDelivery.TABLE_NAME} WHERE {_model.PssChatLogger.ID_COLUMN_NAME} IN ({chat_logger_ids})', [pattern])
+    await _model.database.try_execute(f'DELETE FROM {_model.PssChatLogger.TABLE_NAME} WHERE pss_channel_key LIKE $1', [pattern])
+    await _model.database.try_execute(f'DELETE FROM {_model.chat_archive.TABLE_NAME} WHERE pss_channel_key LIKE $1', [pattern])
+    await _model.database.try_execute(f'DELETE FROM {_model.chat_log_lease.TABLE_NAME_LEASE} WHERE pss_channel_key LIKE $1', [pattern])
+
+
+async def _get_message_counts() -> _List[int]:
+    pattern = f'{BENCHMARK_CHANNEL_KEY_PREFIX}%'
+    connection = await _model.database.acquire_connection()
+    try:
+        archived_message_count = await connection.fetchval(f'SELECT count(*) FROM {_model.chat_archive.TABLE_NAME} WHERE pss_channel_key LIKE $1', pattern)
+        logged_message_count = await connection.fetchval(
+            f'SELECT coalesce(sum(o.message_count), 0)::bigint FROM {_model.chat_log.PssChatLogDelivery.TABLE_NAME} o '
+            f'JOIN {_model.PssChatLogger.TABLE_NAME} l ON l.{_model.PssChatLogger.ID_COLUMN_NAME} = o.{_model.PssChatLogger.ID_COLUMN_NAME} '
+            f'WHERE l.pss_channel_key LIKE $1',
+            pattern,
+        )
+    finally:
+        await _model.database.release_connection(connection)
+    return [archived_message_count, logged_message_count]
@@ -0,0 +1,47 @@
+import resource as _resource
+import statistics as _statistics
+from typing import Dict as _Dict
+from typing import List as _List
+
+from .. import model as _model
+
+
+
+# ---------- Classes ----------
+
+class BenchmarkChannel():
+    def __init__(self, channel_id: int) -> None:
+        self.id: int = channel_id
+
+
+class BenchmarkBot(_model.PssApiDiscordBot):
+    """
+    Bot that never connects to Discord. Every channel exists, so that all Chat Loggers get processed.
+    """
+    def get_channel(self, id: int, /) -> BenchmarkChannel:
+        return BenchmarkChannel(id)
+
+
+
+
+
+# ---------- Functions ----------
+
+def get_duration_stats(durations: _List[float]) -> _Dict[str, float]:
+    """
+    Returns the mean, 95th percentile and maximum of the durations.
+    """
+    durations_sorted = sorted(durations)
+    return {
+        'mean': _statistics.mean(durations) if durations else 0.0,
+        'p95': durations_sorted[int(0.95 * (len(durations_sorted) - 1))] if durations else 0.0,
+        'max': durations_sorted[-1] if durations else 0.0,
+    }
+
+
+def get_max_rss() -> int:
+    return _resource.getrusage(_resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def format_duration_stats(duration_stats: _Dict[str, float]) -> str:
+    return f'mean {duration_stats["mean"] * 1000:.1f} ms, p95 {duration_stats["p95"] * 1000:.1f} ms, max {duration_stats["max"] * 1000:.1f} ms'
@@ -0,0 +1,71 @@
+import asyncio as _asyncio
+import time as _time
+from typing import Any as _Any
+from typing import Dict as _Dict
+from typing import List as _List
+
+from . import common as _common
+from .. import model as _model
+
+
+
+# ---------- Benchmark ----------
+
+async def run(guild_count: int, fleet_count: int, round_count: int, round_interval: float = 0.0) -> _Dict[str, _Any]:
+    """
+    Runs `round_count` rounds of the fleet retrieval done by `Fleets.update` for `guild_count` guilds concurrently, against the configured PSS API, which should be the local stand-in. Every guild has `fleet_count` fleets and neighbouring guilds share half of their fleets, so that the alliance cache gets exercised. The fleets only exist in memory and renamed fleets don't get written to the database.
+    """
+    bot = _common.BenchmarkBot()
+    alliance_ids = [alliance.id for alliance in await bot.pssapi_call(bot.pssapi_client.alliance_service.search_alliances, '', 0, 1000)]
+    if not alliance_ids:
+        raise Exception('The PSS API didn\'t return any alliances.')
+    request_count_start = bot.pssapi_client.request_count
+
+    update_durations: _List[float] = []
+    error_count = 0
+    renamed_fleet_count = 0
+
+    async def update(guild_index: int) -> None:
+        nonlocal error_count, renamed_fleet_count
+        first_alliance_index = guild_index * fleet_count // 2
+        fleets = [
+            _model.Fleet(id=alliance_ids[(first_alliance_index + i) % len(alliance_ids)], guild_id=guild_index + 1, fleet_name='')
+            for i in range(fleet_count)
+        ]
+        started_at = _time.perf_counter()
+        errors = await _model.Fleet.get_fleets(fleets, bot.alliance_cache, _model.settings.FLEET_UPDATE_MAX_CONCURRENT_REQUESTS, _model.settings.FLEET_UPDATE_TIMEOUT)
+        update_durations.append(_time.perf_counter() - started_at)
+        error_count += len(errors)
+        renamed_fleet_count += sum(1 for fleet in fleets if fleet.id not in errors and fleet.fleet_name != fleet.alliance.alliance_name)
+
+    started_at = _time.perf_counter()
+    for _ in range(round_count):
+        await _asyncio.gather(*[update(guild_index) for guild_index in range(guild_count)])
+        if round_interval > 0:
+            await _asyncio.sleep(round_interval)
+    duration = _time.perf_counter() - started_at
+
+    return {
+        'guilds': guild_count,
+        'fleets_per_guild': fleet_count,
+        'rounds': round_count,
+        'duration': duration,
+        'updates_per_second': guild_count * round_count / duration if duration else 0.0,
+        'update_duration': _common.get_duration_stats(update_durations),
+        'fleets_retrieved': guild_count * fleet_count * round_count - error_count,
+        'errors': error_count,
+        'fleets_to_rename': renamed_fleet_count,
+        'pss_api_requests': bot.pssapi_client.request_count - request_count_start,
+        'alliance_cache': bot.alliance_cache.get_stats()['alliances'],
+        'max_rss': _common.get_max_rss(),
+    }
+
+
+def print_results(results: _Dict[str, _Any]) -> None:
+    print(f'Guilds:                {results["guilds"]} x {results["fleets_per_guild"]} fleets')
+    print(f'Rounds:                {results["rounds"]} in {results["duration"]:.2f} s ({results["updates_per_second"]:.1f} updates/s)')
+    print(f'PSS API requests:      {results["pss_api_requests"]}')
+    print(f'Fleets retrieved:      {results["fleets_retrieved"]}, {results["errors"]} errors, {results["fleets_to_rename"]} to be renamed')
+    print(f'Alliance cache:        {results["alliance_cache"]}')
+    print(f'Update duration:       {_common.format_duration_stats(results["update_duration"])}')
+    print(f'Max RSS:               {results["max_rss"] / 1024 / 1024:.1f} MiB')
@@ -0,0 +1,59 @@
+import asyncio as _asyncio
+import time as _time
+from typing import Any as _Any
+from typing import Dict as _Dict
+from typing import List as _List
+
+import pssapi as _pssapi
+
+from . import common as _common
+
+
+
+# ---------- Benchmark ----------
+
+async def run(caller_count: int, call_count: int, call_interval: float = 0.0) -> _Dict[str, _Any]:
+    """
+    Lets `caller_count` concurrent callers request an access token via `PssApiDiscordBot.pssapi_login` `call_count` times each, against the configured PSS API, which should be the local stand-in. Use a short `PSS_ACCESS_TOKEN_LIFETIME` to measure refreshes and a positive error rate to measure device failover.
+    """
+    bot = _common.BenchmarkBot()
+    login_durations: _List[float] = []
+    errors: _Dict[str, int] = {}
+
+    async def call() -> None:
+        for _ in range(call_count):
+            started_at = _time.perf_counter()
+            try:
+                await bot.pssapi_login()
+            except _pssapi.utils.exceptions.PssApiError as error:
+                errors[type(error).__name__] = errors.get(type(error).__name__, 0) + 1
+            login_durations.append(_time.perf_counter() - started_at)
+            if call_interval > 0:
+                await _asyncio.sleep(call_interval)
+
+    started_at = _time.perf_counter()
+    await _asyncio.gather(*[call() for _ in range(caller_count)])
+    duration = _time.perf_counter() - started_at
+
+    return {
+        'callers': caller_count,
+        'calls_per_caller': call_count,
+        'duration': duration,
+        'calls_per_second': caller_count * call_count / duration if duration else 0.0,
+        'login_duration': _common.get_duration_stats(login_durations),
+        'pss_api_requests': bot.pssapi_client.request_count,
+        'errors': errors,
+        'devices': bot.device_pool.snapshot(),
+        'max_rss': _common.get_max_rss(),
+    }
+
+
+def print_results(results: _Dict[str, _Any]) -> None:
+    print(f'Callers:               {results["callers"]} x {results["calls_per_caller"]} calls')
+    print(f'Duration:              {results["duration"]:.2f} s ({results["calls_per_second"]:.1f} calls/s)')
+    print(f'PSS API requests:      {results["pss_api_requests"]}')
+    print(f'Errors:                {results["errors"] or "none"}')
+    print(f'Login duration:        {_common.format_duration_stats(results["login_duration"])}')
+    for device_info in sorted(results['devices'], key=lambda device_info: device_info['number']):
+        print(f'{"Device " + str(device_info["number"]) + ":":<23}{device_info["success_count"]} logins/requests succeeded, {device_info["failure_count"]} failed, {device_info["quarantine_count"]} quarantines')
+    print(f'Max RSS:               {results["max_rss"] / 1024 / 1024:.1f} MiB')
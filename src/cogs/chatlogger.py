@@ -1,13 +1,20 @@
 import datetime as _datetime
+import io as _io
+import json as _json
+import time as _time
 from typing import Dict as _Dict
 from typing import List as _List
+from typing import Optional as _Optional
+from typing import Set as _Set
+from typing import Tuple as _Tuple
 
 import asyncio as _asyncio
+import asyncpg as _asyncpg
 import discord as _discord
 import discord.ext.tasks as _tasks
 import discord.ext.commands as _commands
-import psycopg2 as _psycopg2
 import pssapi as _pssapi
+import sqlalchemy as _sqlalchemy
 
 from .cog_base import CogBase as _CogBase
 from .. import bot_settings as _bot_settings
@@ -30,7 +37,23 @@ class ChatLogger(_CogBase):
     def __init__(self, bot: _model.PssApiDiscordBot) -> None:
         super().__init__(bot)
         self.__last_log_chat_run_at: _datetime.datetime = None
+        self.__leases: _model.chat_log_lease.ChatLogLeases = _model.chat_log_lease.ChatLogLeases(_model.settings.CHAT_LOG_LEASE_DURATION)
+        self.__checkpoints: _model.chat_log.PssChatLoggerCheckpoints = _model.chat_log.PssChatLoggerCheckpoints(self.__leases.worker_id)
+        self.__pssapi_semaphore: _asyncio.Semaphore = _asyncio.Semaphore(_model.settings.PSS_API_MAX_CONCURRENT_REQUESTS)
+        self.__scheduler: _model.chat_log_scheduler.ChatLogScheduler = _model.chat_log_scheduler.ChatLogScheduler(
+            _model.settings.CHAT_LOG_POLL_INTERVAL_MIN,
+            _model.settings.CHAT_LOG_POLL_INTERVAL_MAX,
+            _model.settings.CHAT_LOG_REQUESTS_PER_MINUTE,
+            ChatLogger.__CHAT_LOG_INTERVAL,
+            _model.settings.CHAT_LOG_BUSY_MESSAGE_COUNT,
+            _model.settings.CHAT_LOG_FULL_PAGE_MESSAGE_COUNT,
+        )
+        self.__webhooks: _model.chat_log_webhook.ChatLogWebhooks = _model.chat_log_webhook.ChatLogWebhooks(_utils.settings.DISCORD_RATE_LIMIT_WEBHOOK)
+        self.__metrics: _model.chat_log_metrics.ChatLogMetrics = _model.chat_log_metrics.ChatLogMetrics()
+        self.__alert_tasks: _Set[_asyncio.Task] = set()
+        self.__pending_alerts: _List[_Tuple[_Tuple[int, _Optional[int]], _Set[int], str]] = []
         self.watch_log_chat.start()
+        self.deliver_chat_log.start()
 
 
     def cog_unload(self):
@@ -40,6 +63,12 @@ class ChatLogger(_CogBase):
         if self.log_chat.is_running() and self.log_chat._can_be_cancelled():
             self.log_chat.cancel()
 
+        if self.deliver_chat_log.is_running() and self.deliver_chat_log._can_be_cancelled():
+            self.deliver_chat_log.cancel()
+
+        _asyncio.create_task(self.__webhooks.close())
+        _asyncio.create_task(self.__leases.release())
+
 
     @_tasks.loop(seconds=__CHAT_LOG_INTERVAL/4)
     async def watch_log_chat(self):
@@ -68,79 +97,238 @@ class ChatLogger(_CogBase):
                         print(ex)
 
 
-    @_tasks.loop(seconds=__CHAT_LOG_INTERVAL)
+    @_tasks.loop(seconds=_model.settings.CHAT_LOG_POLL_INTERVAL_MIN)
     async def log_chat(self):
         utc_now = _utils.datetime.get_utc_now()
         self.__last_log_chat_run_at = utc_now
+        self.__metrics.record_tick(utc_now)
 
         pss_chat_loggers: _List[_model.chat_log.PssChatLogger] = []
         try:
-            with _model.orm.create_session() as session:
-                pss_chat_loggers = _model.orm.get_all(_model.chat_log.PssChatLogger, session)
+            async with _model.orm.create_async_session() as session:
+                pss_chat_loggers = await _model.orm.get_all_async(_model.chat_log.PssChatLogger, session)
             if not pss_chat_loggers:
                 return
-        except _psycopg2.OperationalError as ex:
+        except (_sqlalchemy.exc.OperationalError, OSError) as ex:
             print('[log_chat] Could not retrieve configured Chat Loggers from database:')
             print(ex)
             return
+        self.__checkpoints.apply(pss_chat_loggers)
+
+        channel_keys: _Dict[str, _List[_model.chat_log.PssChatLogger]] = {}
+        for pss_chat_logger in pss_chat_loggers:
+            channel_keys.setdefault(pss_chat_logger.pss_channel_key, []).append(pss_chat_logger)
+        leased_channel_keys = await self.__leases.acquire(channel_keys.keys())
+        channel_keys = {channel_key: channel_keys[channel_key] for channel_key in sorted(leased_channel_keys)}
+        self.__metrics.prune(channel_keys.keys(), [pss_chat_logger.id for pss_chat_loggers in channel_keys.values() for pss_chat_logger in pss_chat_loggers])
+        due_channel_keys = self.__scheduler.get_due(channel_keys.keys(), utc_now)
+        if not due_channel_keys:
+            return
+        channel_keys = {channel_key: channel_keys[channel_key] for channel_key in due_channel_keys}
 
         try:
-            access_token = await self.bot.pssapi_login()
+            await self.bot.pssapi_login()
         except _pssapi.utils.exceptions.PssApiError as ex:
             print(ex)
             return
 
-        channel_keys: _Dict[str, _List[_model.chat_log.PssChatLogger]] = {}
-        for pss_chat_logger in pss_chat_loggers:
-            channel_keys.setdefault(pss_chat_logger.pss_channel_key, []).append(pss_chat_logger)
-        channel_key_count = len(channel_keys.keys())
+        try:
+            await self.__log_channel_keys(channel_keys)
+        finally:
+            written_pss_chat_logger_ids = await self.__checkpoints.flush()
+            if written_pss_chat_logger_ids is not None:
+                self.__send_alerts(written_pss_chat_logger_ids)
+            else:
+                print('[log_chat] Could not update Chat Loggers in database.')
 
-        remaining_time = ChatLogger.__CHAT_LOG_INTERVAL - (_utils.datetime.get_utc_now() - utc_now).total_seconds()
-        delay = remaining_time / channel_key_count * (1 - channel_key_count * .01)
 
-        for channel_key, pss_chat_loggers in channel_keys.items():
-            tries = 2
+    async def __log_channel_keys(self, channel_keys: _Dict[str, _List[_model.chat_log.PssChatLogger]]) -> None:
+        results = await _asyncio.gather(*[self.__get_messages(channel_key) for channel_key in channel_keys.keys()], return_exceptions=True)
+        utc_now = _utils.datetime.get_utc_now()
+        if any(isinstance(result, _pssapi.utils.exceptions.ServerMaintenanceError) for result in results):
+            print(f'Server is under maintenance.')
+            self.__metrics.record_maintenance_skip(channel_keys.keys())
+            for channel_key in channel_keys.keys():
+                self.__scheduler.record_failure(channel_key, utc_now)
+            return
+
+        if not _model.CHAT_ALERT_INDEX.loaded:
+            await _model.CHAT_ALERT_INDEX.load()
+
+        log_tasks = []
+        messages_by_channel_key: _Dict[str, _List[_pssapi.entities.Message]] = {}
+        for (channel_key, pss_chat_loggers), messages in zip(channel_keys.items(), results):
+            if isinstance(messages, Exception) or messages is None:
+                if messages is not None:
+                    print(f'Could not get messages for channel key \'{channel_key}\':\n{messages}')
+                self.__scheduler.record_failure(channel_key, utc_now)
+                continue
+
+            last_pss_message_id = min(pss_chat_logger.last_pss_message_id for pss_chat_logger in pss_chat_loggers)
+            new_messages = [message for message in messages if message.message_id > last_pss_message_id]
+            self.__scheduler.record(channel_key, len(new_messages), len(messages), utc_now)
+            self.__metrics.record_messages(channel_key, len(messages), len(new_messages), max((message.message_id for message in messages), default=0))
+            if new_messages:
+                # Older messages have already been archived, when they were new
+                messages_by_channel_key[channel_key] = new_messages
+                self.__collect_alerts(channel_key, pss_chat_loggers, new_messages)
+                log_tasks.append(self.__log_messages(pss_chat_loggers, _model.chat_log.PssChatLogBatch(messages)))
+        await _asyncio.gather(_model.chat_archive.archive_messages(messages_by_channel_key), *log_tasks)
+
+
+    def __collect_alerts(self, channel_key: str, pss_chat_loggers: _List[_model.chat_log.PssChatLogger], messages: _List[_pssapi.entities.Message]) -> None:
+        """
+        Matches each new message once against the keywords of all Chat Alert Rules and queues the alerts of the guilds logging the channel key. Every alert remembers the Chat Loggers of the guild, whose checkpoints the message advances. Must be called before the checkpoints of the Chat Loggers get advanced.
+        """
+        last_pss_message_ids: _Dict[int, int] = {}
+        for pss_chat_logger in pss_chat_loggers:
+            last_pss_message_ids[pss_chat_logger.guild_id] = min(last_pss_message_ids.get(pss_chat_logger.guild_id, pss_chat_logger.last_pss_message_id or 0), pss_chat_logger.last_pss_message_id or 0)
+        min_last_pss_message_id = min(last_pss_message_ids.values())
+
+        for message in sorted(messages, key=lambda message: message.message_id):
+            if message.message_id <= min_last_pss_message_id:
+                continue
+            matching_rules = _model.CHAT_ALERT_INDEX.get_matching_rules(message.user_name, message.alliance_name, message.message)
+            keywords_by_target: _Dict[_Tuple[int, _Optional[int]], _Set[str]] = {}
+            guild_ids_by_target: _Dict[_Tuple[int, _Optional[int]], int] = {}
+            for keyword, rules in matching_rules.items():
+                for rule in rules:
+                    if rule.guild_id in last_pss_message_ids and message.message_id > last_pss_message_ids[rule.guild_id]:
+                        keywords_by_target.setdefault((rule.channel_id, rule.role_id), set()).add(keyword)
+                        guild_ids_by_target[(rule.channel_id, rule.role_id)] = rule.guild_id
+            for target, keywords in keywords_by_target.items():
+                pss_chat_logger_ids = {
+                    pss_chat_logger.id
+                    for pss_chat_logger in pss_chat_loggers
+                    if pss_chat_logger.guild_id == guild_ids_by_target[target] and message.message_id > (pss_chat_logger.last_pss_message_id or 0)
+                }
+                keywords_text = ', '.join(f'`{keyword}`' for keyword in sorted(keywords))
+                self.__pending_alerts.append((target, pss_chat_logger_ids, f'{keywords_text} in `{channel_key}`: {_model.chat_log.format_pss_message(message)}'))
+
+
+    def __send_alerts(self, written_pss_chat_logger_ids: _Set[int]) -> None:
+        """
+        Sends the queued alerts in the background, whose messages advanced any of the written checkpoints. Must be called only after the checkpoints of the messages alerted about have been written, so that the alerts don't get sent again, if the bot restarts in between. The other alerts are dropped, since another process owning the channel key now will send them.
+        """
+        alert_lines: _Dict[_Tuple[int, _Optional[int]], _List[str]] = {}
+        for target, pss_chat_logger_ids, line in self.__pending_alerts:
+            if not pss_chat_logger_ids.isdisjoint(written_pss_chat_logger_ids):
+                alert_lines.setdefault(target, []).append(line)
+        self.__pending_alerts = []
+        for (channel_id, role_id), lines in alert_lines.items():
+            channel: _discord.TextChannel = self.bot.get_channel(channel_id)
+            if channel:
+                if role_id:
+                    lines = [f'<@&{role_id}>'] + lines
+                    allowed_mentions = _discord.AllowedMentions(everyone=False, users=False, roles=[_discord.Object(role_id)])
+                else:
+                    allowed_mentions = _discord.AllowedMentions.none()
+                task = _asyncio.create_task(_utils.discord.send_lines_to_channel(channel, lines, priority=_utils.discord.PRIORITY_BACKGROUND, allowed_mentions=allowed_mentions))
+                self.__alert_tasks.add(task)
+                task.add_done_callback(self.__on_alert_sent)
+
+
+    def __on_alert_sent(self, task: _asyncio.Task) -> None:
+        self.__alert_tasks.discard(task)
+        if not task.cancelled() and task.exception():
+            print(f'[log_chat] Could not send chat alert:\n{task.exception()}')
+
+
+    async def __get_messages(self, channel_key: str) -> _List[_pssapi.entities.Message]:
+        production_server = self.bot.pssapi_client.production_server or _model.settings.DEFAULT_PSS_PRODUCTION_SERVER
+        rate_limiter = _utils.rate_limiter.get_host_rate_limiter(production_server, _model.settings.PSS_API_RATE_LIMIT)
+        tries = 2
+        retry_count = 0
+        async with self.__pssapi_semaphore:
             while tries > 0:
                 try:
-                    messages = await self.bot.pssapi_client.message_service.list_messages_for_channel_key(access_token, channel_key)
-                    break
+                    async with rate_limiter:
+                        started_at = _time.monotonic()
+                        messages = await self.bot.pssapi_call(self.bot.pssapi_client.message_service.list_messages_for_channel_key, channel_key)
+                    self.__metrics.record_fetch(channel_key, _time.monotonic() - started_at, retry_count, True)
+                    return messages
                 except _pssapi.utils.exceptions.ServerMaintenanceError:
-                    print(f'Server is under maintenance.')
-                    return
+                    raise
                 except _pssapi.utils.exceptions.PssApiError as ex:
                     print(f'Could not get messages for channel key \'{channel_key}\':\n{ex}')
-                    messages = None
                     tries -= 1
-                    await _asyncio.sleep(.2)
-            if messages:
-                messages = sorted(messages, key=lambda x: x.message_id)
-                for pss_chat_logger in pss_chat_loggers:
-                    channel: _discord.TextChannel = self.bot.get_channel(pss_chat_logger.channel_id)
-                    if channel:
-                        messages = [message for message in messages if message.message_id > pss_chat_logger.last_pss_message_id]
-                        lines = []
-                        for message in messages:
-                            user_name_and_fleet = f'**{_utils.discord.escape_markdown_and_mentions(message.user_name)}'
-                            if message.alliance_name:
-                                user_name_and_fleet += f'** ({_utils.discord.escape_markdown_and_mentions(message.alliance_name)})**'
-                            lines.append(f'{user_name_and_fleet}:** {_utils.discord.escape_markdown_and_mentions(message.message)}')
-                        if lines:
-                            try:
-                                await _utils.discord.send_lines_to_channel(channel, lines)
-                            except:
-                                continue
-                            pss_chat_logger.last_pss_message_id = max(message.message_id for message in messages)
-                try:
-                    with _model.orm.create_session() as session:
-                        for pss_chat_logger in pss_chat_loggers:
-                            pss_chat_logger = _model.orm.merge(session, pss_chat_logger)
-                            pss_chat_logger.save(session)
-                except _psycopg2.OperationalError as ex:
-                    print('[log_chat] Could not update Chat Loggers in database:')
-                    print(ex)
+                    if tries > 0:
+                        retry_count += 1
+                        await _asyncio.sleep(.2)
+                    else:
+                        self.__metrics.record_fetch(channel_key, _time.monotonic() - started_at, retry_count, False)
+        return None
+
+
+    async def __log_messages(self, pss_chat_loggers: _List[_model.chat_log.PssChatLogger], batch: _model.chat_log.PssChatLogBatch) -> None:
+        for pss_chat_logger in pss_chat_loggers:
+            channel: _discord.TextChannel = self.bot.get_channel(pss_chat_logger.channel_id)
+            if channel:
+                if pss_chat_logger.use_webhook:
+                    entries = batch.get_webhook_entries_after(pss_chat_logger.last_pss_message_id)
+                    posts = _model.chat_log.create_webhook_posts(entries, _utils.settings.MESSAGE_MAXIMUM_CHARACTER_COUNT)
+                else:
+                    entries = batch.get_entries_after(pss_chat_logger.last_pss_message_id)
+                    posts = _utils.discord.create_posts_from_lines([entry[-1] for entry in entries], _utils.settings.MESSAGE_MAXIMUM_CHARACTER_COUNT)
+                if entries:
+                    self.__checkpoints.advance(pss_chat_logger, entries[-1][0], posts, entries[0][0], len(entries), batch.get_message_date(entries[-1][0]))
+            else:
+                # The messages can't be posted, but the checkpoint must not fall behind, or it would hold back the alerts and the polling of the channel key
+                entries = batch.get_entries_after(pss_chat_logger.last_pss_message_id)
+                if entries:
+                    self.__checkpoints.advance(pss_chat_logger, entries[-1][0])
+            self.__metrics.record_checkpoint(pss_chat_logger.id, pss_chat_logger.pss_channel_key, pss_chat_logger.last_pss_message_id)
+
+
+    @_tasks.loop(seconds=_model.settings.CHAT_LOG_DELIVERY_INTERVAL)
+    async def deliver_chat_log(self):
+        try:
+            deliveries = await _model.chat_log.PssChatLogDelivery.get_due(_model.settings.CHAT_LOG_DELIVERY_BATCH_SIZE, self.__leases.worker_id, _model.settings.CHAT_LOG_LEASE_DURATION)
+        except (_asyncpg.PostgresError, OSError) as ex:
+            print('[deliver_chat_log] Could not retrieve pending deliveries from database:')
+            print(ex)
+            return
 
-            if channel_key_count > 1:
-                await _asyncio.sleep(delay)
+        deliveries_by_logger: _Dict[int, _List[_model.chat_log.PssChatLogDelivery]] = {}
+        for delivery in deliveries:
+            deliveries_by_logger.setdefault(delivery.pss_chat_log_id, []).append(delivery)
+        await _asyncio.gather(*[self.__deliver(logger_deliveries) for logger_deliveries in deliveries_by_logger.values()])
+
+
+    @deliver_chat_log.before_loop
+    async def before_deliver_chat_log(self):
+        await self.bot.wait_until_ready()
+
+
+    async def __deliver(self, deliveries: _List[_model.chat_log.PssChatLogDelivery]) -> None:
+        """
+        Delivers the posts of a single Chat Logger in order. Stops at the first delivery that fails, so that later posts don't overtake it.
+        """
+        for delivery in deliveries:
+            channel: _discord.TextChannel = self.bot.get_channel(delivery.channel_id)
+            delivered_post_count = delivery.delivered_post_count
+            try:
+                if not channel:
+                    raise Exception(f'Could not find channel with ID {delivery.channel_id}.')
+                for post_index in range(delivery.delivered_post_count, len(delivery.posts)):
+                    post = delivery.posts[post_index]
+                    if isinstance(post, dict):
+                        await self.__webhooks.send(channel, post['username'], post['content'])
+                    else:
+                        await _utils.discord.send_to_channel(channel, post, priority=_utils.discord.PRIORITY_BACKGROUND, nonce=delivery.get_nonce(post_index))
+                    await delivery.set_delivered_post_count(post_index + 1)
+            except Exception as ex:
+                print(f'[deliver_chat_log] Could not deliver chat log for Chat Logger {delivery.pss_chat_log_id}:')
+                print(ex)
+                self.__metrics.record_delivery_failure(delivery.pss_chat_log_id)
+                await delivery.fail(
+                    _model.settings.CHAT_LOG_DELIVERY_MAX_ATTEMPTS,
+                    _model.settings.CHAT_LOG_DELIVERY_RETRY_DELAY,
+                    _model.settings.CHAT_LOG_DELIVERY_MAX_RETRY_DELAY,
+                )
+                return
+            await delivery.complete()
+            self.__metrics.record_delivery(delivery.pss_chat_log_id, delivery.message_count, len(delivery.posts) - delivered_post_count, delivery.last_pss_message_date)
 
 
     @_commands.guild_only()
@@ -173,9 +361,9 @@ class ChatLogger(_CogBase):
         """
         _utils.assert_.authorized_channel_or_server_manager(ctx, _bot_settings.AUTHORIZED_CHANNEL_IDS)
         log_channel = _model.chat_log.PssChatLogger.make(ctx.guild.id, channel.id, channel_key, name)
-        with _model.orm.create_session() as session:
-            log_channel.create(session)
-            pss_chat_loggers = _model.orm.get_all(_model.chat_log.PssChatLogger, session)
+        async with _model.orm.create_async_session() as session:
+            await log_channel.create_async(session)
+            pss_chat_loggers = await _model.orm.get_all_async(_model.chat_log.PssChatLogger, session)
         await _utils.discord.reply(ctx, f'Posting messages from channel \'{channel_key}\' to {channel.mention}.')
 
 
@@ -195,8 +383,8 @@ class ChatLogger(_CogBase):
           vivi chatlog edit 1 - Edits the chat logger with ID '1' on this server.
         """
         _utils.assert_.authorized_channel_or_server_manager(ctx, _bot_settings.AUTHORIZED_CHANNEL_IDS)
-        with _model.orm.create_session() as session:
-            pss_chat_logger = _model.orm.get_first_filtered_by(
+        async with _model.orm.create_async_session() as session:
+            pss_chat_logger = await _model.orm.get_first_filtered_by_async(
                 _model.chat_log.PssChatLogger,
                 session,
                 id=logger_id,
@@ -229,6 +417,18 @@ class ChatLogger(_CogBase):
             await _utils.discord.reply(ctx, f'The request has been cancelled.')
             return
 
+        prompt_text = f'Shall messages be posted via webhook, showing the PSS user\'s name as the author? (true/false)'
+        new_use_webhook, aborted, skipped_new_use_webhook = await _utils.discord.inquire_for_true_false(ctx, prompt_text, abort_text='Aborted', skip_text='Skipped.')
+
+        if aborted:
+            await _utils.discord.reply(ctx, f'The request has been cancelled.')
+            return
+
+        if new_use_webhook and not skipped_new_use_webhook:
+            log_channel = new_channel if new_channel and not skipped_new_channel else self.bot.get_channel(pss_chat_logger.channel_id)
+            if log_channel and not log_channel.permissions_for(ctx.guild.me).manage_webhooks:
+                raise Exception(f'Cannot post via webhook to {log_channel.mention}: the bot lacks the permission to manage webhooks in that channel.')
+
         edited = False
         if new_channel_key and not skipped_new_channel_key:
             pss_chat_logger.pss_channel_key = new_channel_key
@@ -239,10 +439,13 @@ class ChatLogger(_CogBase):
         if new_name and not skipped_new_name:
             pss_chat_logger.name = new_name
             edited = True
+        if new_use_webhook is not None and not skipped_new_use_webhook:
+            pss_chat_logger.use_webhook = new_use_webhook
+            edited = True
         if edited:
-            with _model.orm.create_session() as session:
-                pss_chat_logger = _model.orm.merge(session, pss_chat_logger)
-                pss_chat_logger.save(session)
+            async with _model.orm.create_async_session() as session:
+                pss_chat_logger = await _model.orm.merge_async(session, pss_chat_logger)
+                await pss_chat_logger.save_async(session)
             lines = [f'The chat logger has been edited.']
             lines.extend((await converter.to_text()))
             await _utils.discord.reply_lines(ctx, lines)
@@ -261,8 +464,8 @@ class ChatLogger(_CogBase):
         """
         if ctx.invoked_subcommand is None:
             _utils.assert_.authorized_channel_or_server_manager(ctx, _bot_settings.AUTHORIZED_CHANNEL_IDS)
-            with _model.orm.create_session() as session:
-                pss_chat_loggers = _model.orm.get_all_filtered_by(_model.chat_log.PssChatLogger, session, guild_id=ctx.guild.id)
+            async with _model.orm.create_async_session() as session:
+                pss_chat_loggers = await _model.orm.get_all_filtered_by_async(_model.chat_log.PssChatLogger, session, guild_id=ctx.guild.id)
             lines = ['__Listing chat loggers for this Discord server__']
             for pss_chat_logger in pss_chat_loggers:
                 converter = _converters.PssChatLoggerConverter(pss_chat_logger)
@@ -287,8 +490,8 @@ class ChatLogger(_CogBase):
           vivi chatlog list all
         """
         _utils.assert_.authorized_channel_or_server_manager(ctx, _bot_settings.AUTHORIZED_CHANNEL_IDS)
-        with _model.orm.create_session() as session:
-            pss_chat_loggers = _model.orm.get_all(_model.chat_log.PssChatLogger, session)
+        async with _model.orm.create_async_session() as session:
+            pss_chat_loggers = await _model.orm.get_all_async(_model.chat_log.PssChatLogger, session)
         lines = ['__Listing all chat loggers__']
         for pss_chat_logger in pss_chat_loggers:
             converter = _converters.PssChatLoggerConverter(pss_chat_logger)
@@ -302,6 +505,206 @@ class ChatLogger(_CogBase):
         await _utils.discord.reply_lines(ctx, lines)
 
 
+    @_commands.guild_only()
+    @base.command(name='search', brief='Search logged chat messages')
+    async def search(self, ctx: _commands.Context, *, search_terms: str) -> None:
+        """
+        Searches the messages logged by the chat loggers on this server. The best matches are listed first.
+
+        Usage:
+          vivi chatlog search [search_terms] <--page page>
+
+        Parameters:
+          search_terms: Mandatory. The words to search for in messages, user names and fleet names. Put phrases in double quotes, exclude words with a leading '-'.
+          page:         Optional. The page of results to be shown. Defaults to 1.
+
+        Examples:
+          vivi chatlog search recruit - Lists messages containing the word 'recruit'.
+          vivi chatlog search "join us" -alliance --page 2 - Shows the 2nd page of messages containing the phrase 'join us', but not the word 'alliance'.
+          vivi chatlog search 2000 - Lists messages containing the number '2000'.
+        """
+        _utils.assert_.authorized_channel_or_server_manager(ctx, _bot_settings.AUTHORIZED_CHANNEL_IDS)
+        page, search_terms = _utils.parse.int_option(search_terms, 'page')
+        page = max(page or 1, 1)
+        if not search_terms:
+            raise Exception('You need to specify the words to search for.')
+        async with _model.orm.create_async_session() as session:
+            pss_chat_loggers = await _model.orm.get_all_filtered_by_async(_model.chat_log.PssChatLogger, session, guild_id=ctx.guild.id)
+        channel_keys = sorted({pss_chat_logger.pss_channel_key for pss_chat_logger in pss_chat_loggers})
+        if not channel_keys:
+            raise Exception('There are no chat loggers configured for this server.')
+
+        records, has_more = await _model.chat_archive.search_messages(channel_keys, search_terms, page, _model.settings.CHAT_LOG_SEARCH_PAGE_SIZE)
+        if not records:
+            raise Exception(f'There are no logged messages matching `{search_terms}` on page {page}.')
+
+        lines = [f'__Messages matching `{search_terms}` (page {page})__']
+        for record in records:
+            user_name_and_fleet = f'**{_utils.discord.escape_markdown_and_mentions(record["user_name"] or "")}'
+            if record['alliance_name']:
+                user_name_and_fleet += f'** ({_utils.discord.escape_markdown_and_mentions(record["alliance_name"])})**'
+            timestamp = _utils.discord.get_localized_timestamp(record['message_date'], 'f')
+            lines.append(f'{timestamp} `{record["pss_channel_key"]}` {user_name_and_fleet}:** {_utils.discord.escape_markdown_and_mentions(record["message"] or "")}')
+        if has_more:
+            lines.append(f'_Use `vivi chatlog search {search_terms} --page {page + 1}` to see the next page._')
+        await _utils.discord.reply_lines(ctx, lines)
+
+
+    @_commands.guild_only()
+    @base.group(name='alert', brief='Configure chat alerts', invoke_without_command=True)
+    async def alert(self, ctx: _commands.Context) -> None:
+        """
+        Get notified, when the PSS chat logged on this server mentions certain words, like your fleet's name. Check out the sub commands.
+        """
+        if ctx.invoked_subcommand is None:
+            _utils.assert_.authorized_channel_or_server_manager(ctx, _bot_settings.AUTHORIZED_CHANNEL_IDS)
+            await ctx.send_help('chatlog alert')
+
+
+    @_commands.guild_only()
+    @alert.command(name='add', brief='Add chat alert')
+    async def alert_add(self, ctx: _commands.Context, channel: _discord.TextChannel, role: _Optional[_discord.Role] = None, *, keyword: str) -> None:
+        """
+        Add a chat alert to this server. Whenever a message logged by a chat logger on this server contains the keyword as a whole word, it'll be posted to the specified channel. The keyword also matches user and fleet names. Upper and lower case are ignored.
+
+        Usage:
+          vivi chatlog alert add [channel] <role> [keyword]
+
+        Parameters:
+          channel: Mandatory. The channel the alerts shall be posted to.
+          role:    Optional. A role to be pinged with each alert.
+          keyword: Mandatory. The word or phrase to watch for.
+
+        Examples:
+          vivi chatlog alert add #alerts @Officers Fleet Helper - Posts messages mentioning 'Fleet Helper' to the channel #alerts and pings the role @Officers.
+        """
+        _utils.assert_.authorized_channel_or_server_manager(ctx, _bot_settings.AUTHORIZED_CHANNEL_IDS)
+        rule = _model.chat_alert.ChatAlertRule.make(ctx.guild.id, channel.id, keyword, role.id if role else None)
+        if not rule.keyword:
+            raise Exception('The keyword must not be empty.')
+        if len(rule.keyword) > _model.chat_alert.KEYWORD_MAXIMUM_LENGTH:
+            raise Exception(f'The keyword must not be longer than {_model.chat_alert.KEYWORD_MAXIMUM_LENGTH} characters.')
+        async with _model.orm.create_async_session() as session:
+            await rule.create_async(session)
+        await _model.CHAT_ALERT_INDEX.refresh(rule.id)
+        role_text = f' and pinging the role \'{role.name}\'' if role else ''
+        await _utils.discord.reply(ctx, f'Posting logged messages containing `{rule.keyword}` to {channel.mention}{role_text} (ID: {rule.id}).')
+
+
+    @_commands.guild_only()
+    @alert.command(name='list', brief='List chat alerts')
+    async def alert_list(self, ctx: _commands.Context) -> None:
+        """
+        Lists all chat alerts configured on this server.
+
+        Usage:
+          vivi chatlog alert list
+        """
+        _utils.assert_.authorized_channel_or_server_manager(ctx, _bot_settings.AUTHORIZED_CHANNEL_IDS)
+        async with _model.orm.create_async_session() as session:
+            rules = await _model.orm.get_all_filtered_by_async(_model.chat_alert.ChatAlertRule, session, guild_id=ctx.guild.id)
+        lines = ['__Listing chat alerts for this Discord server__']
+        for rule in sorted(rules, key=lambda rule: rule.id):
+            line = f'ID {rule.id} - `{rule.keyword}` - <#{rule.channel_id}>'
+            if rule.role_id:
+                role = ctx.guild.get_role(rule.role_id)
+                line += f' - pings \'{role.name if role else rule.role_id}\''
+            lines.append(line)
+        if len(lines) == 1:
+            lines.append('There are no chat alerts configured for this server.')
+        await _utils.discord.reply_lines(ctx, lines)
+
+
+    @_commands.guild_only()
+    @alert.command(name='delete', brief='Delete chat alert', aliases=['remove'])
+    async def alert_delete(self, ctx: _commands.Context, alert_id: int) -> None:
+        """
+        Removes a chat alert.
+
+        Usage:
+          vivi chatlog alert delete [alert_id]
+
+        Parameters:
+          alert_id: Mandatory. The ID of the chat alert to be deleted.
+
+        Examples:
+          vivi chatlog alert delete 1 - Removes the chat alert with the ID '1'.
+        """
+        _utils.assert_.authorized_channel_or_server_manager(ctx, _bot_settings.AUTHORIZED_CHANNEL_IDS)
+        async with _model.orm.create_async_session() as session:
+            rule: _model.chat_alert.ChatAlertRule = await _model.orm.get_first_filtered_by_async(
+                _model.chat_alert.ChatAlertRule,
+                session,
+                id=alert_id,
+                guild_id=ctx.guild.id,
+            )
+            if not rule:
+                raise Exception(f'A chat alert with the ID {alert_id} does not exist on this server.')
+            await rule.delete_async(session)
+        await _model.CHAT_ALERT_INDEX.refresh(alert_id)
+        await _utils.discord.reply(ctx, f'The chat alert for `{rule.keyword}` has been deleted.')
+
+
+    @_commands.is_owner()
+    @base.group(name='stats', brief='Show chat logging metrics', invoke_without_command=True, hidden=True)
+    async def stats(self, ctx: _commands.Context) -> None:
+        """
+        Shows fetch, checkpoint and delivery metrics of all channel keys and chat loggers since the bot started.
+
+        Usage:
+          vivi chatlog stats
+        """
+        if ctx.invoked_subcommand is None:
+            snapshot = await self.__create_metrics_snapshot()
+            lines = [
+                f'__Chat logging metrics__',
+                f'Running since {_utils.discord.get_localized_timestamp(_datetime.datetime.fromisoformat(snapshot["started_at"]), "R")}, {snapshot["tick_count"]} ticks, {snapshot["maintenance_skip_count"]} skipped for maintenance',
+                '_ _',
+                '**PSS channel keys**',
+            ]
+            for channel_key, metrics in snapshot['channel_keys'].items():
+                lines.append(
+                    f'`{channel_key}` every {metrics["poll_interval"]:.0f}s - fetched {metrics["fetch_count"]}x in {_format_seconds(metrics["fetch_latency"]["mean"])} (max {_format_seconds(metrics["fetch_latency"]["max"])}), '
+                    f'{metrics["failure_count"]} failed, {metrics["retry_count"]} retries, {metrics["maintenance_skip_count"]} skipped - '
+                    f'last {metrics["last_new_message_count"]}/{metrics["last_message_count"]} new, {metrics["new_message_count"]} new in total'
+                )
+            lines.extend(['_ _', '**Chat loggers**'])
+            for pss_chat_log_id, metrics in snapshot['loggers'].items():
+                lines.append(
+                    f'ID {pss_chat_log_id} (`{metrics["pss_channel_key"]}`) - lag {metrics["checkpoint_lag"] if metrics["checkpoint_lag"] is not None else "-"} IDs, '
+                    f'{metrics["delivered_message_count"]} messages in {metrics["delivered_post_count"]} posts, latency {_format_seconds(metrics["delivery_latency"]["mean"])} (last {_format_seconds(metrics["delivery_latency"]["last"])}), '
+                    f'{metrics["delivery_failure_count"]} failed, {metrics["pending_delivery_count"]} pending, {metrics["parked_delivery_count"]} given up'
+                )
+            await _utils.discord.reply_lines(ctx, lines)
+
+
+    @_commands.is_owner()
+    @stats.command(name='json', brief='Export chat logging metrics', hidden=True)
+    async def stats_json(self, ctx: _commands.Context) -> None:
+        """
+        Uploads the chat logging metrics as a JSON file.
+
+        Usage:
+          vivi chatlog stats json
+        """
+        snapshot = await self.__create_metrics_snapshot()
+        file_name = f'chat-log-metrics_{_utils.datetime.get_utc_now().strftime("%Y%m%d-%H%M%S")}.json'
+        await ctx.reply('Chat logging metrics:', file=_discord.File(_io.BytesIO(_json.dumps(snapshot, indent=2).encode('utf-8')), filename=file_name))
+
+
+    async def __create_metrics_snapshot(self) -> dict:
+        snapshot = self.__metrics.snapshot()
+        for channel_key, metrics in snapshot['channel_keys'].items():
+            metrics['poll_interval'] = self.__scheduler.get_interval(channel_key)
+        backlog = await _model.chat_log.PssChatLogDelivery.get_backlog()
+        for pss_chat_log_id, metrics in snapshot['loggers'].items():
+            delivery_count, oldest_created_at, parked_delivery_count = backlog.get(int(pss_chat_log_id), (0, None, 0))
+            metrics['pending_delivery_count'] = delivery_count
+            metrics['parked_delivery_count'] = parked_delivery_count
+            metrics['oldest_pending_delivery_at'] = oldest_created_at.isoformat() if oldest_created_at else None
+        return snapshot
+
+
     @_commands.guild_only()
     @base.command(name='delete', brief='Delete chat logger', aliases=['remove'])
     async def delete(self, ctx: _commands.Context, logger_id: int) -> None:
@@ -318,8 +721,8 @@ class ChatLogger(_CogBase):
           vivi chatlog delete 1 - Removes the chat logger with the ID '1'.
         """
         _utils.assert_.authorized_channel_or_server_manager(ctx, _bot_settings.AUTHORIZED_CHANNEL_IDS)
-        with _model.orm.create_session() as session:
-            pss_chat_logger: _model.chat_log.PssChatLogger = _model.orm.get_first_filtered_by(
+        async with _model.orm.create_async_session() as session:
+            pss_chat_logger: _model.chat_log.PssChatLogger = await _model.orm.get_first_filtered_by_async(
                 _model.chat_log.PssChatLogger,
                 session,
                 id=logger_id,
@@ -337,14 +740,18 @@ class ChatLogger(_CogBase):
         if aborted:
             await _utils.discord.reply(ctx, f'The request has been cancelled.')
         elif delete_log:
-            with _model.orm.create_session() as session:
-                pss_chat_logger = _model.orm.get_by_id(_model.chat_log.PssChatLogger, session, logger_id)
-                session.delete(pss_chat_logger)
-                session.commit()
+            async with _model.orm.create_async_session() as session:
+                pss_chat_logger = await _model.orm.get_by_id_async(_model.chat_log.PssChatLogger, session, logger_id)
+                await session.delete(pss_chat_logger)
+                await session.commit()
             await _utils.discord.reply(ctx, f'The chat log has been deleted.')
         else:
             await _utils.discord.reply(ctx, f'The chat log has not been deleted.')
 
 
+def _format_seconds(seconds: _Optional[float]) -> str:
+    return f'{seconds:.2f}s' if seconds is not None else '-'
+
+
 def setup(bot: _model.PssApiDiscordBot):
     bot.add_cog(ChatLogger(bot))
\ No newline at end of file
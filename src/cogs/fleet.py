@@ -1,11 +1,18 @@
+import asyncio as _asyncio
+from datetime import datetime as _datetime
+from datetime import timedelta as _timedelta
+from datetime import timezone as _timezone
 import json as _json
 from typing import Callable as _Callable
+from typing import Dict as _Dict
 from typing import List as _List
 from typing import Optional as _Optional
 from typing import Tuple as _Tuple
 
+import asyncpg as _asyncpg
 import discord as _discord
 import discord.ext.commands as _commands
+import discord.ext.tasks as _tasks
 import pssapi as _pssapi
 
 from .cog_base import CogBase as _CogBase
@@ -21,6 +28,73 @@ class Fleets(_CogBase):
     """
     Commands for configuring Reaction Roles on this server.
     """
+    __FLEET_SNAPSHOT_CHECK_INTERVAL: float = 60.0
+    __FLEET_HISTORY_TOP_MEMBER_COUNT: int = 5
+    __FLEET_LEADERBOARD_MOVER_COUNT: int = 5
+    __FLEET_STATS_DAY_COUNT: int = 7
+    __FLEET_STATS_WEEK_COUNT: int = 4
+
+    def __init__(self, bot: _model.PssApiDiscordBot) -> None:
+        super().__init__(bot)
+        self.__last_fleet_snapshot_at: _Optional[_datetime] = None
+        self.collect_fleet_snapshots.start()
+
+
+    def cog_unload(self):
+        if self.collect_fleet_snapshots.is_running() and self.collect_fleet_snapshots._can_be_cancelled():
+            self.collect_fleet_snapshots.cancel()
+
+
+    @_tasks.loop(seconds=__FLEET_SNAPSHOT_CHECK_INTERVAL)
+    async def collect_fleet_snapshots(self):
+        """
+        Snapshots all tracked fleets once per snapshot interval. Fleets that couldn't be retrieved get retried on the next check within the same interval.
+        """
+        collected_at = _model.fleet_history.get_collection_time(_utils.datetime.get_utc_now(), _model.settings.FLEET_SNAPSHOT_INTERVAL)
+        if collected_at == self.__last_fleet_snapshot_at:
+            return
+
+        try:
+            alliance_ids = await _model.fleet_history.get_tracked_alliance_ids()
+            alliance_ids -= await _model.fleet_history.get_collected_alliance_ids(collected_at)
+        except (_asyncpg.PostgresError, OSError) as ex:
+            print('[collect_fleet_snapshots] Could not retrieve the tracked fleets from database:')
+            print(ex)
+            return
+
+        errors = {}
+        if alliance_ids:
+            snapshots, errors = await _model.fleet_history.fetch_snapshots(
+                self.bot.pssapi_call,
+                self.bot.pssapi_client,
+                sorted(alliance_ids),
+                _model.settings.FLEET_UPDATE_MAX_CONCURRENT_REQUESTS,
+                _model.settings.FLEET_UPDATE_TIMEOUT,
+            )
+            if await _model.fleet_history.store_snapshots(collected_at, snapshots) < 0:
+                return
+            if errors:
+                print(f'[collect_fleet_snapshots] Could not retrieve {len(errors)} of {len(alliance_ids)} fleets: {", ".join(f"{alliance_id} ({type(error).__name__})" for alliance_id, error in errors.items())}')
+
+        # Alliances that don't exist anymore won't show up on a retry either
+        if all(_model.alliance_cache.is_not_found_error(error) for error in errors.values()):
+            self.__last_fleet_snapshot_at = collected_at
+            try:
+                dropped_partitions = await _model.fleet_history.drop_expired_partitions(_timedelta(days=_model.settings.FLEET_SNAPSHOT_RETENTION_DAYS))
+            except (_asyncpg.PostgresError, OSError) as ex:
+                print('[collect_fleet_snapshots] Could not drop expired fleet snapshots:')
+                print(ex)
+                return
+            if dropped_partitions:
+                print(f'[collect_fleet_snapshots] Dropped expired partitions: {", ".join(dropped_partitions)}')
+            if not (await _model.fleet_rollup.delete_expired_rollups(_timedelta(days=_model.settings.FLEET_SNAPSHOT_RETENTION_DAYS))):
+                print('[collect_fleet_snapshots] Could not delete expired daily fleet rollups.')
+
+
+    @collect_fleet_snapshots.before_loop
+    async def before_collect_fleet_snapshots(self):
+        await self.bot.wait_until_ready()
+
 
     @_commands.group(name='fleet', aliases=['f'], brief='Set up fleets', invoke_without_command=True)
     async def base(self, ctx: _commands.Context) -> None:
@@ -40,11 +114,10 @@ class Fleets(_CogBase):
         """
         _utils.assert_.authorized_channel_or_server_manager(ctx, _bot_settings.AUTHORIZED_CHANNEL_IDS)
         
-        access_token = await self.bot.pssapi_login()
-        alliances = await self.bot.pssapi_client.alliance_service.search_alliances(access_token, fleet_name, 0, 100)
+        alliances = await self.bot.alliance_cache.search_alliances(fleet_name, 0, 100)
         
-        with _model.orm.create_session() as session:
-            existing_fleets = _model.orm.get_all_filtered_by(
+        async with _model.orm.create_async_session() as session:
+            existing_fleets = await _model.orm.get_all_filtered_by_async(
                 _model.Fleet,
                 session,
                 guild_id=ctx.guild.id,
@@ -70,15 +143,15 @@ class Fleets(_CogBase):
         if confirm:
             short_name = None
             short_name, aborted, skipped = await _utils.discord.inquire_for_text(ctx, 'Specify a short name for the fleet.', skip_text=f'No short name has been specified for the fleet {alliance.alliance_name}')
-            with _model.orm.create_session() as session:
+            async with _model.orm.create_async_session() as session:
                 fleet = _model.Fleet.make(
                     alliance.id,
                     ctx.guild.id,
                     alliance.alliance_name,
                     short_name,
                 )
-                fleet.create(session)
-                fleet.save(session)
+                await fleet.create_async(session)
+                await fleet.save_async(session)
             if short_name:
                 await _utils.discord.send(ctx, f'The fleet **{alliance.alliance_name}** [{short_name}] (ID: {alliance.id}) has been added.')
             else:
@@ -95,8 +168,8 @@ class Fleets(_CogBase):
         """
         _utils.assert_.authorized_channel_or_server_manager(ctx, _bot_settings.AUTHORIZED_CHANNEL_IDS)
         
-        with _model.orm.create_session() as session:
-            existing_fleets = _model.orm.get_all_filtered_by(
+        async with _model.orm.create_async_session() as session:
+            existing_fleets = await _model.orm.get_all_filtered_by_async(
                 _model.Fleet,
                 session,
                 guild_id=ctx.guild.id,
@@ -112,13 +185,103 @@ class Fleets(_CogBase):
                 raise Exception('No fleet configured for this server matches the given fleet name.')
         
         existing_fleets = sorted(existing_fleets, key=lambda fleet: fleet.fleet_name or '')
+        latest_snapshots = await _model.fleet_history.get_latest(fleet.id for fleet in existing_fleets)
         lines = ['# Fleets configured for this server']
         for fleet in existing_fleets:
             unix_timestamp = _utils.datetime.get_unix_timestamp(fleet.created_at)
             if fleet.short_name:
-                lines.append(f'**{fleet.fleet_name}** [{fleet.short_name}] (ID: {fleet.id}), added: <t:{unix_timestamp}:D> <t:{unix_timestamp}:T>')
+                line = f'**{fleet.fleet_name}** [{fleet.short_name}] (ID: {fleet.id}), added: <t:{unix_timestamp}:D> <t:{unix_timestamp}:T>'
             else:
-                lines.append(f'**{fleet.fleet_name}** (ID: {fleet.id}), added: <t:{unix_timestamp}:D> <t:{unix_timestamp}:T>')
+                line = f'**{fleet.fleet_name}** (ID: {fleet.id}), added: <t:{unix_timestamp}:D> <t:{unix_timestamp}:T>'
+            latest_snapshot = latest_snapshots.get(fleet.id)
+            if latest_snapshot:
+                line += f', rank {latest_snapshot["ranking"]} at {latest_snapshot["trophy"]} 🏆 with {latest_snapshot["member_count"]} members'
+            lines.append(line)
+        await _utils.discord.send_lines(ctx, lines)
+
+
+    @_commands.guild_only()
+    @base.command(name='history', aliases=['hist'], brief='Show the history of a fleet')
+    async def history(self, ctx: _commands.Context, *, fleet_name: str = None) -> None:
+        """
+        Show how trophies, rank and member count of a configured fleet changed per day over the last days and which members gained or lost the most trophies.
+
+        Add --days <number> to change the number of days, which defaults to 7. For example: fleet history --days 14 100 Club
+        """
+        _utils.assert_.authorized_channel_or_server_manager(ctx, _bot_settings.AUTHORIZED_CHANNEL_IDS)
+
+        days, fleet_name = _utils.parse.int_option(fleet_name, 'days')
+        days = min(max(days or 7, 1), _model.settings.FLEET_SNAPSHOT_RETENTION_DAYS)
+        fleet = await self.__select_fleet(ctx, fleet_name, 'Select a fleet')
+        since = _utils.datetime.get_utc_now() - _timedelta(days=days)
+        daily_rollups = await _model.fleet_rollup.get_rollups(fleet.id, _model.fleet_rollup.PERIOD_DAY, _model.fleet_rollup.get_period_start(since, _model.fleet_rollup.PERIOD_DAY))
+        if not daily_rollups:
+            raise Exception(f'There is no history for the fleet **{fleet.fleet_name}** yet.')
+
+        lines = [f'# History of {fleet.fleet_name} over the last {days} days']
+        for daily_rollup in daily_rollups:
+            lines.append(f'<t:{_get_period_unix_timestamp(daily_rollup)}:D>: {_get_rollup_description(daily_rollup)}')
+
+        member_history = await _model.fleet_history.get_member_history(fleet.id, since)
+        latest_members = await _model.fleet_history.get_latest_members(fleet.id)
+        first_trophies: _Dict[int, int] = {}
+        last_trophies: _Dict[int, int] = {}
+        for record in member_history:
+            first_trophies.setdefault(record['user_id'], record['trophy'])
+            last_trophies[record['user_id']] = record['trophy']
+        trophy_changes = sorted(
+            ((last_trophies[user_id] - first_trophies[user_id], latest_member['user_name']) for user_id, latest_member in latest_members.items() if user_id in first_trophies),
+            key=lambda change: -change[0],
+        )
+        top_member_count = Fleets.__FLEET_HISTORY_TOP_MEMBER_COUNT
+        gains = [f'{user_name}: {change:+d} 🏆' for change, user_name in trophy_changes[:top_member_count] if change > 0]
+        losses = [f'{user_name}: {change:+d} 🏆' for change, user_name in reversed(trophy_changes[-top_member_count:]) if change < 0]
+        if gains:
+            lines.extend(['', '**Top trophy gains**', *gains])
+        if losses:
+            lines.extend(['', '**Top trophy losses**', *losses])
+        await _utils.discord.send_lines(ctx, lines)
+
+
+    @_commands.guild_only()
+    @base.command(name='leaderboard', aliases=['lb', 'top'], brief='Rank the fleets of this server')
+    async def leaderboard(self, ctx: _commands.Context, period: str = _model.fleet_rollup.PERIOD_WEEK) -> None:
+        """
+        Rank the fleets configured for this server by trophies and show how their trophies and rank changed today or this week.
+
+        The period can be: day, week
+        """
+        _utils.assert_.authorized_channel_or_server_manager(ctx, _bot_settings.AUTHORIZED_CHANNEL_IDS)
+
+        try:
+            period = _model.fleet_rollup.parse_period(period)
+        except ValueError as ex:
+            raise Exception(str(ex))
+
+        async with _model.orm.create_async_session() as session:
+            existing_fleets = await _model.orm.get_all_filtered_by_async(
+                _model.Fleet,
+                session,
+                guild_id=ctx.guild.id,
+            )
+
+        if not existing_fleets:
+            raise Exception('There are no fleets configured for this server.')
+
+        rollups = await _model.fleet_rollup.get_current_rollups((fleet.id for fleet in existing_fleets), period)
+        if not rollups:
+            raise Exception('There are no stats for the fleets configured for this server yet.')
+
+        ranked_fleets = sorted((fleet for fleet in existing_fleets if fleet.id in rollups), key=lambda fleet: -rollups[fleet.id]['trophy_close'])
+        lines = [f'# Fleet leaderboard {"of today" if period == _model.fleet_rollup.PERIOD_DAY else "of this week"}']
+        for position, fleet in enumerate(ranked_fleets, 1):
+            lines.append(f'{position}. **{fleet.fleet_name}**: {_get_rollup_description(rollups[fleet.id])}')
+
+        movers = sorted(ranked_fleets, key=lambda fleet: -(rollups[fleet.id]['trophy_close'] - rollups[fleet.id]['trophy_open']))
+        if len(movers) > 1:
+            lines.extend(['', '**Top movers**'])
+            for fleet in movers[:Fleets.__FLEET_LEADERBOARD_MOVER_COUNT]:
+                lines.append(f'{fleet.fleet_name}: {rollups[fleet.id]["trophy_close"] - rollups[fleet.id]["trophy_open"]:+d} 🏆, rank {rollups[fleet.id]["ranking_open"] - rollups[fleet.id]["ranking_close"]:+d}')
         await _utils.discord.send_lines(ctx, lines)
 
 
@@ -130,8 +293,8 @@ class Fleets(_CogBase):
         """
         _utils.assert_.authorized_channel_or_server_manager(ctx, _bot_settings.AUTHORIZED_CHANNEL_IDS)
         
-        with _model.orm.create_session() as session:
-            existing_fleets = _model.orm.get_all_filtered_by(
+        async with _model.orm.create_async_session() as session:
+            existing_fleets = await _model.orm.get_all_filtered_by_async(
                 _model.Fleet,
                 session,
                 guild_id=ctx.guild.id,
@@ -159,14 +322,50 @@ class Fleets(_CogBase):
         confirmator = _utils.Confirmator(ctx, f'Do you want to remove the fleet {_model.Fleet.get_fleet_search_description(fleet)}?')
         confirm = await confirmator.wait_for_option_selection()
         if confirm:
-            with _model.orm.create_session() as session:
-                fleet.delete(session)
-                fleet.save(session)
+            async with _model.orm.create_async_session() as session:
+                await fleet.delete_async(session)
+                await fleet.save_async(session)
             await _utils.discord.send(ctx, f'The fleet **{alliance_name}** (ID: {alliance_id}) has been deleted.')
         else:
             raise Exception('Process aborted by user.')
 
 
+    @_commands.guild_only()
+    @base.command(name='stats', brief='Show the stats of a fleet')
+    async def stats(self, ctx: _commands.Context, *, fleet_name: str = None) -> None:
+        """
+        Show the current trophies, rank and member count of a configured fleet and how they changed over the last days and weeks.
+        """
+        _utils.assert_.authorized_channel_or_server_manager(ctx, _bot_settings.AUTHORIZED_CHANNEL_IDS)
+
+        fleet = await self.__select_fleet(ctx, fleet_name, 'Select a fleet')
+        utc_now = _utils.datetime.get_utc_now()
+        daily_since = _model.fleet_rollup.get_period_start(utc_now - _timedelta(days=Fleets.__FLEET_STATS_DAY_COUNT - 1), _model.fleet_rollup.PERIOD_DAY)
+        weekly_since = _model.fleet_rollup.get_period_start(utc_now - _timedelta(weeks=Fleets.__FLEET_STATS_WEEK_COUNT - 1), _model.fleet_rollup.PERIOD_WEEK)
+        daily_rollups, weekly_rollups = await _asyncio.gather(
+            _model.fleet_rollup.get_rollups(fleet.id, _model.fleet_rollup.PERIOD_DAY, daily_since),
+            _model.fleet_rollup.get_rollups(fleet.id, _model.fleet_rollup.PERIOD_WEEK, weekly_since),
+        )
+        if not daily_rollups and not weekly_rollups:
+            raise Exception(f'There are no stats for the fleet **{fleet.fleet_name}** yet.')
+
+        latest_rollup = max(daily_rollups + weekly_rollups, key=lambda rollup: rollup['last_collected_at'])
+        unix_timestamp = _utils.datetime.get_unix_timestamp(latest_rollup['last_collected_at'])
+        lines = [
+            f'# Stats of {fleet.fleet_name}',
+            f'Rank {latest_rollup["ranking_close"]} at {latest_rollup["trophy_close"]} 🏆 with {latest_rollup["member_count_close"]} members, as of <t:{unix_timestamp}:R>',
+        ]
+        if daily_rollups:
+            lines.extend(['', f'**Last {Fleets.__FLEET_STATS_DAY_COUNT} days**'])
+            for daily_rollup in daily_rollups:
+                lines.append(f'<t:{_get_period_unix_timestamp(daily_rollup)}:D>: {_get_rollup_description(daily_rollup)}, {daily_rollup["trophy_min"]} - {daily_rollup["trophy_max"]} 🏆')
+        if weekly_rollups:
+            lines.extend(['', f'**Last {Fleets.__FLEET_STATS_WEEK_COUNT} weeks**'])
+            for weekly_rollup in weekly_rollups:
+                lines.append(f'Week of <t:{_get_period_unix_timestamp(weekly_rollup)}:D>: {_get_rollup_description(weekly_rollup)}, {weekly_rollup["trophy_min"]} - {weekly_rollup["trophy_max"]} 🏆')
+        await _utils.discord.send_lines(ctx, lines)
+
+
     @_commands.guild_only()
     @base.command(name='update', brief='Update names of configured fleets')
     async def update(self, ctx: _commands.Context,) -> None:
@@ -175,8 +374,8 @@ class Fleets(_CogBase):
         """
         _utils.assert_.authorized_channel_or_server_manager(ctx, _bot_settings.AUTHORIZED_CHANNEL_IDS)
         
-        with _model.orm.create_session() as session:
-            existing_fleets = _model.orm.get_all_filtered_by(
+        async with _model.orm.create_async_session() as session:
+            existing_fleets = await _model.orm.get_all_filtered_by_async(
                 _model.Fleet,
                 session,
                 guild_id=ctx.guild.id,
@@ -185,24 +384,88 @@ class Fleets(_CogBase):
         if not existing_fleets:
             raise Exception('There are no fleets configured for this server.')
         
+        errors = await _model.Fleet.get_fleets(
+            existing_fleets,
+            self.bot.alliance_cache,
+            _model.settings.FLEET_UPDATE_MAX_CONCURRENT_REQUESTS,
+            _model.settings.FLEET_UPDATE_TIMEOUT,
+        )
+        if errors and all(isinstance(error, _pssapi.utils.exceptions.ServerMaintenanceError) for error in errors.values()):
+            raise next(iter(errors.values()))
+
         updated_fleets: _List[_model.Fleet] = []
-        access_token = await self.bot.pssapi_login()
         for existing_fleet in existing_fleets:
-            await existing_fleet.get_fleet(self.bot.pssapi_client, access_token)
-            if existing_fleet.fleet_name != existing_fleet.alliance.alliance_name:
+            if existing_fleet.id not in errors and existing_fleet.fleet_name != existing_fleet.alliance.alliance_name:
                 existing_fleet.fleet_name = existing_fleet.alliance.alliance_name
                 updated_fleets.append(existing_fleet)
         
         if updated_fleets:
-            with _model.orm.create_session() as session:
-                for updated_fleet in updated_fleets:
-                    updated_fleet = _model.orm.merge(session, updated_fleet)
-                    updated_fleet.save(session)
+            if not (await _model.Fleet.update_fleet_names(updated_fleets)):
+                raise Exception('Could not save the updated fleets.')
 
-            await _utils.discord.send(ctx, f'Updated {len(updated_fleets)} configured fleets.')
+        lines = []
+        if updated_fleets:
+            lines.append(f'Updated {len(updated_fleets)} configured fleets.')
         else:
-            await _utils.discord.send(ctx, 'No fleets had to be updated.')
+            lines.append('No fleets had to be updated.')
+        if errors:
+            lines.append(f'Could not retrieve {len(errors)} fleets:')
+            for existing_fleet in existing_fleets:
+                error = errors.get(existing_fleet.id)
+                if error is not None:
+                    error_text = 'Timed out' if isinstance(error, _asyncio.TimeoutError) else (getattr(error, 'message', None) or str(error) or type(error).__name__)
+                    lines.append(f'**{existing_fleet.fleet_name}** (ID: {existing_fleet.id}): {error_text}')
+        await _utils.discord.send_lines(ctx, lines)
+
+
+    async def __select_fleet(self, ctx: _commands.Context, fleet_name: _Optional[str], title: str) -> _model.Fleet:
+        async with _model.orm.create_async_session() as session:
+            existing_fleets = await _model.orm.get_all_filtered_by_async(
+                _model.Fleet,
+                session,
+                guild_id=ctx.guild.id,
+            )
+
+        if not existing_fleets:
+            raise Exception('There are no fleets configured for this server.')
+
+        if fleet_name:
+            fleet_name_lower = fleet_name.lower()
+            existing_fleets = [fleet for fleet in existing_fleets if fleet_name_lower in fleet.fleet_name.lower() or fleet_name_lower == (fleet.short_name or '').lower()]
+            if not existing_fleets:
+                raise Exception('No fleet configured for this server matches the given fleet name.')
+
+        if len(existing_fleets) == 1:
+            return existing_fleets[0]
+        selector = _utils.Selector(ctx, fleet_name, existing_fleets, _get_fleet_description, title)
+        selected, fleet = await selector.wait_for_option_selection()
+        if not selected:
+            raise Exception('No fleet has been selected by the user.')
+        return fleet
+
+
+
+
+
+# ---------- Helper ----------
+
+def _get_period_unix_timestamp(rollup: _asyncpg.Record) -> int:
+    period_start = rollup['period_start']
+    return _utils.datetime.get_unix_timestamp(_datetime(period_start.year, period_start.month, period_start.day, tzinfo=_timezone.utc))
+
+
+def _get_rollup_description(rollup: _asyncpg.Record) -> str:
+    return (
+        f'{rollup["trophy_close"]} 🏆 ({rollup["trophy_close"] - rollup["trophy_open"]:+d}), '
+        f'rank {rollup["ranking_close"]} ({rollup["ranking_open"] - rollup["ranking_close"]:+d}), '
+        f'{rollup["member_count_close"]} members ({rollup["member_count_close"] - rollup["member_count_open"]:+d})'
+    )
+
 
+def _get_fleet_description(fleet: _model.Fleet) -> str:
+    if fleet.short_name:
+        return f'{fleet.fleet_name} [{fleet.short_name}] (ID: {fleet.id})'
+    return f'{fleet.fleet_name} (ID: {fleet.id})'
 
 
 def setup(bot: _model.PssApiDiscordBot):
@@ -6,7 +6,7 @@ from typing import Tuple as _Tuple
 
 import discord as _discord
 import discord.ext.commands as _commands
-import psycopg2 as _psycopg2
+import sqlalchemy as _sqlalchemy
 
 from .cog_base import CogBase as _CogBase
 from .. import bot_settings as _bot_settings
@@ -33,30 +33,32 @@ class ReactionRoles(_CogBase):
             return
 
         try:
-            with _model.orm.create_session() as session:
-                reaction_roles: _List[_model.ReactionRole] = _model.orm.get_all_filtered_by(
-                    _model.ReactionRole,
-                    session,
-                    guild_id=payload.member.guild.id,
-                    is_active=True,
-                    message_id=payload.message_id
-                )
-        except _psycopg2.OperationalError as ex:
+            reaction_roles = await _model.REACTION_ROLE_INDEX.get(payload.member.guild.id, payload.message_id, payload.emoji)
+        except (_sqlalchemy.exc.OperationalError, OSError) as ex:
             print('[on_raw_reaction_add] Could not retrieve Reaction Roles from database:')
             print(ex)
             return
-        
+        if not reaction_roles:
+            return
+
         member_roles_ids = [role.id for role in payload.member.roles]
         for reaction_role in reaction_roles:
-            emoji_match = reaction_role.reaction == payload.emoji.name or reaction_role.reaction == f'<:{payload.emoji.name}:{payload.emoji.id}>'
-            if emoji_match:
-                member_meets_requirements = all(requirement.role_id in member_roles_ids for requirement in reaction_role.role_requirements)
-                if member_meets_requirements:
-                    await reaction_role.apply_add(payload.member)
+            member_meets_requirements = all(requirement.role_id in member_roles_ids for requirement in reaction_role.role_requirements)
+            if member_meets_requirements:
+                await reaction_role.apply_add(payload.member)
 
 
     @_CogBase.listener()
     async def on_raw_reaction_remove(self, payload: _discord.RawReactionActionEvent) -> None:
+        try:
+            reaction_roles = await _model.REACTION_ROLE_INDEX.get(payload.guild_id, payload.message_id, payload.emoji)
+        except (_sqlalchemy.exc.OperationalError, OSError) as ex:
+            print('[on_raw_reaction_remove] Could not retrieve Reaction Roles from database:')
+            print(ex)
+            return
+        if not reaction_roles:
+            return
+
         guild = self.bot.get_guild(payload.guild_id)
         if not guild:
             return
@@ -65,27 +67,11 @@ class ReactionRoles(_CogBase):
         if not member or member == guild.me:
             return
 
-        try:
-            with _model.orm.create_session() as session:
-                reaction_roles: _List[_model.ReactionRole] = _model.orm.get_all_filtered_by(
-                    _model.ReactionRole,
-                    session,
-                    guild_id=payload.guild_id,
-                    is_active=True,
-                    message_id=payload.message_id
-                )
-        except _psycopg2.OperationalError as ex:
-            print('[on_raw_reaction_remove] Could not retrieve Reaction Roles from database:')
-            print(ex)
-            return
-    
         member_roles_ids = [role.id for role in member.roles]
         for reaction_role in reaction_roles:
-            emoji_match = reaction_role.reaction == payload.emoji.name or reaction_role.reaction == f'<:{payload.emoji.name}:{payload.emoji.id}>'
-            if emoji_match:
-                member_meets_requirements = all(requirement.role_id in member_roles_ids for requirement in reaction_role.role_requirements)
-                if member_meets_requirements:
-                    await reaction_role.apply_remove(member)
+            member_meets_requirements = all(requirement.role_id in member_roles_ids for requirement in reaction_role.role_requirements)
+            if member_meets_requirements:
+                await reaction_role.apply_remove(member)
 
 
     @_commands.guild_only()
@@ -119,8 +105,8 @@ class ReactionRoles(_CogBase):
         """
         _utils.assert_.authorized_channel_or_server_manager(ctx, _bot_settings.AUTHORIZED_CHANNEL_IDS)
         success = False
-        with _model.orm.create_session() as session:
-            reaction_role = _model.orm.get_first_filtered_by(
+        async with _model.orm.create_async_session() as session:
+            reaction_role = await _model.orm.get_first_filtered_by_async(
                 _model.ReactionRole,
                 session,
                 id=reaction_role_id,
@@ -131,9 +117,10 @@ class ReactionRoles(_CogBase):
                 raise Exception(f'The Reaction Role {reaction_role} is already active.')
             success = await reaction_role.try_activate(ctx)
             if success:
-                with _model.orm.create_session() as session:
-                    reaction_role = _model.orm.merge(session, reaction_role)
-                    reaction_role.save(session)
+                async with _model.orm.create_async_session() as session:
+                    reaction_role = await _model.orm.merge_async(session, reaction_role)
+                    await reaction_role.save_async(session)
+                await _model.REACTION_ROLE_INDEX.refresh(reaction_role.id)
             else:
                 raise Exception(f'Failed to activate Reaction Role {reaction_role}.')
         else:
@@ -156,8 +143,8 @@ class ReactionRoles(_CogBase):
         reaction_roles: _List[_model.ReactionRole] = []
         succeeded: _List[_model.ReactionRole] = []
         failed: _List[_model.ReactionRole] = []
-        with _model.orm.create_session() as session:
-            reaction_roles = _model.orm.get_all_filtered_by(
+        async with _model.orm.create_async_session() as session:
+            reaction_roles = await _model.orm.get_all_filtered_by_async(
                 _model.ReactionRole,
                 session,
                 guild_id=ctx.guild.id,
@@ -172,10 +159,11 @@ class ReactionRoles(_CogBase):
             else:
                 raise Exception(f'There are no Reaction Roles configured on this server.')
         if succeeded:
-            with _model.orm.create_session() as session:
+            async with _model.orm.create_async_session() as session:
                 for reaction_role in succeeded:
-                    _model.orm.merge(session, reaction_role)
-            session.commit()
+                    await _model.orm.merge_async(session, reaction_role)
+                await session.commit()
+            await _model.REACTION_ROLE_INDEX.refresh(*[reaction_role.id for reaction_role in succeeded])
         response_lines = [f'Activated {len(succeeded)} of {len(reaction_roles)} Reaction Roles on this server.']
         if failed:
             response_lines.append('Could not activate the following roles:')
@@ -279,16 +267,17 @@ class ReactionRoles(_CogBase):
             await _utils.discord.reply(ctx, abort_text)
             return
 
-        with _model.orm.create_session() as session:
+        async with _model.orm.create_async_session() as session:
             reaction_role = _model.ReactionRole.make(ctx.guild.id, channel_id, message_id, name, emoji)
-            reaction_role.create(session, commit=False)
+            await reaction_role.create_async(session, commit=False)
             for role_reaction_change_def in role_reaction_changes:
                 role_change = reaction_role.add_change(*role_reaction_change_def)
-                role_change.create(session, commit=False)
+                await role_change.create_async(session, commit=False)
             for role_id in role_reaction_requirements:
                 role_requirement = reaction_role.add_requirement(role_id)
-                role_requirement.create(session, commit=False)
-            reaction_role.save(session)
+                await role_requirement.create_async(session, commit=False)
+            await reaction_role.save_async(session)
+        await _model.REACTION_ROLE_INDEX.refresh(reaction_role.id)
 
         activate, _, _ = await _utils.discord.inquire_for_true_false(ctx, f'Created Reaction Role {reaction_role}.\nDo you want to activate it now?')
         if activate:
@@ -315,8 +304,8 @@ class ReactionRoles(_CogBase):
           vivi reactionrole deactivate 1 - Attempts to deactivate the Reaction Role with the ID 1.
         """
         _utils.assert_.authorized_channel_or_server_manager(ctx, _bot_settings.AUTHORIZED_CHANNEL_IDS)
-        with _model.orm.create_session() as session:
-            reaction_role = _model.orm.get_first_filtered_by(
+        async with _model.orm.create_async_session() as session:
+            reaction_role = await _model.orm.get_first_filtered_by_async(
                 _model.ReactionRole,
                 session,
                 id=reaction_role_id,
@@ -326,9 +315,10 @@ class ReactionRoles(_CogBase):
             if not reaction_role.is_active:
                 raise Exception(f'The Reaction Role {reaction_role} is already inactive.')
             if (await reaction_role.try_deactivate(ctx)):
-                with _model.orm.create_session() as session:
-                    reaction_role = _model.orm.merge(session, reaction_role)
-                    reaction_role.save(session)
+                async with _model.orm.create_async_session() as session:
+                    reaction_role = await _model.orm.merge_async(session, reaction_role)
+                    await reaction_role.save_async(session)
+                await _model.REACTION_ROLE_INDEX.refresh(reaction_role.id)
             else:
                 raise Exception(f'Failed to deactivate Reaction Role {reaction_role}.')
         else:
@@ -350,8 +340,8 @@ class ReactionRoles(_CogBase):
         _utils.assert_.authorized_channel_or_server_manager(ctx, _bot_settings.AUTHORIZED_CHANNEL_IDS)
         succeeded: _List[_model.ReactionRole] = []
         failed: _List[_model.ReactionRole] = []
-        with _model.orm.create_session() as session:
-            reaction_roles = _model.orm.get_all_filtered_by(
+        async with _model.orm.create_async_session() as session:
+            reaction_roles = await _model.orm.get_all_filtered_by_async(
                 _model.ReactionRole,
                 session,
                 guild_id=ctx.guild.id
@@ -365,10 +355,11 @@ class ReactionRoles(_CogBase):
         else:
             raise Exception(f'There are no Reaction Roles configured on this server.')
         if succeeded:
-            with _model.orm.create_session() as session:
+            async with _model.orm.create_async_session() as session:
                 for reaction_role in succeeded:
-                    _model.orm.merge(session, reaction_role)
-                session.commit()
+                    await _model.orm.merge_async(session, reaction_role)
+                await session.commit()
+            await _model.REACTION_ROLE_INDEX.refresh(*[reaction_role.id for reaction_role in succeeded])
         response_lines = [f'Deactivated {len(succeeded)} of {len(reaction_roles)} Reaction Roles on this server.']
         if failed:
             response_lines.append('Could not deactivate the following roles:')
@@ -396,8 +387,8 @@ class ReactionRoles(_CogBase):
           vivi reactionrole delete 1 - Attempts to delete the Reaction Role with the ID 1
         """
         _utils.assert_.authorized_channel_or_server_manager(ctx, _bot_settings.AUTHORIZED_CHANNEL_IDS)
-        with _model.orm.create_session() as session:
-            reaction_role = _model.orm.get_first_filtered_by(
+        async with _model.orm.create_async_session() as session:
+            reaction_role = await _model.orm.get_first_filtered_by_async(
                 _model.ReactionRole,
                 session,
                 id=reaction_role_id,
@@ -416,9 +407,10 @@ class ReactionRoles(_CogBase):
                 if reaction_role.is_active:
                     cmd = self.bot.get_command('reactionrole deactivate')
                     await ctx.invoke(cmd, reaction_role_id=reaction_role_id)
-                with _model.orm.create_session() as session:
-                    reaction_role = _model.orm.get_by_id(_model.ReactionRole, session, reaction_role_id)
-                    reaction_role.delete(session)
+                async with _model.orm.create_async_session() as session:
+                    reaction_role = await _model.orm.get_by_id_async(_model.ReactionRole, session, reaction_role_id)
+                    await reaction_role.delete_async(session)
+                await _model.REACTION_ROLE_INDEX.refresh(reaction_role_id)
                 await _utils.discord.reply(ctx, f'Success. The Reaction Role {reaction_role} has been deleted.', mention_author=True)
         if not delete:
             await _utils.discord.reply(ctx, f'Aborted. The Reaction Role {reaction_role} has not been deleted.', mention_author=True)
@@ -443,8 +435,8 @@ class ReactionRoles(_CogBase):
           vivi reactionrole edit 1 - Attempts to edit the Reaction Role with the ID 1
         """
         _utils.assert_.authorized_channel_or_server_manager(ctx, _bot_settings.AUTHORIZED_CHANNEL_IDS)
-        with _model.orm.create_session() as session:
-            reaction_role = _model.orm.get_first_filtered_by(
+        async with _model.orm.create_async_session() as session:
+            reaction_role = await _model.orm.get_first_filtered_by_async(
                 _model.ReactionRole,
                 session,
                 id=reaction_role_id,
@@ -510,9 +502,10 @@ class ReactionRoles(_CogBase):
             else:
                 keep_editing, _, _ = await _utils.discord.inquire_for_true_false(ctx, f'Do you want to make more changes to the Reaction Role {reaction_role}?')
             keep_editing = keep_editing or False
-        with _model.orm.create_session() as session:
-            reaction_role = _model.orm.merge(session, reaction_role)
-            reaction_role.save(session)
+        async with _model.orm.create_async_session() as session:
+            reaction_role = await _model.orm.merge_async(session, reaction_role)
+            await reaction_role.save_async(session)
+        await _model.REACTION_ROLE_INDEX.refresh(reaction_role.id)
         activate, _, _ = await _utils.discord.inquire_for_true_false(ctx, f'Finished editing Reaction Role {reaction_role}.\nDo you want to activate it now?')
         if activate:
             cmd = self.bot.get_command('reactionrole activate')
@@ -536,8 +529,8 @@ class ReactionRoles(_CogBase):
           vivi reactionrole list false - Prints all Reaction Roles configured on this server without any messages and embeds to be sent on Role changes.
         """
         _utils.assert_.authorized_channel_or_server_manager(ctx, _bot_settings.AUTHORIZED_CHANNEL_IDS)
-        with _model.orm.create_session() as session:
-            reaction_roles = _model.orm.get_all_filtered_by(
+        async with _model.orm.create_async_session() as session:
+            reaction_roles = await _model.orm.get_all_filtered_by_async(
                 _model.ReactionRole,
                 session,
                 guild_id=ctx.guild.id
@@ -569,8 +562,8 @@ class ReactionRoles(_CogBase):
           vivi reactionrole list active false - Prints all active Reaction Roles configured on this server without any messages and embeds to be sent on Role changes.
         """
         _utils.assert_.authorized_channel_or_server_manager(ctx, _bot_settings.AUTHORIZED_CHANNEL_IDS)
-        with _model.orm.create_session() as session:
-            reaction_roles = _model.orm.get_all_filtered_by(
+        async with _model.orm.create_async_session() as session:
+            reaction_roles = await _model.orm.get_all_filtered_by_async(
                 _model.ReactionRole,
                 session,
                 guild_id=ctx.guild.id,
@@ -602,8 +595,8 @@ class ReactionRoles(_CogBase):
           vivi reactionrole list inactive false - Prints all inactive Reaction Roles configured on this server without any messages and embeds to be sent on Role changes.
         """
         _utils.assert_.authorized_channel_or_server_manager(ctx, _bot_settings.AUTHORIZED_CHANNEL_IDS)
-        with _model.orm.create_session() as session:
-            reaction_roles = _model.orm.get_all_filtered_by(
+        async with _model.orm.create_async_session() as session:
+            reaction_roles = await _model.orm.get_all_filtered_by_async(
                 _model.ReactionRole,
                 session,
                 guild_id=ctx.guild.id,
@@ -1056,6 +1049,7 @@ async def remove_role_change(reaction_role: _model.ReactionRole, ctx: _commands.
     if role_change:
         role: _discord.Role = ctx.guild.get_role(role_change.role_id)
         role_change_id = role_change.id
+        reaction_role.remove_change(role_change_id)
         await _utils.discord.reply(ctx, f'Removed role change (ID: {role_change_id}) for role \'{role.name}\' (ID: {role.id}).')
         return True, False
     return False, True
@@ -1069,6 +1063,7 @@ async def remove_role_requirement(reaction_role: _model.ReactionRole, ctx: _comm
     if role_requirement:
         role: _discord.Role = ctx.guild.get_role(role_requirement.role_id)
         role_requirement_id = role_requirement.id
+        reaction_role.remove_requirement(role_requirement_id)
         await _utils.discord.reply(ctx, f'Removed role requirement (ID: {role_requirement_id}) for role \'{role.name}\' (ID: {role.id}).')
         return True, False
     return False, True
@@ -57,7 +57,7 @@ class RoleManagement(_CogBase):
                     if member:
                         if role_to_add not in member.roles:
                             try:
-                                await member.add_roles(role_to_add, reason=reason)
+                                await _utils.discord.add_roles(member, role_to_add, reason=reason)
                                 users_added.append(f'{member.display_name} ({user_id})')
                             except:
                                 users_not_added.append(f'{member.display_name} ({user_id})')
@@ -129,7 +129,7 @@ class RoleManagement(_CogBase):
 
                 for i, member in enumerate(members):
                     try:
-                        await member.add_roles(role_to_add, reason=reason)
+                        await _utils.discord.add_roles(member, role_to_add, reason=reason)
                         members_added_count += 1
                     except:
                         pass
@@ -181,7 +181,7 @@ class RoleManagement(_CogBase):
 
                     for i, member in enumerate(members):
                         try:
-                            await member.remove_roles(role_to_remove, reason=reason)
+                            await _utils.discord.remove_roles(member, role_to_remove, reason=reason)
                             users_cleared.append(f'{member.display_name} ({member.id})')
                         except:
                             users_not_cleared.append(f'{member.display_name} ({member.id})')
@@ -244,7 +244,7 @@ class RoleManagement(_CogBase):
                     if member:
                         roles = [role for role in member.roles if role.position and role.position < ctx.me.top_role.position and not role.managed]
                         try:
-                            await member.remove_roles(*roles, reason=reason)
+                            await _utils.discord.remove_roles(member, *roles, reason=reason)
                             users_removed.append(f'{member.display_name} ({user_id})')
                         except:
                             users_not_removed.append(f'{member.display_name} ({user_id})')
@@ -313,7 +313,7 @@ class RoleManagement(_CogBase):
                     if member:
                         if role_to_remove in member.roles:
                             try:
-                                await member.remove_roles(role_to_remove, reason=reason)
+                                await _utils.discord.remove_roles(member, role_to_remove, reason=reason)
                                 users_removed.append(f'{member.display_name} ({user_id})')
                             except:
                                 users_not_removed.append(f'{member.display_name} ({user_id})')
@@ -385,7 +385,7 @@ class RoleManagement(_CogBase):
 
                 for i, member in enumerate(members):
                     try:
-                        await member.remove_roles(role_to_remove, reason=reason)
+                        await _utils.discord.remove_roles(member, role_to_remove, reason=reason)
                         users_removed_count += 1
                     except:
                         pass
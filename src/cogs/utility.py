@@ -1,5 +1,6 @@
 from datetime import datetime as _datetime
 from datetime import timezone as _timezone
+import io as _io
 import json as _json
 from typing import List as _List
 
@@ -14,27 +15,15 @@ from .. import model as _model
 
 
 
-class Utility(_CogBase):
-    QUERY_UPDATE_SEQUENCES = '''
-DO
-$do$
-BEGIN
-   IF EXISTS (SELECT FROM pss_chat_log) THEN
-      PERFORM setval('pss_chat_log_pss_chat_log_id_seq', (SELECT max(pss_chat_log_id) FROM pss_chat_log));
-   END IF;
-   IF EXISTS (SELECT FROM reaction_role_change) THEN
-      PERFORM setval('reaction_role_change_reaction_role_change_id_seq', (SELECT max(reaction_role_change_id) FROM reaction_role_change));
-   END IF;
-   IF EXISTS (SELECT FROM reaction_role) THEN
-      PERFORM setval('reaction_role_reaction_role_id_seq', (SELECT max(reaction_role_id) FROM reaction_role));
-   END IF;
-   IF EXISTS (SELECT FROM reaction_role_requirement) THEN
-      PERFORM setval('reaction_role_requirement_reaction_role_requirement_id_seq', (SELECT max(reaction_role_requirement_id) FROM reaction_role_requirement));
-   END IF;
-END
-$do$'''
+# ---------- Constants ----------
+
+_GZIP_MAGIC_NUMBER: bytes = b'\x1f\x8b'
+
 
 
+# ---------- Cog ----------
+
+class Utility(_CogBase):
     @_commands.is_owner()
     @_commands.group(name='check', hidden=True, invoke_without_command=True)
     async def check(self, ctx: _commands.Context) -> None:
@@ -201,37 +190,112 @@ $do$'''
 
 
     @_commands.is_owner()
-    @db.command(name='export')
+    @db.group(name='export', invoke_without_command=True)
     async def db_export(self, ctx: _commands.Context) -> None:
-        utc_now = _utils.datetime.get_utc_now()
-        export = await _db.export_to_json()
+        """
+        Exports the database as gzip compressed, newline-delimited JSON file.
+        """
+        if ctx.invoked_subcommand is None:
+            await self._export_database(ctx)
+
 
-        file_name = f'pss-fleet-helper-db-export_{utc_now.strftime("%Y%m%d-%H%M%S")}.json'
-        with open(file_name, 'w') as fp:
-            fp.write(export)
-        await ctx.reply('Database export:', file=_discord.File(file_name))
+    @_commands.is_owner()
+    @db_export.command(name='delta', aliases=['since'])
+    async def db_export_delta(self, ctx: _commands.Context) -> None:
+        """
+        Exports all changes to the database made since the last export as gzip compressed, newline-delimited JSON file. Import it on top of the prior exports.
+        """
+        since, _ = await _model.SETTINGS_CACHE.get(_db.SETTING_NAME_LAST_EXPORT_AT)
+        if not since:
+            raise Exception('There\'s no prior export. Create a full export first.')
+        await self._export_database(ctx, since)
+
+
+    async def _export_database(self, ctx: _commands.Context, since: _datetime = None) -> None:
+        export, exported_at = await _db.export_to_ndjson_gzip(since)
+
+        file_size_limit = ctx.guild.filesize_limit if ctx.guild else _utils.settings.FILE_MAXIMUM_SIZE
+        if len(export) > file_size_limit:
+            raise Exception(f'The database export is too large to be uploaded ({len(export)} bytes, limit: {file_size_limit} bytes).')
+
+        export_type = 'delta' if since else 'export'
+        file_name = f'pss-fleet-helper-db-{export_type}_{exported_at.strftime("%Y%m%d-%H%M%S")}.ndjson.gz'
+        if since:
+            await ctx.reply(f'Database changes since {_utils.discord.get_localized_timestamp(since, "f")}:', file=_discord.File(_io.BytesIO(export), filename=file_name))
+        else:
+            await ctx.reply('Database export:', file=_discord.File(_io.BytesIO(export), filename=file_name))
+        await _model.SETTINGS_CACHE.set(_db.SETTING_NAME_LAST_EXPORT_AT, exported_at)
 
 
     @_commands.is_owner()
     @db.command(name='import')
     async def db_import(self, ctx: _commands.Context) -> None:
         """
-        Attempts to import the data from the provided JSON file.
+        Attempts to import the data from the provided export file (gzip compressed, newline-delimited JSON or legacy JSON).
+        Delta exports will be merged into the existing data.
         """
         if not ctx.message.attachments:
-            raise Exception('You need to upload a JSON file to be imported with the command!')
+            raise Exception('You need to upload an export file to be imported with the command!')
 
         attachment = ctx.message.attachments[0]
-        file_contents = (await attachment.read()).decode('utf-8')
+        file_contents = await attachment.read()
         if not file_contents:
             raise Exception('The file provided must not be empty.')
 
-        await _db.import_from_json(file_contents)
-        updated_sequences = await _db.try_execute(Utility.QUERY_UPDATE_SEQUENCES)
-        if updated_sequences:
-            await ctx.reply('Database imported successfully!')
+        if file_contents.startswith(_GZIP_MAGIC_NUMBER):
+            await _db.import_from_ndjson_gzip(file_contents)
         else:
-            await ctx.reply(f'Data has been imported, but the sequences could not be updated! You need to perform the following sql query:\n{Utility.QUERY_UPDATE_SEQUENCES}')
+            await _db.import_from_json(file_contents.decode('utf-8'))
+        await _model.SETTINGS_CACHE.load()
+        await _model.REACTION_ROLE_INDEX.load()
+        await _model.CHAT_ALERT_INDEX.load()
+        await ctx.reply('Database imported successfully!')
+
+
+    @_commands.is_owner()
+    @_commands.group(name='devices', brief='Show PSS login devices', hidden=True, invoke_without_command=True)
+    async def devices(self, ctx: _commands.Context) -> None:
+        """
+        Shows the health of the devices used for logging in to the PSS API, healthiest first.
+
+        Usage:
+          vivi devices
+        """
+        if ctx.invoked_subcommand is None:
+            lines = ['__PSS login devices__']
+            for device in self.bot.device_pool.snapshot():
+                latency = f'{device["latency"]:.2f}s' if device['latency'] is not None else '-'
+                line = (
+                    f'#{device["number"]} `{device["device"]}`{" (current)" if device["is_current"] else ""} - '
+                    f'{device["success_rate"]:.0%} success, latency {latency}, '
+                    f'{device["success_count"]} succeeded, {device["failure_count"]} failed ({device["consecutive_failure_count"]} in a row)'
+                )
+                if device['quarantined_until']:
+                    line += f', **quarantined** until {_utils.discord.get_localized_timestamp(_datetime.fromisoformat(device["quarantined_until"]), "R")}'
+                lines.append(line)
+                if device['recent_errors']:
+                    occurred_at, error = device['recent_errors'][-1]
+                    lines.append(f'> Last error {_utils.discord.get_localized_timestamp(_datetime.fromisoformat(occurred_at), "R")}: {_utils.discord.escape_markdown_and_mentions(error)}')
+            await _utils.discord.reply_lines(ctx, lines)
+
+
+    @_commands.is_owner()
+    @devices.command(name='release', aliases=['reset'], brief='Lift the quarantine of a device', hidden=True)
+    async def devices_release(self, ctx: _commands.Context, device_number: int) -> None:
+        """
+        Lifts the quarantine of a PSS login device and resets its failure counters.
+
+        Usage:
+          vivi devices release [device_number]
+
+        Parameters:
+          device_number: Mandatory. The number of the device as shown by `vivi devices`.
+        """
+        device_ids = self.bot.device_pool.device_ids
+        if not 1 <= device_number <= len(device_ids):
+            raise Exception(f'There\'s no device #{device_number}. There are {len(device_ids)} devices configured.')
+        self.bot.device_pool.release(device_ids[device_number - 1])
+        await _utils.discord.reply(ctx, f'Device #{device_number} has been released from quarantine.')
 
 
     @_commands.group(name='embed', invoke_without_command=True)
@@ -26,6 +26,7 @@ class PssChatLoggerConverter():
         result = [
             f'**{self.pss_chat_log.name}** (ID: {self.pss_chat_log.id})',
             f'PSS Channel Key - {self.pss_chat_log.pss_channel_key}',
+            f'Posting via - {"Webhook" if self.pss_chat_log.use_webhook else "Bot"}',
         ]
         if for_admin:
             guild: _Guild = bot.get_guild(self.pss_chat_log.guild_id)
@@ -1,23 +1,62 @@
+from . import alliance_cache
+from . import chat_alert
+from . import chat_alert_index
+from . import chat_archive
+from . import chat_log_lease
+from . import chat_log_metrics
+from . import chat_log_scheduler
+from . import chat_log_webhook
 from . import database
+from . import device_pool
 from . import errors
+from . import fake_pssapi
+from . import fleet_history
+from . import fleet_rollup
 from . import model_settings
 from . import orm
+from . import reaction_role_index
+from . import settings_cache
 from .fleet import Fleet
 from .setup import setup as setup_model
+from .setup import teardown as teardown_model
 from .reaction_role import ReactionRole, ReactionRoleChange, ReactionRoleRequirement
+from .reaction_role_index import REACTION_ROLE_INDEX, ReactionRoleIndex
+from .chat_alert_index import CHAT_ALERT_INDEX, ChatAlertIndex
+from .settings_cache import SETTINGS_CACHE, SettingsCache
 from .chat_log import PssChatLogger
 from src.model.pssapi_discord_bot import PssApiDiscordBot
 
 __all__ = [
+    'CHAT_ALERT_INDEX',
+    'REACTION_ROLE_INDEX',
+    'SETTINGS_CACHE',
+    alliance_cache.__name__,
+    chat_alert.__name__,
+    chat_alert_index.__name__,
+    chat_archive.__name__,
+    chat_log_lease.__name__,
+    chat_log_metrics.__name__,
+    chat_log_scheduler.__name__,
+    chat_log_webhook.__name__,
     database.__name__,
+    device_pool.__name__,
     errors.__name__,
+    fake_pssapi.__name__,
+    fleet_history.__name__,
+    fleet_rollup.__name__,
     model_settings.__name__,
     orm.__name__,
+    reaction_role_index.__name__,
+    settings_cache.__name__,
     setup_model.__name__,
+    teardown_model.__name__,
+    ChatAlertIndex.__name__,
     Fleet.__name__,
     PssApiDiscordBot.__name__,
     PssChatLogger.__name__,
     ReactionRole.__name__,
     ReactionRoleChange.__name__,
+    ReactionRoleIndex.__name__,
     ReactionRoleRequirement.__name__,
+    SettingsCache.__name__,
 ]
\ No newline at end of file
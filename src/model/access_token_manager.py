@@ -0,0 +1,99 @@
+import asyncio as _asyncio
+from datetime import datetime as _datetime
+from datetime import timedelta as _timedelta
+from typing import Awaitable as _Awaitable
+from typing import Callable as _Callable
+from typing import Optional as _Optional
+
+import pssapi as _pssapi
+
+from .. import utils as _utils
+
+
+
+# ---------- Constants ----------
+
+AUTHORIZATION_ERROR_MESSAGE_PARTS: tuple = (
+    'access token',
+    'authoriz',
+)
+
+
+
+
+
+# ---------- Classes ----------
+
+class AccessTokenManager():
+    """
+    Caches the access token of the current login device until it expires. The token gets refreshed in the background shortly before it expires and concurrent refreshes share a single login request.
+    """
+    def __init__(self, login: _Callable[[str], _Awaitable[str]], get_device_id: _Callable[[], _Optional[str]], lifetime: float, refresh_margin: float) -> None:
+        self.__login: _Callable[[str], _Awaitable[str]] = login
+        self.__get_device_id: _Callable[[], _Optional[str]] = get_device_id
+        self.__lifetime: _timedelta = _timedelta(seconds=lifetime)
+        self.__refresh_margin: _timedelta = _timedelta(seconds=refresh_margin)
+        self.__access_token: str = None
+        self.__device_id: str = None
+        self.__expires_at: _datetime = None
+        self.__refresh_task: _asyncio.Task = None
+
+
+    @property
+    def device_id(self) -> _Optional[str]:
+        """
+        The device the cached access token has been issued for.
+        """
+        return self.__device_id
+
+
+    async def get_access_token(self) -> str:
+        """
+        Returns the cached access token or logs in, if there's no valid access token.
+        """
+        device_id = self.__get_device_id()
+        utc_now = _utils.datetime.get_utc_now()
+        if self.__access_token and device_id == self.__device_id and utc_now < self.__expires_at:
+            if utc_now >= self.__expires_at - self.__refresh_margin:
+                self.__start_refresh(device_id)
+            return self.__access_token
+        return await _asyncio.shield(self.__start_refresh(device_id))
+
+
+    def invalidate(self, access_token: str) -> None:
+        """
+        Discards the cached access token, if it's the one specified.
+        """
+        if access_token == self.__access_token:
+            self.__access_token = None
+            self.__expires_at = None
+
+
+    def __start_refresh(self, device_id: str) -> _asyncio.Task:
+        if self.__refresh_task is None or self.__refresh_task.done():
+            self.__refresh_task = _asyncio.create_task(self.__refresh(device_id))
+            self.__refresh_task.add_done_callback(_retrieve_task_exception)
+        return self.__refresh_task
+
+
+    async def __refresh(self, device_id: str) -> str:
+        access_token = await self.__login(device_id)
+        self.__access_token = access_token
+        self.__device_id = device_id
+        self.__expires_at = _utils.datetime.get_utc_now() + self.__lifetime
+        return access_token
+
+
+
+
+
+# ---------- Functions ----------
+
+def is_authorization_error(error: _pssapi.utils.exceptions.PssApiError) -> bool:
+    message = (error.message or '').lower()
+    return any(part in message for part in AUTHORIZATION_ERROR_MESSAGE_PARTS)
+
+
+def _retrieve_task_exception(task: _asyncio.Task) -> None:
+    if not task.cancelled() and task.exception():
+        print(f'[AccessTokenManager] Could not refresh the access token: {task.exception()}')
@@ -0,0 +1,83 @@
+from typing import Any as _Any
+from typing import Awaitable as _Awaitable
+from typing import Callable as _Callable
+from typing import Dict as _Dict
+from typing import List as _List
+
+import pssapi as _pssapi
+
+from ..utils.ttl_cache import TtlCache as _TtlCache
+
+
+
+# ---------- Constants ----------
+
+NOT_FOUND_ERROR_MESSAGE_PARTS: tuple = (
+    'not found',
+    'does not exist',
+    'doesn\'t exist',
+)
+
+
+
+
+
+# ---------- Classes ----------
+
+class AllianceCache():
+    """
+    Shared cache in front of the alliance service of the PSS API. Alliances are cached by ID and search results by normalized search term, so that lookups of the same alliances from different guilds and commands get served from memory. Alliances that don't exist and searches without results are cached for a shorter time.
+    """
+    def __init__(self, pssapi_call: _Callable[..., _Awaitable[_Any]], pssapi_client: _pssapi.PssApiClient, ttl: float, negative_ttl: float, max_size: int) -> None:
+        self.__pssapi_call: _Callable[..., _Awaitable[_Any]] = pssapi_call
+        self.__pssapi_client: _pssapi.PssApiClient = pssapi_client
+        self.__alliances: _TtlCache[_pssapi.entities.Alliance] = _TtlCache(ttl, negative_ttl, max_size, _is_missing_alliance, is_not_found_error)
+        self.__searches: _TtlCache[_List[_pssapi.entities.Alliance]] = _TtlCache(ttl, negative_ttl, max_size, lambda alliances: not alliances, is_not_found_error)
+
+
+    async def get_alliance(self, alliance_id: int) -> _pssapi.entities.Alliance:
+        return await self.__alliances.get(int(alliance_id), lambda: self.__pssapi_call(self.__pssapi_client.alliance_service.get_alliance, alliance_id))
+
+
+    async def search_alliances(self, name: str, skip: int = 0, take: int = 100) -> _List[_pssapi.entities.Alliance]:
+        name = ' '.join((name or '').split())
+        key = (normalize_search_term(name), skip, take)
+        return list(await self.__searches.get(key, lambda: self.__pssapi_call(self.__pssapi_client.alliance_service.search_alliances, name, skip, take)))
+
+
+    def invalidate(self, alliance_id: int = None) -> None:
+        """
+        Removes an alliance from the cache. Removes all alliances and search results, if no alliance ID is specified.
+        """
+        if alliance_id is None:
+            self.__alliances.invalidate()
+            self.__searches.invalidate()
+        else:
+            self.__alliances.invalidate(int(alliance_id))
+
+
+    def get_stats(self) -> _Dict[str, _Dict[str, _Any]]:
+        return {
+            'alliances': self.__alliances.get_stats(),
+            'searches': self.__searches.get_stats(),
+        }
+
+
+
+
+
+# ---------- Functions ----------
+
+def is_not_found_error(error: Exception) -> bool:
+    if not isinstance(error, _pssapi.utils.exceptions.PssApiError) or isinstance(error, _pssapi.utils.exceptions.ServerMaintenanceError):
+        return False
+    message = (error.message or '').lower()
+    return any(part in message for part in NOT_FOUND_ERROR_MESSAGE_PARTS)
+
+
+def normalize_search_term(name: str) -> str:
+    return ' '.join((name or '').casefold().split())
+
+
+def _is_missing_alliance(alliance: _pssapi.entities.Alliance) -> bool:
+    return alliance is None or not alliance.id
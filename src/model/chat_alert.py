@@ -0,0 +1,68 @@
+from typing import Optional as _Optional
+
+import sqlalchemy as _db
+
+from . import orm as _orm
+
+
+
+# ---------- Constants ----------
+
+CHANNEL_NAME_CHAT_ALERT_RULES: str = 'chat_alert_rules_changed'
+KEYWORD_MAXIMUM_LENGTH: int = 100
+
+
+
+
+
+# ---------- Classes ----------
+
+class ChatAlertRule(_orm.ModelBase):
+    """
+    A keyword to watch for in the PSS chat channels logged on a guild. Matching messages get posted to `channel_id`, pinging `role_id`, if set.
+    """
+    ID_COLUMN_NAME: str = 'chat_alert_rule_id'
+    TABLE_NAME: str = 'chat_alert_rule'
+    __tablename__ = TABLE_NAME
+
+    id = _db.Column(ID_COLUMN_NAME, _db.Integer, primary_key=True, autoincrement=True, nullable=False)
+    guild_id = _db.Column('guild_id', _db.Integer, nullable=False)
+    channel_id = _db.Column('channel_id', _db.Integer, nullable=False)
+    role_id = _db.Column('role_id', _db.Integer, nullable=True)
+    keyword = _db.Column('keyword', _db.Text, nullable=False)
+
+
+    def __repr__(self) -> str:
+        return f'<ChatAlertRule id={self.id} keyword={self.keyword}>'
+
+
+    def __str__(self) -> str:
+        return f'\'{self.keyword}\' (ID: {self.id})'
+
+
+    @classmethod
+    def make(cls,
+             guild_id: int,
+             channel_id: int,
+             keyword: str,
+             role_id: _Optional[int] = None
+    ) -> 'ChatAlertRule':
+        result = ChatAlertRule(
+            guild_id=guild_id,
+            channel_id=channel_id,
+            keyword=normalize_keyword(keyword),
+            role_id=role_id,
+            )
+        return result
+
+
+
+
+
+# ---------- Functions ----------
+
+def normalize_keyword(keyword: str) -> str:
+    """
+    Returns the keyword case folded and with whitespace collapsed, the way it gets matched.
+    """
+    return ' '.join((keyword or '').casefold().split())
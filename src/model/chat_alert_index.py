@@ -0,0 +1,205 @@
+import asyncio as _asyncio
+import re as _re
+from typing import Dict as _Dict
+from typing import Iterable as _Iterable
+from typing import List as _List
+from typing import Optional as _Optional
+from typing import Set as _Set
+
+import asyncpg as _asyncpg
+
+from . import database as _database
+from . import orm as _orm
+from .chat_alert import CHANNEL_NAME_CHAT_ALERT_RULES as _CHANNEL_NAME_CHAT_ALERT_RULES
+from .chat_alert import ChatAlertRule as _ChatAlertRule
+from .chat_alert import normalize_keyword as _normalize_keyword
+
+
+
+# ---------- Constants ----------
+
+__RX_WORD_CHAR: _re.Pattern = _re.compile(r'\w')
+
+
+
+
+
+# ---------- Classes ----------
+
+class ChatAlertIndex():
+    """
+    Keeps all Chat Alert Rules in memory and matches texts against the keywords of all of them at once via a trie. The trie gets rebuilt lazily, only when the set of keywords changed. Changes made by other processes are picked up via `LISTEN/NOTIFY`.
+    """
+    def __init__(self) -> None:
+        self.__rules: _Dict[int, _ChatAlertRule] = {}
+        self.__rule_ids_by_keyword: _Dict[str, _Set[int]] = {}
+        self.__trie: _Optional[dict] = None
+        self.__trie_outdated: bool = True
+        self.__listener_connection: _asyncpg.Connection = None
+        self.__refresh_tasks: _List[_asyncio.Task] = []
+        self.__loaded: bool = False
+
+
+    @property
+    def loaded(self) -> bool:
+        return self.__loaded
+
+
+    def get_matching_rules(self, *texts: str) -> _Dict[str, _List[_ChatAlertRule]]:
+        """
+        Returns the rules whose keywords occur in any of the texts as whole words, by keyword. Each text is matched on its own, so a keyword can't span two of them. Keywords overlapping each other all match. Matching is case insensitive.
+        """
+        trie = self.__get_trie()
+        if trie is None:
+            return {}
+
+        result: _Dict[str, _List[_ChatAlertRule]] = {}
+        for text in texts:
+            if not text:
+                continue
+            for keyword in find_keywords(trie, _normalize_keyword(text)):
+                if keyword not in result:
+                    result[keyword] = [self.__rules[rule_id] for rule_id in self.__rule_ids_by_keyword.get(keyword, ())]
+        return result
+
+
+    async def load(self) -> None:
+        """
+        (Re-)Loads all Chat Alert Rules from the database and subscribes to changes.
+        """
+        if self.__listener_connection is None or self.__listener_connection.is_closed():
+            try:
+                self.__listener_connection = await _database.listen(_CHANNEL_NAME_CHAT_ALERT_RULES, self.__on_notification, self.__on_listener_terminated)
+            except (_asyncpg.PostgresError, OSError) as error:
+                print(f'[ChatAlertIndex.load] {error.__class__.__name__} occurred while subscribing to rule changes: {error}')
+                self.__listener_connection = None
+
+        async with _orm.create_async_session() as session:
+            rules = await _orm.get_all_async(_ChatAlertRule, session)
+        self.__rules = {}
+        self.__rule_ids_by_keyword = {}
+        self.__add(rules)
+        self.__trie_outdated = True
+        self.__loaded = True
+
+
+    async def refresh(self, *rule_ids: int) -> None:
+        """
+        Reloads the Chat Alert Rules with the given IDs from the database. Rules that have been deleted are removed from the index.
+        """
+        if not self.__loaded:
+            await self.load()
+            return
+
+        rule_ids = set(rule_ids)
+        if not rule_ids:
+            return
+
+        query = _orm.get_select(_ChatAlertRule).where(_ChatAlertRule.id.in_(rule_ids))
+        async with _orm.create_async_session() as session:
+            rules = (await session.execute(query)).unique().scalars().all()
+        self.replace(rule_ids, rules)
+
+
+    def replace(self, rule_ids: _Iterable[int], rules: _Iterable[_ChatAlertRule]) -> None:
+        """
+        Removes the Chat Alert Rules with the given IDs from the index and adds the given rules. The trie gets rebuilt, if the set of keywords changed.
+        """
+        keywords = set(self.__rule_ids_by_keyword.keys())
+        for rule_id in rule_ids:
+            self.__remove(rule_id)
+        self.__add(rules)
+        if keywords != set(self.__rule_ids_by_keyword.keys()):
+            self.__trie_outdated = True
+
+
+    async def close(self) -> None:
+        self.__loaded = False
+        if self.__listener_connection is not None:
+            await self.__listener_connection.close()
+            self.__listener_connection = None
+
+
+    def __add(self, rules: _Iterable[_ChatAlertRule]) -> None:
+        for rule in rules:
+            self.__rules[rule.id] = rule
+            self.__rule_ids_by_keyword.setdefault(rule.keyword, set()).add(rule.id)
+
+
+    def __remove(self, rule_id: int) -> None:
+        rule = self.__rules.pop(rule_id, None)
+        if rule is None:
+            return
+        rule_ids = self.__rule_ids_by_keyword.get(rule.keyword)
+        if rule_ids is not None:
+            rule_ids.discard(rule_id)
+            if not rule_ids:
+                self.__rule_ids_by_keyword.pop(rule.keyword)
+
+
+    def __get_trie(self) -> _Optional[dict]:
+        if self.__trie_outdated:
+            self.__trie = build_keyword_trie(self.__rule_ids_by_keyword.keys())
+            self.__trie_outdated = False
+        return self.__trie
+
+
+    def __on_listener_terminated(self, connection: _asyncpg.Connection) -> None:
+        # Without a subscription, the index can't be kept coherent, so it needs to be reloaded
+        self.__loaded = False
+        self.__listener_connection = None
+
+
+    def __on_notification(self, connection: _asyncpg.Connection, pid: int, channel: str, rule_id: str) -> None:
+        task = _asyncio.create_task(self.refresh(int(rule_id)))
+        self.__refresh_tasks.append(task)
+        task.add_done_callback(self.__refresh_tasks.remove)
+
+
+
+
+
+# ---------- Functions ----------
+
+def build_keyword_trie(keywords: _Iterable[str]) -> _Optional[dict]:
+    """
+    Merges the keywords into a trie of nested dicts keyed by character. The node at the end of a keyword holds the keyword under the key `''`. Returns `None`, if there are no keywords.
+    """
+    trie: dict = {}
+    for keyword in keywords:
+        if keyword:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[''] = keyword
+    return trie or None
+
+
+def find_keywords(trie: dict, text: str) -> _List[str]:
+    """
+    Returns the keywords of the trie occurring in the text as whole words, in order of occurrence. Unlike the matches of a regular expression, keywords may overlap, so that e.g. both 'fleet' and 'fleet helper' are found in 'fleet helper'.
+    """
+    is_word_char = [bool(__RX_WORD_CHAR.match(char)) for char in text]
+    result = []
+    for start in range(len(text)):
+        if start > 0 and is_word_char[start - 1]:
+            continue
+        node = trie
+        end = start
+        while end < len(text):
+            node = node.get(text[end])
+            if node is None:
+                break
+            end += 1
+            keyword = node.get('')
+            if keyword is not None and (end == len(text) or not is_word_char[end]):
+                result.append(keyword)
+    return result
+
+
+
+
+
+# ---------- Initialization ----------
+
+CHAT_ALERT_INDEX: ChatAlertIndex = ChatAlertIndex()
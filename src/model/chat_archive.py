@@ -0,0 +1,118 @@
+from datetime import datetime as _datetime
+from datetime import timezone as _timezone
+from typing import Dict as _Dict
+from typing import Iterable as _Iterable
+from typing import List as _List
+from typing import Set as _Set
+from typing import Tuple as _Tuple
+
+import asyncpg as _asyncpg
+import pssapi as _pssapi
+
+from . import chat_log as _chat_log
+from . import database as _database
+
+
+
+# ---------- Constants ----------
+
+TABLE_NAME: str = 'pss_chat_message'
+
+QUERY_CREATE_TABLE: str = f'''
+CREATE TABLE IF NOT EXISTS {TABLE_NAME} (
+    message_id BIGINT NOT NULL,
+    message_date TIMESTAMPTZ NOT NULL,
+    pss_channel_key TEXT NOT NULL,
+    user_id BIGINT,
+    user_name TEXT,
+    alliance_id BIGINT,
+    alliance_name TEXT,
+    message TEXT,
+    search_vector TSVECTOR GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', COALESCE(user_name, '')), 'A') ||
+        setweight(to_tsvector('simple', COALESCE(alliance_name, '')), 'B') ||
+        setweight(to_tsvector('simple', COALESCE(message, '')), 'C')
+    ) STORED,
+    PRIMARY KEY (message_id, message_date)
+) PARTITION BY RANGE (message_date)'''
+QUERY_CREATE_INDEXES: _List[str] = [
+    f'CREATE INDEX IF NOT EXISTS {TABLE_NAME}_search_vector_idx ON {TABLE_NAME} USING GIN (search_vector)',
+    f'CREATE INDEX IF NOT EXISTS {TABLE_NAME}_pss_channel_key_message_date_idx ON {TABLE_NAME} (pss_channel_key, message_date DESC)',
+]
+"""There's deliberately no trigram index: `search_messages` only runs full-text queries, which the GIN index on `search_vector` serves. A `pg_trgm` index would only speed up `LIKE` and similarity queries, would slow down every insert and requires the extension to be installable on the database server."""
+
+__CREATED_PARTITIONS: _Set[str] = set()
+
+
+
+
+
+# ---------- Functions ----------
+
+async def archive_messages(messages_by_channel_key: _Dict[str, _Iterable[_pssapi.entities.Message]]) -> bool:
+    """
+    Appends the messages to the archive in a single statement. Messages that have already been archived are skipped, as well as messages without a date, since the archive is partitioned by date.
+    """
+    rows = []
+    for channel_key, messages in messages_by_channel_key.items():
+        for message in messages:
+            message_date = _chat_log.get_utc_message_date(message)
+            if message_date is not None:
+                rows.append((message.message_id, message_date, channel_key, message.user_id, message.user_name, message.alliance_id, message.alliance_name, message.message))
+    if not rows:
+        return True
+
+    query = (
+        f'INSERT INTO {TABLE_NAME} (message_id, message_date, pss_channel_key, user_id, user_name, alliance_id, alliance_name, message) '
+        'SELECT * FROM unnest($1::bigint[], $2::timestamptz[], $3::text[], $4::bigint[], $5::text[], $6::bigint[], $7::text[], $8::text[]) '
+        'ON CONFLICT DO NOTHING'
+    )
+    args = [list(column) for column in zip(*rows)]
+    try:
+        connection = await _database.acquire_connection()
+        try:
+            await _create_partitions(connection, {row[1] for row in rows})
+            await connection.execute(query, *args)
+        finally:
+            await _database.release_connection(connection)
+    except (_asyncpg.PostgresError, OSError, ConnectionError) as error:
+        _database.print_db_query_error('archive_messages', query, None, error)
+        return False
+    return True
+
+
+async def search_messages(channel_keys: _List[str], search_terms: str, page: int, page_size: int) -> _Tuple[_List[_asyncpg.Record], bool]:
+    """
+    Searches the archived messages of the given channel keys, best matches first. Returns the requested page and whether there are more pages.
+    """
+    query = (
+        f'SELECT message_id, message_date, pss_channel_key, user_name, alliance_name, message, ts_rank_cd(search_vector, query) AS rank '
+        f'FROM {TABLE_NAME}, websearch_to_tsquery(\'simple\', $2) AS query '
+        f'WHERE pss_channel_key = ANY($1) AND search_vector @@ query '
+        f'ORDER BY rank DESC, message_date DESC LIMIT $3 OFFSET $4'
+    )
+    records = await _database.fetchall(query, [channel_keys, search_terms, page_size + 1, (page - 1) * page_size]) or []
+    return (records[:page_size], len(records) > page_size)
+
+
+async def _create_partitions(connection: _asyncpg.Connection, message_dates: _Iterable[_datetime]) -> None:
+    for month_start in {_get_month_start(message_date) for message_date in message_dates}:
+        partition_name = _get_partition_name(month_start)
+        if partition_name in __CREATED_PARTITIONS:
+            continue
+        next_month_start = month_start.replace(year=month_start.year + month_start.month // 12, month=month_start.month % 12 + 1)
+        query = f'CREATE TABLE IF NOT EXISTS {partition_name} PARTITION OF {TABLE_NAME} FOR VALUES FROM (\'{month_start.isoformat()}\') TO (\'{next_month_start.isoformat()}\')'
+        try:
+            await connection.execute(query)
+        except _asyncpg.exceptions.DuplicateTableError:
+            pass
+        __CREATED_PARTITIONS.add(partition_name)
+
+
+def _get_month_start(message_date: _datetime) -> _datetime:
+    message_date = message_date.astimezone(_timezone.utc)
+    return _datetime(message_date.year, message_date.month, 1, tzinfo=_timezone.utc)
+
+
+def _get_partition_name(month_start: _datetime) -> str:
+    return f'{TABLE_NAME}_y{month_start.year}m{month_start.month:02d}'
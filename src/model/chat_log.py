@@ -1,11 +1,50 @@
+from bisect import bisect_left as _bisect_left
+from bisect import bisect_right as _bisect_right
+from datetime import datetime as _datetime
+from datetime import timedelta as _timedelta
+from datetime import timezone as _timezone
+import json as _json
+import re as _re
+from typing import Dict as _Dict
 from typing import Iterable as _Iterable
+from typing import List as _List
+from typing import Optional as _Optional
+from typing import Set as _Set
+from typing import Tuple as _Tuple
+from typing import Union as _Union
 
+import asyncpg as _asyncpg
+import pssapi as _pssapi
 import sqlalchemy as _db
 
+from . import chat_log_lease as _chat_log_lease
+from . import database as _database
 from . import orm as _orm
+from .. import utils as _utils
 
 
 
+# ---------- Constants ----------
+
+WEBHOOK_USERNAME_MAXIMUM_LENGTH: int = 80
+
+__RX_WEBHOOK_USERNAME_FORBIDDEN: _re.Pattern = _re.compile(r'(c)(lyde)|(d)(iscord)', _re.IGNORECASE)
+
+
+
+
+
+# ---------- Typehints ----------
+
+_Post = _Union[str, _Dict[str, str]]
+"""A post is either the content of a message or a dict with the keys 'username' and 'content' of a message to be sent via webhook."""
+
+
+
+
+
+# ---------- Classes ----------
+
 class PssChatLogger(_orm.ModelBase):
     ID_COLUMN_NAME: str = 'pss_chat_log_id'
     TABLE_NAME: str = 'pss_chat_log'
@@ -17,6 +56,7 @@ class PssChatLogger(_orm.ModelBase):
     pss_channel_key = _db.Column('pss_channel_key', _db.Text, nullable=False)
     last_pss_message_id = _db.Column('last_pss_message_id', _db.Integer, nullable=False, default=0)
     name = _db.Column('name', _db.Text, nullable=False)
+    use_webhook = _db.Column('use_webhook', _db.Boolean, nullable=False, default=False)
 
 
     def __repr__(self) -> str:
@@ -40,4 +80,306 @@ class PssChatLogger(_orm.ModelBase):
             pss_channel_key=pss_channel_key,
             name=name,
             )
-        return result
\ No newline at end of file
+        return result
+
+
+class PssChatLogWebhook(_orm.ModelBase):
+    """
+    The webhook created for posting chat logs to a Discord channel. All Chat Loggers posting to the same channel share it.
+    """
+    ID_COLUMN_NAME: str = 'channel_id'
+    TABLE_NAME: str = 'pss_chat_log_webhook'
+    __tablename__ = TABLE_NAME
+
+    channel_id = _db.Column(ID_COLUMN_NAME, _db.BigInteger, primary_key=True, autoincrement=False, nullable=False)
+    webhook_id = _db.Column('webhook_id', _db.BigInteger, nullable=False)
+    webhook_token = _db.Column('webhook_token', _db.Text, nullable=False)
+
+
+    def __repr__(self) -> str:
+        return f'<PssChatLogWebhook channel_id={self.channel_id} webhook_id={self.webhook_id}>'
+
+
+class PssChatLogBatch():
+    """
+    The messages fetched for a PSS channel key, sorted and formatted once. Each Chat Logger takes the lines after its own checkpoint. The lines for webhooks only get formatted, if a Chat Logger in webhook mode asks for them.
+    """
+    def __init__(self, messages: _Iterable[_pssapi.entities.Message]) -> None:
+        self.__messages: _List[_pssapi.entities.Message] = sorted(messages, key=lambda message: message.message_id)
+        self.__entries: _Tuple[_Tuple[int, str], ...] = tuple((message.message_id, format_pss_message(message)) for message in self.__messages)
+        self.__webhook_entries: _Optional[_Tuple[_Tuple[int, str, str], ...]] = None
+        self.__message_ids: _Tuple[int, ...] = tuple(message_id for message_id, _ in self.__entries)
+        self.__message_dates: _Tuple[_datetime, ...] = tuple(get_utc_message_date(message) for message in self.__messages)
+
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+
+    @property
+    def entries(self) -> _Tuple[_Tuple[int, str], ...]:
+        return self.__entries
+
+
+    def get_entries_after(self, last_pss_message_id: int) -> _Tuple[_Tuple[int, str], ...]:
+        """
+        Returns the (message_id, line) pairs of the messages newer than the given message ID.
+        """
+        return self.__entries[_bisect_right(self.__message_ids, last_pss_message_id or 0):]
+
+
+    def get_webhook_entries_after(self, last_pss_message_id: int) -> _Tuple[_Tuple[int, str, str], ...]:
+        """
+        Returns the (message_id, username, line) triples of the messages newer than the given message ID.
+        """
+        if self.__webhook_entries is None:
+            self.__webhook_entries = tuple((message.message_id, format_webhook_username(message), _utils.discord.escape_markdown_and_mentions(message.message) or '_ _') for message in self.__messages)
+        return self.__webhook_entries[_bisect_right(self.__message_ids, last_pss_message_id or 0):]
+
+
+    def get_message_date(self, message_id: int) -> _Optional[_datetime]:
+        index = _bisect_left(self.__message_ids, message_id)
+        if index < len(self.__message_ids) and self.__message_ids[index] == message_id:
+            return self.__message_dates[index]
+        return None
+
+
+class PssChatLogDelivery():
+    """
+    A pending delivery of posts to the Discord channel of a Chat Logger, stored in the outbox table. Posts are sent in order and progress is recorded after each post, so that a retry continues with the first post that hasn't been delivered.
+    """
+    ID_COLUMN_NAME: str = 'pss_chat_log_outbox_id'
+    TABLE_NAME: str = 'pss_chat_log_outbox'
+
+    def __init__(self, record: _asyncpg.Record) -> None:
+        self.id: int = record[PssChatLogDelivery.ID_COLUMN_NAME]
+        self.pss_chat_log_id: int = record[PssChatLogger.ID_COLUMN_NAME]
+        self.channel_id: int = record['channel_id']
+        self.first_pss_message_id: int = record['first_pss_message_id']
+        self.last_pss_message_id: int = record['last_pss_message_id']
+        self.posts: _List[_Post] = _json.loads(record['posts'])
+        self.delivered_post_count: int = record['delivered_post_count']
+        self.attempt_count: int = record['attempt_count']
+        self.message_count: int = record['message_count']
+        self.last_pss_message_date: _Optional[_datetime] = record['last_pss_message_date']
+
+
+    def __repr__(self) -> str:
+        return f'<PssChatLogDelivery id={self.id} pss_chat_log_id={self.pss_chat_log_id}>'
+
+
+    def get_nonce(self, post_index: int) -> str:
+        """
+        Returns the nonce for the post with the given index. Discord doesn't deduplicate messages by it, since py-cord doesn't send `enforce_nonce`, so a post sent right before a crash may still be posted twice. Posts via webhooks carry no nonce.
+        """
+        return f'{self.id}-{post_index}'
+
+
+    async def complete(self) -> bool:
+        success, _ = await _database.try_execute(f'DELETE FROM {PssChatLogDelivery.TABLE_NAME} WHERE {PssChatLogDelivery.ID_COLUMN_NAME} = $1', [self.id])
+        return success
+
+
+    async def fail(self, max_attempts: int, retry_delay: float, max_retry_delay: float) -> bool:
+        """
+        Schedules a retry with exponential backoff. Parks the delivery, if it failed `max_attempts` times: it won't be attempted again and doesn't hold back later deliveries anymore, but it's kept and reported by `get_backlog` until its Chat Logger gets deleted.
+        """
+        self.attempt_count += 1
+        if self.attempt_count >= max_attempts:
+            print(f'[PssChatLogDelivery.fail] Giving up on delivering messages {self.first_pss_message_id} to {self.last_pss_message_id} ({self.message_count} messages, {len(self.posts) - self.delivered_post_count} posts) for Chat Logger {self.pss_chat_log_id} after {self.attempt_count} attempts. Parking delivery {self.id}.')
+            next_attempt_at = None
+        else:
+            delay = min(retry_delay * 2 ** (self.attempt_count - 1), max_retry_delay)
+            next_attempt_at = _utils.datetime.get_utc_now() + _timedelta(seconds=delay)
+        query = f'UPDATE {PssChatLogDelivery.TABLE_NAME} SET attempt_count = $2, next_attempt_at = COALESCE($3, \'infinity\'::timestamptz) WHERE {PssChatLogDelivery.ID_COLUMN_NAME} = $1'
+        success, _ = await _database.try_execute(query, [self.id, self.attempt_count, next_attempt_at])
+        return success
+
+
+    async def set_delivered_post_count(self, delivered_post_count: int) -> bool:
+        query = f'UPDATE {PssChatLogDelivery.TABLE_NAME} SET delivered_post_count = $2 WHERE {PssChatLogDelivery.ID_COLUMN_NAME} = $1'
+        success, _ = await _database.try_execute(query, [self.id, delivered_post_count])
+        if success:
+            self.delivered_post_count = delivered_post_count
+        return success
+
+
+    @classmethod
+    async def get_due(cls, limit: int, lease_worker_id: str = None, claim_duration: float = None) -> _List['PssChatLogDelivery']:
+        """
+        Returns the deliveries due to be attempted, oldest first. Only the oldest pending delivery of a Chat Logger can be due, so that later posts don't overtake it across batches or processes. Deliveries of Chat Loggers that have been deleted are discarded.
+        If `lease_worker_id` is specified, only deliveries for channel keys leased by that worker are returned and they are claimed for `claim_duration` seconds, so that no other process attempts them in the meantime.
+        """
+        query_delete_orphans = f'DELETE FROM {cls.TABLE_NAME} o WHERE NOT EXISTS (SELECT 1 FROM {PssChatLogger.TABLE_NAME} l WHERE l.{PssChatLogger.ID_COLUMN_NAME} = o.{PssChatLogger.ID_COLUMN_NAME})'
+        await _database.try_execute(query_delete_orphans)
+        query_older_delivery_pending = (
+            f'SELECT 1 FROM {cls.TABLE_NAME} o2 WHERE o2.{PssChatLogger.ID_COLUMN_NAME} = o.{PssChatLogger.ID_COLUMN_NAME} '
+            f'AND o2.{cls.ID_COLUMN_NAME} < o.{cls.ID_COLUMN_NAME} AND o2.next_attempt_at < \'infinity\''
+        )
+        if lease_worker_id is None:
+            query = (
+                f'SELECT o.*, l.channel_id FROM {cls.TABLE_NAME} o '
+                f'JOIN {PssChatLogger.TABLE_NAME} l ON l.{PssChatLogger.ID_COLUMN_NAME} = o.{PssChatLogger.ID_COLUMN_NAME} '
+                f'WHERE o.next_attempt_at <= CURRENT_TIMESTAMP AND NOT EXISTS ({query_older_delivery_pending}) ORDER BY o.{cls.ID_COLUMN_NAME} LIMIT $1'
+            )
+            records = await _database.fetchall(query, [limit])
+        else:
+            query_lease_is_held = _chat_log_lease.QUERY_LEASE_IS_HELD.format(channel_key='l.pss_channel_key', worker_id='$2')
+            query = (
+                f'WITH due AS ('
+                    f'SELECT o.{cls.ID_COLUMN_NAME}, l.channel_id FROM {cls.TABLE_NAME} o '
+                    f'JOIN {PssChatLogger.TABLE_NAME} l ON l.{PssChatLogger.ID_COLUMN_NAME} = o.{PssChatLogger.ID_COLUMN_NAME} '
+                    f'WHERE o.next_attempt_at <= CURRENT_TIMESTAMP AND NOT EXISTS ({query_older_delivery_pending}) AND EXISTS ({query_lease_is_held}) '
+                    f'ORDER BY o.{cls.ID_COLUMN_NAME} LIMIT $1 FOR UPDATE OF o SKIP LOCKED'
+                f') '
+                f'UPDATE {cls.TABLE_NAME} o SET next_attempt_at = CURRENT_TIMESTAMP + $3::interval FROM due '
+                f'WHERE o.{cls.ID_COLUMN_NAME} = due.{cls.ID_COLUMN_NAME} RETURNING o.*, due.channel_id'
+            )
+            records = await _database.fetchall(query, [limit, lease_worker_id, _timedelta(seconds=claim_duration)])
+            records = sorted(records or [], key=lambda record: record[cls.ID_COLUMN_NAME])
+        return [cls(record) for record in records or []]
+
+
+    @classmethod
+    async def get_backlog(cls) -> _Dict[int, _Tuple[int, _Optional[_datetime], int]]:
+        """
+        Returns the number of pending deliveries, the creation date of the oldest one and the number of parked deliveries per Chat Logger ID.
+        """
+        query = (
+            f'SELECT {PssChatLogger.ID_COLUMN_NAME}, count(*) FILTER (WHERE NOT is_parked) AS delivery_count, min(created_at) FILTER (WHERE NOT is_parked) AS oldest_created_at, count(*) FILTER (WHERE is_parked) AS parked_delivery_count '
+            f'FROM (SELECT *, next_attempt_at = \'infinity\' AS is_parked FROM {cls.TABLE_NAME}) o GROUP BY {PssChatLogger.ID_COLUMN_NAME}'
+        )
+        records = await _database.fetchall(query)
+        return {record[PssChatLogger.ID_COLUMN_NAME]: (record['delivery_count'], record['oldest_created_at'], record['parked_delivery_count']) for record in records or []}
+
+
+class PssChatLoggerCheckpoints():
+    """
+    Collects the advances of `PssChatLogger.last_pss_message_id` and the posts to be delivered for them. Both are written to the database in a single transaction, the checkpoints in a single statement. Checkpoints that could not be written are kept for the next flush.
+    If `lease_worker_id` is specified, checkpoints and posts are only written for Chat Loggers whose channel key is leased by that worker, so that a process that lost a lease can't post messages twice. `flush` reports which checkpoints have been written, so that anything else depending on them, like chat alerts, can be gated the same way.
+    """
+    def __init__(self, lease_worker_id: str = None) -> None:
+        self.__lease_worker_id: str = lease_worker_id
+        self.__checkpoints: _Dict[int, int] = {}
+        self.__deliveries: _List[_Tuple[int, int, int, str, int, _Optional[_datetime]]] = []
+
+
+    def __len__(self) -> int:
+        return len(self.__checkpoints)
+
+
+    def advance(self, pss_chat_logger: PssChatLogger, last_pss_message_id: int, posts: _List[_Post] = None, first_pss_message_id: int = None, message_count: int = 0, last_pss_message_date: _datetime = None) -> None:
+        """
+        Moves the checkpoint of the given Chat Logger forward and queues the posts for delivery. `message_count` and `last_pss_message_date` are stored with the posts for metrics. Does nothing, if the checkpoint didn't advance.
+        """
+        if last_pss_message_id <= (pss_chat_logger.last_pss_message_id or 0):
+            return
+        pss_chat_logger.last_pss_message_id = last_pss_message_id
+        self.__checkpoints[pss_chat_logger.id] = last_pss_message_id
+        if posts:
+            self.__deliveries.append((pss_chat_logger.id, first_pss_message_id or last_pss_message_id, last_pss_message_id, _json.dumps(posts), message_count, last_pss_message_date))
+
+
+    def apply(self, pss_chat_loggers: _Iterable[PssChatLogger]) -> None:
+        """
+        Applies checkpoints that haven't been written, yet, to Chat Loggers freshly loaded from the database.
+        """
+        for pss_chat_logger in pss_chat_loggers:
+            last_pss_message_id = self.__checkpoints.get(pss_chat_logger.id)
+            if last_pss_message_id and last_pss_message_id > (pss_chat_logger.last_pss_message_id or 0):
+                pss_chat_logger.last_pss_message_id = last_pss_message_id
+
+
+    async def flush(self) -> _Optional[_Set[int]]:
+        """
+        Writes the checkpoints and queues their posts for delivery. Returns the IDs of the Chat Loggers, whose checkpoints have been written, or `None`, if the database couldn't be written. Checkpoints that weren't written, because the lease was lost or the Chat Logger is gone, are dropped along with their posts.
+        """
+        if not self.__checkpoints:
+            return set()
+
+        checkpoints = dict(self.__checkpoints)
+        deliveries = list(self.__deliveries)
+        values = ', '.join(f'(${i}::bigint, ${i + 1}::bigint)' for i in range(1, len(checkpoints) * 2, 2))
+        query = (
+            f'UPDATE {PssChatLogger.TABLE_NAME} AS t SET last_pss_message_id = c.last_pss_message_id, modified_at = CURRENT_TIMESTAMP '
+            f'FROM (VALUES {values}) AS c(id, last_pss_message_id) '
+            f'WHERE t.{PssChatLogger.ID_COLUMN_NAME} = c.id AND t.last_pss_message_id < c.last_pss_message_id'
+        )
+        args = [value for checkpoint in checkpoints.items() for value in checkpoint]
+        if self.__lease_worker_id is not None:
+            query += ' AND EXISTS (' + _chat_log_lease.QUERY_LEASE_IS_HELD.format(channel_key='t.pss_channel_key', worker_id=f'${len(args) + 1}') + ')'
+            args.append(self.__lease_worker_id)
+        query += f' RETURNING t.{PssChatLogger.ID_COLUMN_NAME}'
+        query_insert_deliveries = f'INSERT INTO {PssChatLogDelivery.TABLE_NAME} ({PssChatLogger.ID_COLUMN_NAME}, first_pss_message_id, last_pss_message_id, posts, message_count, last_pss_message_date) VALUES ($1, $2, $3, $4, $5, $6)'
+
+        try:
+            connection = await _database.acquire_connection()
+            try:
+                async with connection.transaction():
+                    written_pss_chat_logger_ids = {record[0] for record in await connection.fetch(query, *args)}
+                    # Posts are only queued for written checkpoints, so that they can't be posted twice
+                    written_deliveries = [delivery for delivery in deliveries if delivery[0] in written_pss_chat_logger_ids]
+                    if written_deliveries:
+                        await connection.executemany(query_insert_deliveries, written_deliveries)
+            finally:
+                await _database.release_connection(connection)
+        except (_asyncpg.PostgresError, OSError, ConnectionError) as error:
+            _database.print_db_query_error('PssChatLoggerCheckpoints.flush', query, args, error)
+            return None
+
+        for pss_chat_logger_id, last_pss_message_id in checkpoints.items():
+            if self.__checkpoints.get(pss_chat_logger_id) == last_pss_message_id:
+                self.__checkpoints.pop(pss_chat_logger_id)
+        self.__deliveries = self.__deliveries[len(deliveries):]
+        return written_pss_chat_logger_ids
+
+
+
+
+
+# ---------- Functions ----------
+
+def create_webhook_posts(webhook_entries: _Iterable[_Tuple[int, str, str]], char_limit: int) -> _List[_Dict[str, str]]:
+    """
+    Creates the posts for a webhook from (message_id, username, line) triples. Consecutive lines of the same user are merged into as few posts as possible.
+    """
+    result = []
+    username = None
+    lines = []
+    for _, entry_username, line in webhook_entries:
+        if entry_username != username and lines:
+            result.extend({'username': username, 'content': post} for post in _utils.discord.create_posts_from_lines(lines, char_limit))
+            lines = []
+        username = entry_username
+        lines.append(line)
+    if lines:
+        result.extend({'username': username, 'content': post} for post in _utils.discord.create_posts_from_lines(lines, char_limit))
+    return result
+
+
+def format_pss_message(message: _pssapi.entities.Message) -> str:
+    user_name_and_fleet = f'**{_utils.discord.escape_markdown_and_mentions(message.user_name)}'
+    if message.alliance_name:
+        user_name_and_fleet += f'** ({_utils.discord.escape_markdown_and_mentions(message.alliance_name)})**'
+    return f'{user_name_and_fleet}:** {_utils.discord.escape_markdown_and_mentions(message.message)}'
+
+
+def format_webhook_username(message: _pssapi.entities.Message) -> str:
+    """
+    Returns the PSS user's name and fleet as a valid webhook username. Discord rejects usernames containing 'clyde' or 'discord', so these get broken up by a zero width space.
+    """
+    username = message.user_name or '?'
+    if message.alliance_name:
+        username += f' ({message.alliance_name})'
+    username = __RX_WEBHOOK_USERNAME_FORBIDDEN.sub(lambda match: '\u200b'.join(group for group in match.groups() if group), username)
+    return username[:WEBHOOK_USERNAME_MAXIMUM_LENGTH]
+
+
+def get_utc_message_date(message: _pssapi.entities.Message) -> _Optional[_datetime]:
+    """
+    Returns the date of the message as an aware datetime in UTC. Returns `None`, if the message has no date.
+    """
+    message_date = message.message_date
+    if message_date is not None and message_date.tzinfo is None:
+        message_date = message_date.replace(tzinfo=_timezone.utc)
+    return message_date
@@ -0,0 +1,107 @@
+from datetime import timedelta as _timedelta
+import math as _math
+import os as _os
+import socket as _socket
+from typing import Iterable as _Iterable
+from typing import List as _List
+from typing import Set as _Set
+from uuid import uuid4 as _uuid4
+
+import asyncpg as _asyncpg
+
+from . import database as _database
+
+
+
+# ---------- Constants ----------
+
+TABLE_NAME_LEASE: str = 'pss_chat_log_lease'
+TABLE_NAME_WORKER: str = 'pss_chat_log_worker'
+
+QUERY_CREATE_TABLES: _List[str] = [
+    f'CREATE TABLE IF NOT EXISTS {TABLE_NAME_WORKER} (worker_id TEXT PRIMARY KEY, heartbeat_at TIMESTAMPTZ NOT NULL)',
+    f'CREATE TABLE IF NOT EXISTS {TABLE_NAME_LEASE} (pss_channel_key TEXT PRIMARY KEY, worker_id TEXT NOT NULL, expires_at TIMESTAMPTZ NOT NULL)',
+]
+
+QUERY_LEASE_IS_HELD: str = f'SELECT 1 FROM {TABLE_NAME_LEASE} ls WHERE ls.pss_channel_key = {{channel_key}} AND ls.worker_id = {{worker_id}} AND ls.expires_at > CURRENT_TIMESTAMP'
+"""Format with the SQL expressions for `channel_key` and `worker_id` to check, whether a worker holds the lease of a channel key."""
+
+
+
+
+
+# ---------- Classes ----------
+
+class ChatLogLeases():
+    """
+    Partitions PSS channel keys between all bot processes running Chat Loggers. Every process sends a heartbeat and holds leases on its fair share of the channel keys. Leases of processes that stopped renewing them expire after `lease_duration` seconds and get taken over by the remaining processes.
+    """
+    def __init__(self, lease_duration: float) -> None:
+        self.__lease_duration: float = lease_duration
+        self.__worker_id: str = f'{_socket.gethostname()}-{_os.getpid()}-{_uuid4().hex[:8]}'
+
+
+    @property
+    def worker_id(self) -> str:
+        return self.__worker_id
+
+
+    async def acquire(self, channel_keys: _Iterable[str]) -> _Set[str]:
+        """
+        Sends a heartbeat, renews the leases held by this process, releases leases exceeding its fair share and claims free or expired leases up to its fair share. Returns the channel keys leased by this process. Returns an empty set, if the database can't be reached.
+        """
+        channel_keys = sorted(set(channel_keys))
+        lease_duration = _timedelta(seconds=self.__lease_duration)
+        query_heartbeat = (
+            f'INSERT INTO {TABLE_NAME_WORKER} (worker_id, heartbeat_at) VALUES ($1, CURRENT_TIMESTAMP) '
+            f'ON CONFLICT (worker_id) DO UPDATE SET heartbeat_at = EXCLUDED.heartbeat_at'
+        )
+        query_delete_dead_workers = f'DELETE FROM {TABLE_NAME_WORKER} WHERE heartbeat_at < CURRENT_TIMESTAMP - $1::interval'
+        query_release = f'DELETE FROM {TABLE_NAME_LEASE} WHERE worker_id = $1 AND NOT (pss_channel_key = ANY($2))'
+        query_renew = f'UPDATE {TABLE_NAME_LEASE} SET expires_at = CURRENT_TIMESTAMP + $2::interval WHERE worker_id = $1 RETURNING pss_channel_key'
+        query_get_free = (
+            f'SELECT k.pss_channel_key FROM unnest($1::text[]) AS k(pss_channel_key) '
+            f'LEFT JOIN {TABLE_NAME_LEASE} ls ON ls.pss_channel_key = k.pss_channel_key '
+            f'WHERE ls.pss_channel_key IS NULL OR ls.expires_at <= CURRENT_TIMESTAMP '
+            f'ORDER BY k.pss_channel_key LIMIT $2'
+        )
+        query_claim = (
+            f'INSERT INTO {TABLE_NAME_LEASE} (pss_channel_key, worker_id, expires_at) SELECT unnest($1::text[]), $2, CURRENT_TIMESTAMP + $3::interval '
+            f'ON CONFLICT (pss_channel_key) DO UPDATE SET worker_id = EXCLUDED.worker_id, expires_at = EXCLUDED.expires_at '
+            f'WHERE {TABLE_NAME_LEASE}.expires_at <= CURRENT_TIMESTAMP RETURNING pss_channel_key'
+        )
+
+        try:
+            connection = await _database.acquire_connection()
+            try:
+                async with connection.transaction():
+                    await connection.execute(query_heartbeat, self.__worker_id)
+                    await connection.execute(query_delete_dead_workers, lease_duration)
+                    worker_count = await connection.fetchval(f'SELECT count(*) FROM {TABLE_NAME_WORKER}')
+                    fair_share = _math.ceil(len(channel_keys) / max(worker_count, 1))
+
+                    leased_channel_keys = sorted(record[0] for record in await connection.fetch(query_renew, self.__worker_id, lease_duration) if record[0] in channel_keys)
+                    # Keep the leases within the fair share, so that other processes can claim the rest
+                    kept_channel_keys = leased_channel_keys[:fair_share]
+                    await connection.execute(query_release, self.__worker_id, kept_channel_keys)
+
+                    result = set(kept_channel_keys)
+                    if len(result) < fair_share:
+                        free_channel_keys = [record[0] for record in await connection.fetch(query_get_free, channel_keys, fair_share - len(result))]
+                        if free_channel_keys:
+                            result.update(record[0] for record in await connection.fetch(query_claim, free_channel_keys, self.__worker_id, lease_duration))
+            finally:
+                await _database.release_connection(connection)
+        except (_asyncpg.PostgresError, OSError, ConnectionError) as error:
+            _database.print_db_query_error('ChatLogLeases.acquire', query_claim, None, error)
+            return set()
+        return result
+
+
+    async def release(self) -> bool:
+        """
+        Releases all leases held by this process and unregisters it, so that other processes can take over immediately.
+        """
+        success_lease, _ = await _database.try_execute(f'DELETE FROM {TABLE_NAME_LEASE} WHERE worker_id = $1', [self.__worker_id])
+        success_worker, _ = await _database.try_execute(f'DELETE FROM {TABLE_NAME_WORKER} WHERE worker_id = $1', [self.__worker_id])
+        return success_lease and success_worker
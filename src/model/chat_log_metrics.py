@@ -0,0 +1,212 @@
+from datetime import datetime as _datetime
+from typing import Any as _Any
+from typing import Dict as _Dict
+from typing import Iterable as _Iterable
+from typing import Optional as _Optional
+
+from .. import utils as _utils
+
+
+
+# ---------- Classes ----------
+
+class LatencyStats():
+    """
+    Count, mean, last and maximum of a series of durations in seconds.
+    """
+    def __init__(self) -> None:
+        self.count: int = 0
+        self.total: float = 0.0
+        self.last: _Optional[float] = None
+        self.max: _Optional[float] = None
+
+
+    @property
+    def mean(self) -> _Optional[float]:
+        return self.total / self.count if self.count else None
+
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        self.max = seconds if self.max is None else max(self.max, seconds)
+
+
+    def to_dict(self) -> _Dict[str, _Any]:
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'last': self.last,
+            'max': self.max,
+        }
+
+
+class ChannelKeyMetrics():
+    def __init__(self) -> None:
+        self.fetch_latency: LatencyStats = LatencyStats()
+        self.fetch_count: int = 0
+        self.failure_count: int = 0
+        self.retry_count: int = 0
+        self.maintenance_skip_count: int = 0
+        self.last_message_count: int = 0
+        self.last_new_message_count: int = 0
+        self.message_count: int = 0
+        self.new_message_count: int = 0
+        self.newest_pss_message_id: int = 0
+        self.last_fetched_at: _Optional[_datetime] = None
+
+
+    def to_dict(self) -> _Dict[str, _Any]:
+        return {
+            'fetch_latency': self.fetch_latency.to_dict(),
+            'fetch_count': self.fetch_count,
+            'failure_count': self.failure_count,
+            'retry_count': self.retry_count,
+            'maintenance_skip_count': self.maintenance_skip_count,
+            'last_message_count': self.last_message_count,
+            'last_new_message_count': self.last_new_message_count,
+            'message_count': self.message_count,
+            'new_message_count': self.new_message_count,
+            'newest_pss_message_id': self.newest_pss_message_id,
+            'last_fetched_at': _to_isoformat(self.last_fetched_at),
+        }
+
+
+class LoggerMetrics():
+    def __init__(self, pss_channel_key: str) -> None:
+        self.pss_channel_key: str = pss_channel_key
+        self.delivery_latency: LatencyStats = LatencyStats()
+        self.last_pss_message_id: int = 0
+        self.delivered_message_count: int = 0
+        self.delivered_post_count: int = 0
+        self.delivery_failure_count: int = 0
+        self.last_delivered_at: _Optional[_datetime] = None
+
+
+    def to_dict(self, newest_pss_message_id: int) -> _Dict[str, _Any]:
+        return {
+            'pss_channel_key': self.pss_channel_key,
+            'delivery_latency': self.delivery_latency.to_dict(),
+            'last_pss_message_id': self.last_pss_message_id,
+            'checkpoint_lag': max(newest_pss_message_id - self.last_pss_message_id, 0) if self.last_pss_message_id else None,
+            'delivered_message_count': self.delivered_message_count,
+            'delivered_post_count': self.delivered_post_count,
+            'delivery_failure_count': self.delivery_failure_count,
+            'last_delivered_at': _to_isoformat(self.last_delivered_at),
+        }
+
+
+class ChatLogMetrics():
+    """
+    Collects in-memory metrics of chat logging per PSS channel key and per Chat Logger. The checkpoint lag of a Chat Logger is the difference between the newest message ID fetched for its channel key and its checkpoint.
+    """
+    def __init__(self) -> None:
+        self.__started_at: _datetime = _utils.datetime.get_utc_now()
+        self.__channel_keys: _Dict[str, ChannelKeyMetrics] = {}
+        self.__loggers: _Dict[int, LoggerMetrics] = {}
+        self.__tick_count: int = 0
+        self.__maintenance_skip_count: int = 0
+        self.__last_tick_at: _Optional[_datetime] = None
+
+
+    def get_channel_key_metrics(self, channel_key: str) -> ChannelKeyMetrics:
+        if channel_key not in self.__channel_keys:
+            self.__channel_keys[channel_key] = ChannelKeyMetrics()
+        return self.__channel_keys[channel_key]
+
+
+    def get_logger_metrics(self, pss_chat_log_id: int, channel_key: str = None) -> LoggerMetrics:
+        if pss_chat_log_id not in self.__loggers:
+            self.__loggers[pss_chat_log_id] = LoggerMetrics(channel_key)
+        elif channel_key:
+            self.__loggers[pss_chat_log_id].pss_channel_key = channel_key
+        return self.__loggers[pss_chat_log_id]
+
+
+    def prune(self, channel_keys: _Iterable[str], pss_chat_log_ids: _Iterable[int]) -> None:
+        """
+        Forgets the metrics of channel keys and Chat Loggers that no longer exist.
+        """
+        channel_keys = set(channel_keys)
+        pss_chat_log_ids = set(pss_chat_log_ids)
+        for channel_key in [channel_key for channel_key in self.__channel_keys if channel_key not in channel_keys]:
+            self.__channel_keys.pop(channel_key)
+        for pss_chat_log_id in [pss_chat_log_id for pss_chat_log_id in self.__loggers if pss_chat_log_id not in pss_chat_log_ids]:
+            self.__loggers.pop(pss_chat_log_id)
+
+
+    def record_tick(self, utc_now: _datetime) -> None:
+        self.__tick_count += 1
+        self.__last_tick_at = utc_now
+
+
+    def record_maintenance_skip(self, channel_keys: _Iterable[str]) -> None:
+        self.__maintenance_skip_count += 1
+        for channel_key in channel_keys:
+            self.get_channel_key_metrics(channel_key).maintenance_skip_count += 1
+
+
+    def record_fetch(self, channel_key: str, latency: float, retry_count: int, success: bool) -> None:
+        metrics = self.get_channel_key_metrics(channel_key)
+        metrics.fetch_latency.add(latency)
+        metrics.retry_count += retry_count
+        if success:
+            metrics.fetch_count += 1
+            metrics.last_fetched_at = _utils.datetime.get_utc_now()
+        else:
+            metrics.failure_count += 1
+
+
+    def record_messages(self, channel_key: str, message_count: int, new_message_count: int, newest_pss_message_id: int) -> None:
+        metrics = self.get_channel_key_metrics(channel_key)
+        metrics.last_message_count = message_count
+        metrics.last_new_message_count = new_message_count
+        metrics.message_count += message_count
+        metrics.new_message_count += new_message_count
+        metrics.newest_pss_message_id = max(metrics.newest_pss_message_id, newest_pss_message_id or 0)
+
+
+    def record_checkpoint(self, pss_chat_log_id: int, channel_key: str, last_pss_message_id: int) -> None:
+        self.get_logger_metrics(pss_chat_log_id, channel_key).last_pss_message_id = last_pss_message_id or 0
+
+
+    def record_delivery(self, pss_chat_log_id: int, message_count: int, post_count: int, last_pss_message_date: _Optional[_datetime]) -> None:
+        metrics = self.get_logger_metrics(pss_chat_log_id)
+        utc_now = _utils.datetime.get_utc_now()
+        metrics.delivered_message_count += message_count
+        metrics.delivered_post_count += post_count
+        metrics.last_delivered_at = utc_now
+        if last_pss_message_date is not None:
+            metrics.delivery_latency.add((utc_now - last_pss_message_date).total_seconds())
+
+
+    def record_delivery_failure(self, pss_chat_log_id: int) -> None:
+        self.get_logger_metrics(pss_chat_log_id).delivery_failure_count += 1
+
+
+    def snapshot(self) -> _Dict[str, _Any]:
+        """
+        Returns the current metrics as a JSON serializable dict.
+        """
+        return {
+            'created_at': _to_isoformat(_utils.datetime.get_utc_now()),
+            'started_at': _to_isoformat(self.__started_at),
+            'tick_count': self.__tick_count,
+            'last_tick_at': _to_isoformat(self.__last_tick_at),
+            'maintenance_skip_count': self.__maintenance_skip_count,
+            'channel_keys': {channel_key: metrics.to_dict() for channel_key, metrics in sorted(self.__channel_keys.items())},
+            'loggers': {
+                str(pss_chat_log_id): metrics.to_dict(self.get_channel_key_metrics(metrics.pss_channel_key).newest_pss_message_id if metrics.pss_channel_key in self.__channel_keys else 0)
+                for pss_chat_log_id, metrics in sorted(self.__loggers.items())
+            },
+        }
+
+
+
+
+
+# ---------- Functions ----------
+
+def _to_isoformat(value: _Optional[_datetime]) -> _Optional[str]:
+    return value.isoformat() if value else None
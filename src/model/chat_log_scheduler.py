@@ -0,0 +1,78 @@
+from collections import deque as _deque
+from datetime import datetime as _datetime
+from datetime import timedelta as _timedelta
+from typing import Deque as _Deque
+from typing import Dict as _Dict
+from typing import Iterable as _Iterable
+from typing import List as _List
+
+
+
+# ---------- Classes ----------
+
+class ChatLogScheduler():
+    """
+    Keeps a polling interval per PSS channel key. The interval shrinks for busy channel keys and backs off exponentially for quiet ones, within `min_interval` and `max_interval` seconds. No more than `requests_per_minute` channel keys will be returned as due within a minute.
+    """
+    def __init__(self, min_interval: float, max_interval: float, requests_per_minute: int, initial_interval: float, busy_message_count: int, full_page_message_count: int) -> None:
+        self.__min_interval: float = min_interval
+        self.__max_interval: float = max_interval
+        self.__requests_per_minute: int = requests_per_minute
+        self.__initial_interval: float = min(max(initial_interval, min_interval), max_interval)
+        self.__busy_message_count: int = busy_message_count
+        self.__full_page_message_count: int = full_page_message_count
+        self.__intervals: _Dict[str, float] = {}
+        self.__next_run_at: _Dict[str, _datetime] = {}
+        self.__requested_at: _Deque[_datetime] = _deque()
+
+
+    def get_interval(self, channel_key: str) -> float:
+        return self.__intervals.get(channel_key, self.__initial_interval)
+
+
+    def get_due(self, channel_keys: _Iterable[str], utc_now: _datetime) -> _List[str]:
+        """
+        Returns the channel keys that are due to be polled, most overdue first, within the remaining request budget. New channel keys are due immediately, channel keys not passed in are forgotten.
+        """
+        channel_keys = set(channel_keys)
+        for channel_key in list(self.__next_run_at.keys()):
+            if channel_key not in channel_keys:
+                self.__next_run_at.pop(channel_key)
+                self.__intervals.pop(channel_key, None)
+        for channel_key in channel_keys:
+            self.__next_run_at.setdefault(channel_key, utc_now)
+
+        minute_ago = utc_now - _timedelta(minutes=1)
+        while self.__requested_at and self.__requested_at[0] <= minute_ago:
+            self.__requested_at.popleft()
+        budget = max(self.__requests_per_minute - len(self.__requested_at), 0)
+
+        due = sorted((next_run_at, channel_key) for channel_key, next_run_at in self.__next_run_at.items() if next_run_at <= utc_now)
+        result = [channel_key for _, channel_key in due[:budget]]
+        self.__requested_at.extend(utc_now for _ in result)
+        return result
+
+
+    def record(self, channel_key: str, new_message_count: int, message_count: int, utc_now: _datetime) -> None:
+        """
+        Adjusts the polling interval of a channel key according to the result of a poll.
+        """
+        interval = self.get_interval(channel_key)
+        if message_count >= self.__full_page_message_count and new_message_count >= message_count:
+            # Every message on a full page is new, so some messages have probably been missed
+            interval = self.__min_interval
+        elif new_message_count >= self.__busy_message_count:
+            interval /= 2
+        elif new_message_count == 0:
+            interval *= 2
+        self.__set_interval(channel_key, interval, utc_now)
+
+
+    def record_failure(self, channel_key: str, utc_now: _datetime) -> None:
+        self.__set_interval(channel_key, self.get_interval(channel_key) * 2, utc_now)
+
+
+    def __set_interval(self, channel_key: str, interval: float, utc_now: _datetime) -> None:
+        interval = min(max(interval, self.__min_interval), self.__max_interval)
+        self.__intervals[channel_key] = interval
+        self.__next_run_at[channel_key] = utc_now + _timedelta(seconds=interval)
@@ -0,0 +1,99 @@
+import asyncio as _asyncio
+from typing import Dict as _Dict
+from typing import Optional as _Optional
+from typing import Tuple as _Tuple
+
+import aiohttp as _aiohttp
+import discord as _discord
+
+from . import chat_log as _chat_log
+from . import orm as _orm
+from ..utils.rate_limiter import RateLimiter as _RateLimiter
+
+
+
+# ---------- Constants ----------
+
+WEBHOOK_NAME: str = 'PSS Chat Log'
+
+
+
+
+
+# ---------- Classes ----------
+
+class ChatLogWebhooks():
+    """
+    Posts chat logs via one webhook per Discord channel. Webhooks get created on first use and are stored in the table `pss_chat_log_webhook`. All requests share a single aiohttp session and are paced per webhook, independently of the bot's own rate limits.
+    """
+    def __init__(self, rate_limit: _Tuple[float, float]) -> None:
+        self.__rate_limit: _Tuple[float, float] = rate_limit
+        self.__session: _aiohttp.ClientSession = None
+        self.__webhooks: _Dict[int, _discord.Webhook] = {}
+        self.__rate_limiters: _Dict[int, _RateLimiter] = {}
+        self.__locks: _Dict[int, _asyncio.Lock] = {}
+
+
+    async def close(self) -> None:
+        if self.__session is not None and not self.__session.closed:
+            await self.__session.close()
+        self.__session = None
+        self.__webhooks.clear()
+
+
+    async def send(self, channel: _discord.TextChannel, username: str, content: str) -> None:
+        """
+        Posts the content to the channel under the given username. If the webhook has been deleted in the meantime, a new one gets created.
+        """
+        for retry in (True, False):
+            webhook = await self.get_webhook(channel)
+            async with self.__get_rate_limiter(webhook.id):
+                try:
+                    await webhook.send(content=content, username=username, allowed_mentions=_discord.AllowedMentions.none())
+                    return
+                except _discord.NotFound:
+                    await self.__forget_webhook(channel.id)
+                    if not retry:
+                        raise
+
+
+    async def get_webhook(self, channel: _discord.TextChannel) -> _discord.Webhook:
+        """
+        Returns the webhook for the channel. Raises `discord.Forbidden`, if it needs to be created and the bot lacks the permission to manage webhooks.
+        """
+        webhook = self.__webhooks.get(channel.id)
+        if webhook is not None:
+            return webhook
+
+        async with self.__locks.setdefault(channel.id, _asyncio.Lock()):
+            webhook = self.__webhooks.get(channel.id)
+            if webhook is None:
+                async with _orm.create_async_session() as session:
+                    pss_chat_log_webhook: _Optional[_chat_log.PssChatLogWebhook] = await _orm.get_by_id_async(_chat_log.PssChatLogWebhook, session, channel.id)
+                    if pss_chat_log_webhook is None:
+                        created_webhook = await channel.create_webhook(name=WEBHOOK_NAME, reason='Post PSS chat logs')
+                        pss_chat_log_webhook = _chat_log.PssChatLogWebhook(channel_id=channel.id, webhook_id=created_webhook.id, webhook_token=created_webhook.token)
+                        await pss_chat_log_webhook.create_async(session)
+                webhook = _discord.Webhook.partial(pss_chat_log_webhook.webhook_id, pss_chat_log_webhook.webhook_token, session=self.__get_session())
+                self.__webhooks[channel.id] = webhook
+        return webhook
+
+
+    async def __forget_webhook(self, channel_id: int) -> None:
+        self.__webhooks.pop(channel_id, None)
+        async with _orm.create_async_session() as session:
+            pss_chat_log_webhook = await _orm.get_by_id_async(_chat_log.PssChatLogWebhook, session, channel_id)
+            if pss_chat_log_webhook is not None:
+                await pss_chat_log_webhook.delete_async(session)
+
+
+    def __get_rate_limiter(self, webhook_id: int) -> _RateLimiter:
+        if webhook_id not in self.__rate_limiters:
+            self.__rate_limiters[webhook_id] = _RateLimiter(*self.__rate_limit)
+        return self.__rate_limiters[webhook_id]
+
+
+    def __get_session(self) -> _aiohttp.ClientSession:
+        if self.__session is None or self.__session.closed:
+            self.__session = _aiohttp.ClientSession()
+        return self.__session
@@ -1,7 +1,12 @@
+import asyncio as _asyncio
 from datetime import datetime as _datetime
+from datetime import timedelta as _timedelta
+import gzip as _gzip
+import io as _io
 import json as _json
 import os as _os
 from typing import Any as _Any
+from typing import Callable as _Callable
 from typing import Dict as _Dict
 from typing import List as _List
 from typing import Optional as _Optional
@@ -65,11 +70,61 @@ class ColumnDefinition():
 
 __CONNECTION_POOL: _asyncpg.pool.Pool = None
 __CONNECTION_POOL_LOCK: _Lock = _Lock()
+__CONNECTION_POOL_RECYCLE_TASK: _asyncio.Task = None
 
 DATABASE_SSL_MODE: str = _os.environ.get('DATABASE_SSL_MODE', 'require')
 DATABASE_URL: str = f'{_os.environ.get("DATABASE_URL")}?sslmode={DATABASE_SSL_MODE}'.replace('postgres://', 'postgresql://')
 
+CHANNEL_NAME_BOT_SETTINGS: str = 'bot_settings_changed'
+
+SETTING_NAME_LAST_EXPORT_AT: str = 'last_export_at'
+SETTING_NAME_SCHEMA_VERSION: str = 'schema_version'
+SETTING_VALUE_COLUMN_NAMES: _List[str] = [
+    'setting_boolean',
+    'setting_float',
+    'setting_int',
+    'setting_text',
+    'setting_timestamp',
+]
+
 TABLE_NAME_BOT_SETTINGS: str = 'bot_settings'
+TABLE_NAME_DELETED_ROW: str = 'deleted_row'
+
+EXPORT_TABLE_NAMES: _List[str] = [
+    TABLE_NAME_BOT_SETTINGS,
+    'chat_alert_rule',
+    'fleet',
+    'pss_chat_log',
+    'reaction_role',
+    'reaction_role_change',
+    'reaction_role_requirement',
+]
+
+QUERY_GET_EXPORT_WATERMARK: str = (
+    'SELECT LEAST(now(), (SELECT min(xact_start) FROM pg_stat_activity '
+    'WHERE datname = current_database() AND pid <> pg_backend_pid() AND xact_start IS NOT NULL))'
+)
+QUERY_UPDATE_SEQUENCES: str = '''
+DO
+$do$
+BEGIN
+   IF EXISTS (SELECT FROM chat_alert_rule) THEN
+      PERFORM setval('chat_alert_rule_chat_alert_rule_id_seq', (SELECT max(chat_alert_rule_id) FROM chat_alert_rule));
+   END IF;
+   IF EXISTS (SELECT FROM pss_chat_log) THEN
+      PERFORM setval('pss_chat_log_pss_chat_log_id_seq', (SELECT max(pss_chat_log_id) FROM pss_chat_log));
+   END IF;
+   IF EXISTS (SELECT FROM reaction_role_change) THEN
+      PERFORM setval('reaction_role_change_reaction_role_change_id_seq', (SELECT max(reaction_role_change_id) FROM reaction_role_change));
+   END IF;
+   IF EXISTS (SELECT FROM reaction_role) THEN
+      PERFORM setval('reaction_role_reaction_role_id_seq', (SELECT max(reaction_role_id) FROM reaction_role));
+   END IF;
+   IF EXISTS (SELECT FROM reaction_role_requirement) THEN
+      PERFORM setval('reaction_role_requirement_reaction_role_requirement_id_seq', (SELECT max(reaction_role_requirement_id) FROM reaction_role_requirement));
+   END IF;
+END
+$do$'''
 
 
 
@@ -77,55 +132,201 @@ TABLE_NAME_BOT_SETTINGS: str = 'bot_settings'
 
 # ---------- Functions ----------
 
-async def export_to_json() -> str:
-    bot_settings = await _export_table('bot_settings')
-    pss_chat_log = await _export_table('pss_chat_log')
-    reaction_role = await _export_table('reaction_role')
-    reaction_role_change = await _export_table('reaction_role_change')
-    reaction_role_requirement = await _export_table('reaction_role_requirement')
+async def export_to_ndjson_gzip(since: _Optional[_datetime] = None) -> _Tuple[bytes, _datetime]:
+    """
+    Exports all tables in `EXPORT_TABLE_NAMES` from a consistent snapshot as gzip compressed, newline-delimited JSON.
 
-    result = {
-        'bot_settings': bot_settings,
-        'pss_chat_log': pss_chat_log,
-        'reaction_role': reaction_role,
-        'reaction_role_change': reaction_role_change,
-        'reaction_role_requirement': reaction_role_requirement,
-    }
-    return _json.dumps(result, indent=4, cls=_utils.json.ViviEncoder)
+    For each table, a line with the table and column names is followed by one line per row containing the row's values.
+    Rows are read through a server-side cursor in batches of `DATABASE_EXPORT_BATCH_SIZE` rows.
+    The setting `SETTING_NAME_LAST_EXPORT_AT` is never exported, since it describes the exporting database.
+
+    If `since` is specified, only rows created or modified after that point in time and the rows deleted since then (from table `deleted_row`) will be exported.
+    Such a delta export starts with a line containing the keys `delta_since` and `exported_at`.
+    Delta exports reach back `DATABASE_DELTA_EXPORT_OVERLAP` seconds before `since`, to include rows stamped by clocks running behind. Rows exported twice get merged again on import.
+
+    Returns the export and the point in time the next delta export has to start at. That's the start of the oldest transaction still running during the export, if there is any, since the rows it commits later may be stamped with its start time.
+    """
+    if not await connect():
+        raise ConnectionError('[export_to_ndjson_gzip] could not connect to db')
+
+    buffer = _io.BytesIO()
+    with _gzip.GzipFile(fileobj=buffer, mode='wb') as gzip_file:
+        connection: _asyncpg.Connection
+        async with __CONNECTION_POOL.acquire() as connection:
+            async with connection.transaction(isolation='repeatable_read', readonly=True):
+                exported_at: _datetime = await connection.fetchval(QUERY_GET_EXPORT_WATERMARK)
+                if since:
+                    changed_since = since - _timedelta(seconds=_model_settings.DATABASE_DELTA_EXPORT_OVERLAP)
+                    gzip_file.write(_encode_ndjson_line({'delta_since': since, 'exported_at': exported_at}))
+                    await _export_table(connection, TABLE_NAME_DELETED_ROW, gzip_file, 'WHERE deleted_at >= $1', [changed_since])
+                for table_name in EXPORT_TABLE_NAMES:
+                    conditions = []
+                    args = []
+                    if since:
+                        args.append(changed_since)
+                        conditions.append(f'(created_at >= ${len(args)} OR modified_at >= ${len(args)})')
+                    if table_name == TABLE_NAME_BOT_SETTINGS:
+                        args.append(SETTING_NAME_LAST_EXPORT_AT)
+                        conditions.append(f'setting_name <> ${len(args)}')
+                    await _export_table(connection, table_name, gzip_file, f'WHERE {" AND ".join(conditions)}' if conditions else None, args)
+    return (buffer.getvalue(), exported_at)
 
 
 async def import_from_json(json: str) -> None:
+    """
+    Replaces the contents of all tables in the export with the exported rows and updates the sequences. Either all tables get imported or none.
+    """
     tables = _json.loads(json, cls=_utils.json.ViviDecoder)
-    for table_name, table_contents in tables.items():
-        await _import_table(table_name, table_contents['column_names'], table_contents['values'])
 
+    if not await connect():
+        raise ConnectionError('[import_from_json] could not connect to db')
+
+    connection: _asyncpg.Connection
+    async with __CONNECTION_POOL.acquire() as connection:
+        async with connection.transaction():
+            for table_name, table_contents in tables.items():
+                await _clear_table(connection, table_name)
+                await _import_rows(connection, table_name, table_contents['column_names'], table_contents['values'])
+            print(f'[import_from_json] Updating sequences')
+            await connection.execute(QUERY_UPDATE_SEQUENCES)
+
+
+async def import_from_ndjson_gzip(data: bytes) -> None:
+    """
+    Imports an export created by `export_to_ndjson_gzip` and updates the sequences. Either all tables get imported or none.
+
+    A full export replaces the contents of all tables in the export with the exported rows.
+    A delta export is merged into the existing data: deleted rows get removed, new and modified rows get inserted or updated.
+    """
+    if not await connect():
+        raise ConnectionError('[import_from_ndjson_gzip] could not connect to db')
+
+    connection: _asyncpg.Connection
+    async with __CONNECTION_POOL.acquire() as connection:
+        async with connection.transaction():
+            merge = False
+            table_name: str = None
+            column_names: _List[str] = None
+            rows: _List[_List[_Any]] = []
+            with _gzip.GzipFile(fileobj=_io.BytesIO(data), mode='rb') as gzip_file:
+                for line in gzip_file:
+                    entry = _json.loads(line, cls=_utils.json.ViviDecoder)
+                    if isinstance(entry, dict) and 'delta_since' in entry:
+                        print(f'[import_from_ndjson_gzip] Merging changes made between {entry["delta_since"]} and {entry["exported_at"]}')
+                        merge = True
+                    elif isinstance(entry, dict):
+                        await _finish_table_import(connection, table_name, column_names, rows, merge)
+                        table_name = entry['table_name']
+                        column_names = entry['column_names']
+                        rows = []
+                        if merge:
+                            await _create_merge_table(connection, table_name)
+                        else:
+                            await _clear_table(connection, table_name)
+                    else:
+                        rows.append(entry)
+                        if len(rows) >= _model_settings.DATABASE_EXPORT_BATCH_SIZE:
+                            await _import_rows(connection, _get_merge_table_name(table_name) if merge else table_name, column_names, rows)
+                            rows = []
+            await _finish_table_import(connection, table_name, column_names, rows, merge)
+            print(f'[import_from_ndjson_gzip] Updating sequences')
+            await connection.execute(QUERY_UPDATE_SEQUENCES)
 
-async def _export_table(table_name: str) -> dict:
-    column_names = await get_column_names(table_name)
-    rows = await fetchall(f'SELECT * FROM {table_name}')
-    values = [list(dict(row).values()) for row in rows]
-    return {
-        'column_names': column_names,
-        'values': values
-    }
 
+async def _clear_table(connection: _asyncpg.Connection, table_name: str) -> None:
+    print(f'[_clear_table] Clearing table: {table_name}')
+    if table_name == TABLE_NAME_BOT_SETTINGS:
+        # TRUNCATE doesn't fire the row level trigger notifying the settings caches, so notify them about the settings to be removed. Imported settings get notified by the trigger.
+        await connection.execute(f'SELECT pg_notify($1, setting_name) FROM {TABLE_NAME_BOT_SETTINGS}', CHANNEL_NAME_BOT_SETTINGS)
+    await connection.execute(f'TRUNCATE TABLE {table_name}')
 
-async def _import_table(table_name: str, column_names: _List[str], rows: _List[_List[_Any]]) -> None:
+
+async def _create_merge_table(connection: _asyncpg.Connection, table_name: str) -> None:
     """
-    This function will clear the specified table and insert the values provided.
+    Creates an empty temporary table to receive the rows to be merged into the specified table. Must be called within a transaction.
     """
-    column_names_string = ','.join(column_names)
-    values_string = ', '.join([f'${i}' for i in range(1, len(column_names) + 1)])
-    query = f'INSERT INTO {table_name} ({column_names_string}) VALUES ({values_string})'
+    await connection.execute(f'CREATE TEMPORARY TABLE {_get_merge_table_name(table_name)} (LIKE {table_name}) ON COMMIT DROP')
 
-    print(f'[_import_table] Clearing table: {table_name}')
-    await execute(f'DELETE FROM {table_name}')
 
-    print(f'[_import_table] Importing data to table: {table_name}')
-    for values in rows:
-        await execute(query, values)
+async def _export_table(connection: _asyncpg.Connection, table_name: str, gzip_file: _gzip.GzipFile, where: str = None, args: _List[_Any] = None) -> None:
+    """
+    Writes the contents of the specified table to the file. Must be called within a transaction.
+    """
+    query = f'SELECT * FROM {table_name}'
+    if where:
+        query += f' {where}'
+    statement = await connection.prepare(query)
+    column_names = [attribute.name for attribute in statement.get_attributes()]
+    gzip_file.write(_encode_ndjson_line({'table_name': table_name, 'column_names': column_names}))
+
+    print(f'[_export_table] Exporting table: {table_name}')
+    cursor: _asyncpg.cursor.Cursor = await statement.cursor(*(args or []))
+    while True:
+        rows = await cursor.fetch(_model_settings.DATABASE_EXPORT_BATCH_SIZE)
+        if not rows:
+            break
+        gzip_file.write(b''.join(_encode_ndjson_line(list(row.values())) for row in rows))
+
+
+def _encode_ndjson_line(obj: _Any) -> bytes:
+    return (_json.dumps(obj, cls=_utils.json.ViviEncoder) + '\n').encode('utf-8')
+
+
+async def _finish_table_import(connection: _asyncpg.Connection, table_name: str, column_names: _List[str], rows: _List[_List[_Any]], merge: bool) -> None:
+    if not table_name:
+        return
+
+    if not merge:
+        await _import_rows(connection, table_name, column_names, rows)
+        return
+
+    merge_table_name = _get_merge_table_name(table_name)
+    await _import_rows(connection, merge_table_name, column_names, rows)
+    if table_name == TABLE_NAME_DELETED_ROW:
+        deleted_table_names = [record[0] for record in await connection.fetch(f'SELECT DISTINCT table_name FROM {merge_table_name}')]
+        for deleted_table_name in deleted_table_names:
+            id_column_name = await _get_primary_key_column_name(connection, deleted_table_name)
+            result = await connection.execute(f'DELETE FROM {deleted_table_name} WHERE {id_column_name}::TEXT IN (SELECT row_id FROM {merge_table_name} WHERE table_name = $1)', deleted_table_name)
+            print(f'[_finish_table_import] Deleted rows from table {deleted_table_name}: {result}')
+    else:
+        id_column_name = await _get_primary_key_column_name(connection, table_name)
+        columns = ', '.join(column_names)
+        set_definition = ', '.join([f'{column_name} = EXCLUDED.{column_name}' for column_name in column_names if column_name != id_column_name])
+        query = f'INSERT INTO {table_name} ({columns}) SELECT {columns} FROM {merge_table_name} ON CONFLICT ({id_column_name}) DO UPDATE SET {set_definition}'
+        result = await connection.execute(query)
+        print(f'[_finish_table_import] Merged rows into table {table_name}: {result}')
 
 
+async def _get_primary_key_column_name(connection: _asyncpg.Connection, table_name: str) -> str:
+    query = '''
+SELECT a.attname
+FROM pg_index i
+JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+WHERE i.indrelid = $1::regclass AND i.indisprimary'''
+    return await connection.fetchval(query, table_name)
+
+
+def _get_merge_table_name(table_name: str) -> str:
+    return f'{table_name}_merge'
+
+
+def _get_setting(record: _asyncpg.Record) -> _Tuple[object, _datetime]:
+    value = None
+    for column_name in SETTING_VALUE_COLUMN_NAMES:
+        if record[column_name] is not None:
+            value = record[column_name]
+            break
+    return (value, record['modified_at'])
+
+
+async def _import_rows(connection: _asyncpg.Connection, table_name: str, column_names: _List[str], rows: _List[_List[_Any]]) -> None:
+    """
+    Inserts the values provided into the specified table. Must be called within a transaction.
+    """
+    if rows:
+        print(f'[_import_rows] Importing {len(rows)} rows to table: {table_name}')
+        await connection.copy_records_to_table(table_name, records=rows, columns=column_names)
+
 
 
 
@@ -138,7 +339,14 @@ async def connect() -> bool:
         global __CONNECTION_POOL
         if is_connected(__CONNECTION_POOL) is False:
             try:
-                __CONNECTION_POOL = await _asyncpg.create_pool(dsn=_model_settings.DATABASE_URL)
+                __CONNECTION_POOL = await _asyncpg.create_pool(
+                    dsn=_model_settings.DATABASE_URL,
+                    min_size=_model_settings.DATABASE_POOL_MIN_SIZE,
+                    max_size=_model_settings.DATABASE_POOL_MAX_SIZE,
+                    max_inactive_connection_lifetime=_model_settings.DATABASE_POOL_MAX_IDLE_TIME,
+                    server_settings={'statement_timeout': str(_model_settings.DATABASE_STATEMENT_TIMEOUT)},
+                )
+                __start_recycling_connections()
                 return True
             except Exception as error:
                 error_name = error.__class__.__name__
@@ -148,15 +356,54 @@ async def connect() -> bool:
             return True
 
 
+async def acquire_connection() -> _asyncpg.Connection:
+    """
+    Acquires a connection from the connection pool. The connection must be handed back via `release_connection`.
+    """
+    __log_db_function_enter('acquire_connection')
+
+    if not await connect():
+        raise ConnectionError('[acquire_connection] could not connect to db')
+    return await __CONNECTION_POOL.acquire()
+
+
+async def release_connection(connection: _asyncpg.Connection) -> None:
+    __log_db_function_enter('release_connection', connection=connection)
+
+    if is_connected(__CONNECTION_POOL):
+        await __CONNECTION_POOL.release(connection)
+
+
 async def disconnect() -> None:
     __log_db_function_enter('disconnect')
 
     with __CONNECTION_POOL_LOCK:
         global __CONNECTION_POOL
+        if __CONNECTION_POOL_RECYCLE_TASK is not None:
+            __CONNECTION_POOL_RECYCLE_TASK.cancel()
         if is_connected(__CONNECTION_POOL):
             await __CONNECTION_POOL.close()
 
 
+def __start_recycling_connections() -> None:
+    """
+    Periodically marks all pooled connections as expired, so that they get replaced by fresh ones once released. Disabled, if `DATABASE_POOL_MAX_LIFETIME` is not positive.
+    """
+    global __CONNECTION_POOL_RECYCLE_TASK
+    if _model_settings.DATABASE_POOL_MAX_LIFETIME <= 0:
+        return
+    if __CONNECTION_POOL_RECYCLE_TASK is not None and not __CONNECTION_POOL_RECYCLE_TASK.done():
+        return
+    __CONNECTION_POOL_RECYCLE_TASK = _asyncio.create_task(__recycle_connections())
+
+
+async def __recycle_connections() -> None:
+    while True:
+        await _asyncio.sleep(_model_settings.DATABASE_POOL_MAX_LIFETIME)
+        if is_connected(__CONNECTION_POOL):
+            await __CONNECTION_POOL.expire_connections()
+
+
 async def delete_rows(table_name: str, id_column_name: str, ids: _List[_Any]) -> bool:
     __log_db_function_enter('delete_rows', table_name=table_name, id_column_name=id_column_name, ids=ids)
 
@@ -260,23 +507,13 @@ async def get_column_names(table_name: str) -> _List[str]:
     __log_db_function_enter('get_column_names', table_name=f'\'{table_name}\'')
 
     result = None
-    query = f'SELECT column_name FROM information_schema.columns WHERE table_name = $1'
+    query = f'SELECT column_name FROM information_schema.columns WHERE table_name = $1 ORDER BY ordinal_position'
     result = await fetchall(query, [table_name])
     if result:
         result = [record[0] for record in result]
     return result
 
 
-async def get_schema_version() -> str:
-    __log_db_function_enter('get_schema_version')
-
-    try:
-        result, _ = await get_setting('schema_version')
-    except:
-        result = None
-    return result or ''
-
-
 def is_connected(pool: _asyncpg.pool.Pool) -> bool:
     __log_db_function_enter('is_connected', pool=pool)
 
@@ -296,18 +533,6 @@ async def try_add_column(table_name: str, column_name: str, column_type: str, is
     return success
 
 
-async def try_set_schema_version(version: str) -> bool:
-    __log_db_function_enter('try_set_schema_version', version=f'\'{version}\'')
-
-    prior_version = await get_schema_version()
-    if not prior_version:
-        success = bool(await insert_row(TABLE_NAME_BOT_SETTINGS, 'setting_name', setting_name='schema_version', setting_text=version))
-    else:
-        utc_now = _utils.datetime.get_utc_now()
-        success = await update_row(TABLE_NAME_BOT_SETTINGS, 'setting_name', 'schema_version', modified_at=utc_now, setting_text=version)
-    return success
-
-
 async def try_create_table(table_name: str, column_definitions: _List[ColumnDefinition]) -> bool:
     __log_db_function_enter('try_create_table', table_name=f'\'{table_name}\'', column_definitions=column_definitions)
 
@@ -352,7 +577,6 @@ async def try_execute(query: str, args: _List = None, raise_db_error: bool = Fal
 async def get_setting(setting_name: str) -> _Tuple[object, _datetime]:
     __log_db_function_enter('get_setting', setting_name=f'\'{setting_name}\'')
 
-    modify_date: _datetime = None
     query = f'SELECT * FROM {TABLE_NAME_BOT_SETTINGS} WHERE setting_name = $1'
     args = [setting_name]
     try:
@@ -361,15 +585,7 @@ async def get_setting(setting_name: str) -> _Tuple[object, _datetime]:
         print_db_query_error('get_setting', query, args, error)
         records = []
     if records:
-        result = records[0]
-        modify_date = result[2]
-        value = None
-        for field in result[3:]:
-            if field:
-                value = field
-                break
-        setting = (value, modify_date)
-        return setting
+        return _get_setting(records[0])
     else:
         return (None, None)
 
@@ -379,57 +595,66 @@ async def get_settings(setting_names: _List[str] = None) -> _Dict[str, _Tuple[ob
     setting_names = setting_names or []
     result = {setting_name: (None, None) for setting_name in setting_names}
 
-    db_setting_names = setting_names
+    query = f'SELECT * FROM {TABLE_NAME_BOT_SETTINGS}'
+    if setting_names:
+        query += ' WHERE setting_name = ANY($1)'
+        records = await fetchall(query, args=[setting_names])
+    else:
+        records = await fetchall(query)
+    if records is None:
+        raise ConnectionError('[get_settings] could not read settings from db')
 
-    if not result:
-        query = f'SELECT * FROM {TABLE_NAME_BOT_SETTINGS}'
-        if db_setting_names:
-            where_strings = [f'setting_name = ${i}' for i in range(1, len(db_setting_names) + 1, 1)]
-            where_string = ' OR '.join(where_strings)
-            query += f' WHERE {where_string}'
-            records = await fetchall(query, args=db_setting_names)
-        else:
-            records = await fetchall(query)
-
-        for record in records:
-            setting_name = record[0]
-            modify_date = record[1]
-            value = None
-            for field in record[2:]:
-                if field:
-                    value = field
-                    break
-            result[setting_name] = (value, modify_date)
+    for record in records:
+        result[record['setting_name']] = _get_setting(record)
     return result
 
 
 async def set_setting(setting_name: str, value: _Any, utc_now: _datetime = None) -> bool:
+    """
+    Inserts or updates a setting in a single statement. The row is left untouched, if the value didn't change.
+    """
     __log_db_function_enter('set_setting', setting_name=f'\'{setting_name}\'', value=value, utc_now=utc_now)
 
-    kwargs = {
-        'setting_name': setting_name
-    }
+    values = {column_name: None for column_name in SETTING_VALUE_COLUMN_NAMES}
     if isinstance(value, bool):
-        kwargs['setting_boolean'] = value
+        values['setting_boolean'] = value
     elif isinstance(value, int):
-        kwargs['setting_int'] = value
+        values['setting_int'] = value
     elif isinstance(value, float):
-        kwargs['setting_float'] = value
+        values['setting_float'] = value
     elif isinstance(value, _datetime):
-        kwargs['setting_timestamptz'] = value
+        values['setting_timestamp'] = value
     else:
-        kwargs['setting_text'] = value
-
-    setting, _ = await get_setting(setting_name)
-    success = True
-    if setting is None:
-        success = bool(await insert_row(TABLE_NAME_BOT_SETTINGS, 'setting_name', **kwargs))
-    elif setting != value:
-        kwargs['modified_at'] = _utils.datetime.get_utc_now()
-        success = await update_row(TABLE_NAME_BOT_SETTINGS, **kwargs)
+        values['setting_text'] = value
+
+    column_names = ', '.join(values.keys())
+    placeholders = ', '.join(f'${i}' for i in range(3, len(values) + 3))
+    update_columns = ', '.join(f'{column_name} = EXCLUDED.{column_name}' for column_name in values.keys())
+    current_values = ', '.join(f'{TABLE_NAME_BOT_SETTINGS}.{column_name}' for column_name in values.keys())
+    new_values = ', '.join(f'EXCLUDED.{column_name}' for column_name in values.keys())
+    query = (
+        f'INSERT INTO {TABLE_NAME_BOT_SETTINGS} (setting_name, modified_at, {column_names}) VALUES ($1, $2, {placeholders}) '
+        f'ON CONFLICT (setting_name) DO UPDATE SET modified_at = EXCLUDED.modified_at, {update_columns} '
+        f'WHERE ({current_values}) IS DISTINCT FROM ({new_values})'
+    )
+    args = [setting_name, utc_now or _utils.datetime.get_utc_now(), *values.values()]
+    success, _ = await try_execute(query, args)
     return success
 
 
+async def listen(channel_name: str, callback: _Callable[[_asyncpg.Connection, int, str, str], None], termination_callback: _Callable[[_asyncpg.Connection], None] = None) -> _asyncpg.Connection:
+    """
+    Opens a dedicated connection, that is not part of the connection pool, and subscribes to notifications on the given channel. The connection must be closed by the caller.
+    """
+    __log_db_function_enter('listen', channel_name=f'\'{channel_name}\'')
+
+    connection: _asyncpg.Connection = await _asyncpg.connect(dsn=_model_settings.DATABASE_URL)
+    if termination_callback:
+        connection.add_termination_listener(termination_callback)
+    await connection.add_listener(channel_name, callback)
+    return connection
+
+
 def print_db_query_error(function_name: str, query: str, args: _List[_Any], error: _asyncpg.exceptions.PostgresError) -> None:
     if args:
         args = f'\n{args}'
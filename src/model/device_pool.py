@@ -0,0 +1,237 @@
+from collections import deque as _deque
+from datetime import datetime as _datetime
+from datetime import timedelta as _timedelta
+from typing import Any as _Any
+from typing import Deque as _Deque
+from typing import Dict as _Dict
+from typing import List as _List
+from typing import Optional as _Optional
+from typing import Tuple as _Tuple
+
+import pssapi as _pssapi
+
+from .. import utils as _utils
+
+
+
+# ---------- Constants ----------
+
+DEVICE_ERROR_MESSAGE_PARTS: tuple = (
+    'access token',
+    'authoriz',
+    'too many',
+    'rate limit',
+    'banned',
+    'blocked',
+)
+
+RECENT_ERROR_COUNT: int = 5
+SUCCESS_RATE_WEIGHT: float = 0.2
+"""Weight of the latest request in the moving averages of success rate and latency"""
+
+
+
+
+
+# ---------- Classes ----------
+
+class DeviceHealth():
+    """
+    Moving averages of success rate and latency and the recent errors of a login device.
+    """
+    def __init__(self, device_id: _Optional[str]) -> None:
+        self.device_id: _Optional[str] = device_id
+        self.success_rate: float = 1.0
+        self.latency: _Optional[float] = None
+        self.success_count: int = 0
+        self.failure_count: int = 0
+        self.consecutive_failure_count: int = 0
+        self.quarantine_count: int = 0
+        self.quarantined_until: _Optional[_datetime] = None
+        self.recent_errors: _Deque[_Tuple[_datetime, str]] = _deque(maxlen=RECENT_ERROR_COUNT)
+        self.last_used_at: _Optional[_datetime] = None
+
+
+    def is_quarantined(self, utc_now: _datetime) -> bool:
+        return self.quarantined_until is not None and utc_now < self.quarantined_until
+
+
+    def record(self, success: bool, latency: _Optional[float]) -> None:
+        self.success_rate += SUCCESS_RATE_WEIGHT * ((1.0 if success else 0.0) - self.success_rate)
+        if latency is not None:
+            self.latency = latency if self.latency is None else self.latency + SUCCESS_RATE_WEIGHT * (latency - self.latency)
+        self.last_used_at = _utils.datetime.get_utc_now()
+
+
+    def to_dict(self, utc_now: _datetime) -> _Dict[str, _Any]:
+        return {
+            'device': mask_device_id(self.device_id),
+            'success_rate': self.success_rate,
+            'latency': self.latency,
+            'success_count': self.success_count,
+            'failure_count': self.failure_count,
+            'consecutive_failure_count': self.consecutive_failure_count,
+            'quarantine_count': self.quarantine_count,
+            'quarantined_until': self.quarantined_until.isoformat() if self.is_quarantined(utc_now) else None,
+            'recent_errors': [(occurred_at.isoformat(), error) for occurred_at, error in self.recent_errors],
+            'last_used_at': self.last_used_at.isoformat() if self.last_used_at else None,
+        }
+
+
+class DevicePool():
+    """
+    Chooses the device to log in to the PSS API with. The current device is kept as long as it's healthy, so that access tokens don't get replaced needlessly. Devices failing to log in or failing `failure_threshold` requests in a row get quarantined for `quarantine_duration` seconds, doubling with every further quarantine up to `max_quarantine_duration`. Then the healthiest device gets used instead. If all devices are quarantined, the one released first keeps getting used.
+    """
+    def __init__(self, device_ids: _List[_Optional[str]], failure_threshold: int, quarantine_duration: float, max_quarantine_duration: float) -> None:
+        self.__devices: _Dict[_Optional[str], DeviceHealth] = {device_id: DeviceHealth(device_id) for device_id in (device_ids or [None])}
+        self.__failure_threshold: int = max(failure_threshold, 1)
+        self.__quarantine_duration: float = quarantine_duration
+        self.__max_quarantine_duration: float = max_quarantine_duration
+        self.__current_device_id: _Optional[str] = None
+        self.__has_current_device: bool = False
+
+
+    @property
+    def current_device_id(self) -> _Optional[str]:
+        return self.__current_device_id
+
+
+    @property
+    def device_count(self) -> int:
+        return len(self.__devices)
+
+
+    @property
+    def device_ids(self) -> _List[_Optional[str]]:
+        return list(self.__devices.keys())
+
+
+    def get_device_id(self) -> _Optional[str]:
+        """
+        Returns the device to be used for logging in.
+        """
+        utc_now = _utils.datetime.get_utc_now()
+        if not self.__has_current_device or self.__devices[self.__current_device_id].is_quarantined(utc_now):
+            self.__current_device_id = self.__select_device(utc_now)
+            self.__has_current_device = True
+        return self.__current_device_id
+
+
+    def get_quarantined_until(self, device_id: _Optional[str]) -> _Optional[_datetime]:
+        """
+        Returns the end of the quarantine of a device or `None`, if it's not quarantined.
+        """
+        device = self.__devices.get(device_id)
+        if device is None or not device.is_quarantined(_utils.datetime.get_utc_now()):
+            return None
+        return device.quarantined_until
+
+
+    def has_available_device(self) -> bool:
+        utc_now = _utils.datetime.get_utc_now()
+        return any(not device.is_quarantined(utc_now) for device in self.__devices.values())
+
+
+    def record_success(self, device_id: _Optional[str], latency: _Optional[float] = None) -> None:
+        device = self.__devices.get(device_id)
+        if device is None:
+            return
+        device.record(True, latency)
+        device.success_count += 1
+        device.consecutive_failure_count = 0
+        device.quarantine_count = 0
+        device.quarantined_until = None
+
+
+    def record_failure(self, device_id: _Optional[str], error: Exception, latency: _Optional[float] = None, quarantine: bool = False) -> None:
+        """
+        Records a failed request. The device gets quarantined, if `quarantine` is set or if it failed too many requests in a row.
+        """
+        device = self.__devices.get(device_id)
+        if device is None:
+            return
+        utc_now = _utils.datetime.get_utc_now()
+        device.record(False, latency)
+        device.failure_count += 1
+        device.consecutive_failure_count += 1
+        device.recent_errors.append((utc_now, f'{error.__class__.__name__}: {_get_error_message(error)}'))
+        if (quarantine or device.consecutive_failure_count >= self.__failure_threshold) and not device.is_quarantined(utc_now):
+            device.quarantine_count += 1
+            quarantine_duration = min(self.__quarantine_duration * 2 ** (device.quarantine_count - 1), self.__max_quarantine_duration)
+            device.quarantined_until = utc_now + _timedelta(seconds=quarantine_duration)
+            print(f'[DevicePool] Quarantined device {mask_device_id(device_id)} for {quarantine_duration:.0f} seconds ({device.consecutive_failure_count} failures in a row).')
+
+
+    def release(self, device_id: _Optional[str]) -> bool:
+        """
+        Lifts the quarantine of a device and resets its failure counters. Returns `False`, if the device isn't part of the pool.
+        """
+        device = self.__devices.get(device_id)
+        if device is None:
+            return False
+        device.success_rate = 1.0
+        device.consecutive_failure_count = 0
+        device.quarantine_count = 0
+        device.quarantined_until = None
+        return True
+
+
+    def snapshot(self) -> _List[_Dict[str, _Any]]:
+        """
+        Returns the state of all devices as JSON serializable dicts, healthiest first. Devices are numbered in the configured order, their IDs are masked.
+        """
+        utc_now = _utils.datetime.get_utc_now()
+        device_numbers = {device_id: number for number, device_id in enumerate(self.__devices.keys(), 1)}
+        result = []
+        for device in self.__get_ranked_devices(utc_now):
+            device_info = device.to_dict(utc_now)
+            device_info['number'] = device_numbers[device.device_id]
+            device_info['is_current'] = self.__has_current_device and device.device_id == self.__current_device_id
+            result.append(device_info)
+        return result
+
+
+    def __get_ranked_devices(self, utc_now: _datetime) -> _List[DeviceHealth]:
+        # Without any history, prefer the device the hour of day rotates to, like before, so that the load is spread across all devices
+        device_ids = list(self.__devices.keys())
+        rotation_start = int(utc_now.hour / (24 / len(device_ids)))
+        rotation = {device_id: (index - rotation_start) % len(device_ids) for index, device_id in enumerate(device_ids)}
+        return sorted(
+            self.__devices.values(),
+            key=lambda device: (
+                device.is_quarantined(utc_now),
+                device.quarantined_until if device.is_quarantined(utc_now) else utc_now,
+                -round(device.success_rate, 2),
+                device.latency if device.latency is not None else 0.0,
+                rotation[device.device_id],
+            ),
+        )
+
+
+    def __select_device(self, utc_now: _datetime) -> _Optional[str]:
+        return self.__get_ranked_devices(utc_now)[0].device_id
+
+
+
+
+
+# ---------- Functions ----------
+
+def is_device_error(error: Exception) -> bool:
+    """
+    Returns `True`, if the error indicates a problem with the login device rather than with the request, like a rejected access token or rate limiting.
+    """
+    if isinstance(error, _pssapi.utils.exceptions.ServerMaintenanceError):
+        return False
+    message = _get_error_message(error).lower()
+    return any(part in message for part in DEVICE_ERROR_MESSAGE_PARTS)
+
+
+def mask_device_id(device_id: _Optional[str]) -> str:
+    if not device_id:
+        return '-'
+    return f'{device_id[:4]}…{device_id[-2:]}' if len(device_id) > 8 else f'{device_id[:2]}…'
+
+
+def _get_error_message(error: Exception) -> str:
+    return str(getattr(error, 'message', None) or error)
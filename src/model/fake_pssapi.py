@@ -0,0 +1,326 @@
+import asyncio as _asyncio
+from collections import deque as _deque
+from datetime import datetime as _datetime
+from datetime import timedelta as _timedelta
+import hashlib as _hashlib
+import random as _random
+import time as _time
+from typing import Deque as _Deque
+from typing import Dict as _Dict
+from typing import List as _List
+from typing import Optional as _Optional
+from typing import Tuple as _Tuple
+from uuid import uuid4 as _uuid4
+
+import pssapi as _pssapi
+
+from . import settings as _settings
+from .. import utils as _utils
+
+
+
+# ---------- Constants ----------
+
+FAKE_PRODUCTION_SERVER: str = 'http://fake-pssapi.localhost/'
+
+MESSAGE_PAGE_SIZE: int = 100
+"""Number of messages returned per channel key at most, like the PSS API does"""
+
+_ALLIANCE_NAME_PARTS: _List[str] = ['Star', 'Void', 'Nova', 'Iron', 'Pixel', 'Dark', 'Solar', 'Lunar', 'Crimson', 'Astro']
+_ALLIANCE_NAME_SUFFIXES: _List[str] = ['Fleet', 'Armada', 'Legion', 'Raiders', 'Guard', 'Corps', 'Union', 'Order']
+_MESSAGE_WORDS: _List[str] = [
+    'anyone', 'up', 'for', 'a', 'tourney', 'war', 'fleet', 'recruiting', 'looking', 'gg', 'lol', 'need', 'help',
+    'with', 'my', 'ship', 'crew', 'legendary', 'starbux', 'dove', 'stardust', 'trophies', 'pvp', 'rooms', 'thanks',
+]
+
+
+
+
+
+# ---------- Classes ----------
+
+class FakePssApiClient():
+    """
+    Local stand-in for `pssapi.PssApiClient` serving synthetic message streams, alliances and logins. Only the parts of the API used by the bot are available. Requests take `latency` seconds on average, fail with a `PssApiError` at the given `error_rate` and fail with a `ServerMaintenanceError` during the last `maintenance_duration` seconds of every `maintenance_interval` seconds.
+    """
+    def __init__(self,
+                 device_type: _pssapi.enums.DeviceType = None,
+                 language_key: _pssapi.enums.LanguageKey = None,
+                 production_server: str = None,
+                 latency: float = 0.0,
+                 error_rate: float = 0.0,
+                 maintenance_interval: float = 0.0,
+                 maintenance_duration: float = 0.0,
+                 messages_per_minute: float = 30.0,
+                 alliance_count: int = 500,
+                 access_token_lifetime: float = 3600.0,
+                 seed: _Optional[int] = None,
+    ) -> None:
+        self.__device_type: _pssapi.enums.DeviceType = device_type or _pssapi.enums.DeviceType.ANDROID
+        self.__language_key: _pssapi.enums.LanguageKey = language_key or _pssapi.enums.LanguageKey.ENGLISH
+        self.__production_server: str = production_server or FAKE_PRODUCTION_SERVER
+        self.__latency: float = latency
+        self.__error_rate: float = error_rate
+        self.__maintenance_interval: float = maintenance_interval
+        self.__maintenance_duration: float = maintenance_duration
+        self.__access_token_lifetime: _timedelta = _timedelta(seconds=access_token_lifetime)
+        self.__random: _random.Random = _random.Random(seed)
+        self.__started_at: float = _time.monotonic()
+        self.__access_tokens: _Dict[str, _datetime] = {}
+        self.__request_count: int = 0
+
+        self.__alliance_service: FakeAllianceService = FakeAllianceService(self, alliance_count)
+        self.__message_service: FakeMessageService = FakeMessageService(self, messages_per_minute)
+        self.__user_service: FakeUserService = FakeUserService(self)
+
+
+    @property
+    def alliance_service(self) -> 'FakeAllianceService':
+        return self.__alliance_service
+
+    @property
+    def device_type(self) -> _pssapi.enums.DeviceType:
+        return self.__device_type
+
+    @property
+    def language_key(self) -> _pssapi.enums.LanguageKey:
+        return self.__language_key
+
+    @property
+    def message_service(self) -> 'FakeMessageService':
+        return self.__message_service
+
+    @property
+    def production_server(self) -> str:
+        return self.__production_server
+
+    @property
+    def random(self) -> _random.Random:
+        return self.__random
+
+    @property
+    def request_count(self) -> int:
+        return self.__request_count
+
+    @property
+    def user_service(self) -> 'FakeUserService':
+        return self.__user_service
+
+
+    def is_under_maintenance(self) -> bool:
+        if self.__maintenance_interval <= 0 or self.__maintenance_duration <= 0:
+            return False
+        elapsed = (_time.monotonic() - self.__started_at) % self.__maintenance_interval
+        return elapsed >= self.__maintenance_interval - self.__maintenance_duration
+
+
+    def create_access_token(self) -> str:
+        access_token = _uuid4().hex
+        self.__access_tokens[access_token] = _utils.datetime.get_utc_now() + self.__access_token_lifetime
+        return access_token
+
+
+    async def request(self, access_token: _Optional[str] = None, authorize: bool = True) -> None:
+        """
+        Simulates the round trip of a request. Raises the errors the PSS API would raise.
+        """
+        self.__request_count += 1
+        if self.__latency > 0:
+            await _asyncio.sleep(self.__latency * self.__random.uniform(0.5, 1.5))
+        if self.is_under_maintenance():
+            raise _pssapi.utils.exceptions.ServerMaintenanceError('The server is currently under maintenance. Please try again later.')
+        if self.__error_rate > 0 and self.__random.random() < self.__error_rate:
+            raise _pssapi.utils.exceptions.PssApiError('Simulated server error.')
+        if authorize:
+            expires_at = self.__access_tokens.get(access_token)
+            if expires_at is None or expires_at <= _utils.datetime.get_utc_now():
+                self.__access_tokens.pop(access_token, None)
+                raise _pssapi.utils.exceptions.PssApiError('Failed to authorize access token.')
+
+
+class FakeAllianceService():
+    """
+    Serves a fixed set of synthetic alliances, whose trophies change a little with every request.
+    """
+    def __init__(self, client: FakePssApiClient, alliance_count: int) -> None:
+        self.__client: FakePssApiClient = client
+        self.__alliances: _List[_Dict[str, str]] = []
+        self.__members: _Dict[str, _List[_Dict[str, str]]] = {}
+        for i in range(alliance_count):
+            name = f'{_ALLIANCE_NAME_PARTS[i % len(_ALLIANCE_NAME_PARTS)]} {_ALLIANCE_NAME_SUFFIXES[(i // len(_ALLIANCE_NAME_PARTS)) % len(_ALLIANCE_NAME_SUFFIXES)]}'
+            if i >= len(_ALLIANCE_NAME_PARTS) * len(_ALLIANCE_NAME_SUFFIXES):
+                name = f'{name} {i // (len(_ALLIANCE_NAME_PARTS) * len(_ALLIANCE_NAME_SUFFIXES)) + 1}'
+            self.__alliances.append({
+                'AllianceId': str(1000 + i),
+                'AllianceName': name,
+                'NumberOfMembers': str(client.random.randint(1, 100)),
+                'Score': str(client.random.randint(0, 3000)),
+                'Trophy': str(client.random.randint(0, 200000)),
+            })
+        self.__rank()
+
+
+    async def get_alliance(self, access_token: str, alliance_id: int) -> _pssapi.entities.Alliance:
+        await self.__client.request(access_token)
+        self.__drift()
+        for alliance_info in self.__alliances:
+            if alliance_info['AllianceId'] == str(alliance_id):
+                return _pssapi.entities.Alliance(dict(alliance_info))
+        raise _pssapi.utils.exceptions.PssApiError('Alliance not found.')
+
+
+    async def list_users(self, access_token: str, alliance_id: int, skip: int, take: int) -> _Tuple[_List[_pssapi.entities.Message], _List[_pssapi.entities.User]]:
+        await self.__client.request(access_token)
+        alliance_info = next((alliance_info for alliance_info in self.__alliances if alliance_info['AllianceId'] == str(alliance_id)), None)
+        if alliance_info is None:
+            raise _pssapi.utils.exceptions.PssApiError('Alliance not found.')
+        member_infos = self.__get_members(alliance_info)
+        return ([], [_pssapi.entities.User(dict(member_info)) for member_info in member_infos[skip:skip + take]])
+
+
+    async def search_alliances(self, access_token: str, name: str, skip: int, take: int) -> _List[_pssapi.entities.Alliance]:
+        await self.__client.request(access_token)
+        self.__drift()
+        name = (name or '').lower()
+        alliance_infos = [alliance_info for alliance_info in self.__alliances if name in alliance_info['AllianceName'].lower()]
+        return [_pssapi.entities.Alliance(dict(alliance_info)) for alliance_info in alliance_infos[skip:skip + take]]
+
+
+    def __get_members(self, alliance_info: _Dict[str, str]) -> _List[_Dict[str, str]]:
+        # Members get created on first request and their stats grow a little with every further request
+        alliance_id = alliance_info['AllianceId']
+        random = self.__client.random
+        if alliance_id not in self.__members:
+            self.__members[alliance_id] = [
+                {
+                    'Id': str(int(alliance_id) * 1000 + i),
+                    'Name': f'{random.choice(_MESSAGE_WORDS).capitalize()}{random.randint(1, 999)}',
+                    'AllianceId': alliance_id,
+                    'AllianceName': alliance_info['AllianceName'],
+                    'Trophy': str(random.randint(0, 6000)),
+                    'AllianceScore': str(random.randint(0, 100)),
+                    'CrewDonated': str(random.randint(0, 500)),
+                    'CrewReceived': str(random.randint(0, 500)),
+                    'PVPAttackWins': str(random.randint(0, 5000)),
+                    'PVPDefenceWins': str(random.randint(0, 2000)),
+                }
+                for i in range(int(alliance_info['NumberOfMembers']))
+            ]
+        else:
+            for member_info in self.__members[alliance_id]:
+                member_info['Trophy'] = str(max(int(member_info['Trophy']) + random.randint(-20, 30), 0))
+                member_info['PVPAttackWins'] = str(int(member_info['PVPAttackWins']) + random.randint(0, 3))
+                member_info['PVPDefenceWins'] = str(int(member_info['PVPDefenceWins']) + random.randint(0, 1))
+                member_info['CrewDonated'] = str(int(member_info['CrewDonated']) + random.randint(0, 1))
+        return self.__members[alliance_id]
+
+
+    def __drift(self) -> None:
+        for alliance_info in self.__client.random.sample(self.__alliances, min(10, len(self.__alliances))):
+            alliance_info['Trophy'] = str(max(int(alliance_info['Trophy']) + self.__client.random.randint(-50, 100), 0))
+        self.__rank()
+
+
+    def __rank(self) -> None:
+        self.__alliances.sort(key=lambda alliance_info: -int(alliance_info['Trophy']))
+        for ranking, alliance_info in enumerate(self.__alliances, 1):
+            alliance_info['Ranking'] = str(ranking)
+
+
+class FakeMessageService():
+    """
+    Serves a synthetic message stream per channel key. New messages are generated on request at `messages_per_minute`, with message IDs increasing across all channel keys.
+    """
+    def __init__(self, client: FakePssApiClient, messages_per_minute: float) -> None:
+        self.__client: FakePssApiClient = client
+        self.__messages_per_minute: float = messages_per_minute
+        self.__last_message_id: int = 0
+        self.__messages: _Dict[str, _Deque[_pssapi.entities.Message]] = {}
+        self.__pending_message_counts: _Dict[str, float] = {}
+        self.__last_requested_at: _Dict[str, float] = {}
+
+
+    async def list_messages_for_channel_key(self, access_token: str, channel_key: str) -> _List[_pssapi.entities.Message]:
+        await self.__client.request(access_token)
+        now = _time.monotonic()
+        if channel_key not in self.__messages:
+            self.__messages[channel_key] = _deque(maxlen=MESSAGE_PAGE_SIZE)
+            self.__pending_message_counts[channel_key] = float(MESSAGE_PAGE_SIZE)
+        else:
+            self.__pending_message_counts[channel_key] += (now - self.__last_requested_at[channel_key]) * self.__messages_per_minute / 60
+        self.__last_requested_at[channel_key] = now
+
+        message_count = int(self.__pending_message_counts[channel_key])
+        self.__pending_message_counts[channel_key] -= message_count
+        # Messages that would drop off the page right away don't need to be created
+        self.__last_message_id += max(message_count - MESSAGE_PAGE_SIZE, 0)
+        utc_now = _utils.datetime.get_utc_now()
+        for i in range(min(message_count, MESSAGE_PAGE_SIZE), 0, -1):
+            self.__messages[channel_key].append(self.__create_message(channel_key, utc_now - _timedelta(seconds=i)))
+        return list(self.__messages[channel_key])
+
+
+    def __create_message(self, channel_key: str, message_date: _datetime) -> _pssapi.entities.Message:
+        random = self.__client.random
+        self.__last_message_id += 1
+        user_id = random.randint(1, 5000)
+        alliance_id = random.choice((0, random.randint(1000, 1099)))
+        return _pssapi.entities.Message({
+            'AllianceId': str(alliance_id),
+            'AllianceName': f'Fleet {alliance_id}' if alliance_id else '',
+            'ChannelKey': channel_key,
+            'Message': ' '.join(random.choices(_MESSAGE_WORDS, k=random.randint(1, 20))),
+            'MessageDate': _pssapi.utils.datetime.convert_to_pss_timestamp(message_date),
+            'MessageId': str(self.__last_message_id),
+            'UserId': str(user_id),
+            'UserName': f'Player{user_id}',
+        })
+
+
+class FakeUserService():
+    """
+    Accepts every device login and hands out access tokens, which expire after the configured lifetime.
+    """
+    def __init__(self, client: FakePssApiClient) -> None:
+        self.__client: FakePssApiClient = client
+        self.__utils: FakeUserServiceUtils = FakeUserServiceUtils()
+
+
+    @property
+    def utils(self) -> 'FakeUserServiceUtils':
+        return self.__utils
+
+
+    async def device_login_11(self, checksum: str, client_date_time: _datetime, device_key: str, device_type: _pssapi.enums.DeviceType, language_key: _pssapi.enums.LanguageKey, *args, **kwargs) -> _pssapi.entities.UserLogin:
+        await self.__client.request(authorize=False)
+        return _pssapi.entities.UserLogin({
+            'accessToken': self.__client.create_access_token(),
+            'UserId': str(abs(hash(device_key)) % 10000000),
+        })
+
+
+class FakeUserServiceUtils():
+    @staticmethod
+    def create_device_login_checksum(device_key: str, device_type: _pssapi.enums.DeviceType, client_datetime: _datetime, checksum_key: str) -> str:
+        return _hashlib.md5(f'{device_key}{client_datetime}{device_type}{checksum_key}'.encode('utf-8')).hexdigest()
+
+
+
+
+
+# ---------- Functions ----------
+
+def create_client_from_settings(device_type: _pssapi.enums.DeviceType = None, language_key: _pssapi.enums.LanguageKey = None, production_server: str = None) -> FakePssApiClient:
+    return FakePssApiClient(
+        device_type=device_type,
+        language_key=language_key,
+        production_server=production_server,
+        latency=_settings.PSS_API_FAKE_LATENCY,
+        error_rate=_settings.PSS_API_FAKE_ERROR_RATE,
+        maintenance_interval=_settings.PSS_API_FAKE_MAINTENANCE_INTERVAL,
+        maintenance_duration=_settings.PSS_API_FAKE_MAINTENANCE_DURATION,
+        messages_per_minute=_settings.PSS_API_FAKE_MESSAGES_PER_MINUTE,
+        alliance_count=_settings.PSS_API_FAKE_ALLIANCE_COUNT,
+        access_token_lifetime=_settings.PSS_ACCESS_TOKEN_LIFETIME,
+        seed=_settings.PSS_API_FAKE_SEED,
+    )
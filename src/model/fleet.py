@@ -1,3 +1,5 @@
+import asyncio as _asyncio
+from typing import Dict as _Dict
 from typing import Iterable as _Iterable
 from typing import List as _List
 from typing import Optional as _Optional
@@ -9,6 +11,8 @@ from discord.ext.commands import Context as _Context
 import sqlalchemy as _db
 import pssapi as _pssapi
 
+from . import alliance_cache as _alliance_cache
+from . import database as _database
 from . import orm as _orm
 from .. import utils as _utils
 
@@ -33,10 +37,51 @@ class Fleet(_orm.ModelBase):
     def alliance(self) -> _pssapi.entities.Alliance:
         return self.__alliance
     
-    async def get_fleet(self, pss_api_client: _pssapi.PssApiClient, access_token: str) -> _pssapi.entities.Alliance:
-        self.__alliance = await pss_api_client.alliance_service.get_alliance(access_token, self.id)
+    async def get_fleet(self, alliance_cache: _alliance_cache.AllianceCache) -> _pssapi.entities.Alliance:
+        self.__alliance = await alliance_cache.get_alliance(self.id)
         return self.__alliance
     
+    @classmethod
+    async def get_fleets(cls, fleets: _Iterable['Fleet'], alliance_cache: _alliance_cache.AllianceCache, max_concurrent_requests: int, timeout: float) -> _Dict[int, Exception]:
+        """
+        Retrieves the alliances of the fleets concurrently, `max_concurrent_requests` at a time. Every alliance is only requested once, even if several fleets refer to it. Returns the errors by alliance ID for the alliances that could not be retrieved within `timeout` seconds.
+        """
+        fleets_by_alliance_id: _Dict[int, _List[Fleet]] = {}
+        for fleet in fleets:
+            fleets_by_alliance_id.setdefault(fleet.id, []).append(fleet)
+        semaphore = _asyncio.Semaphore(max(max_concurrent_requests, 1))
+
+        async def get_alliance(alliance_id: int) -> _pssapi.entities.Alliance:
+            async with semaphore:
+                return await _asyncio.wait_for(alliance_cache.get_alliance(alliance_id), timeout)
+
+        alliance_ids = list(fleets_by_alliance_id.keys())
+        results = await _asyncio.gather(*[get_alliance(alliance_id) for alliance_id in alliance_ids], return_exceptions=True)
+        errors: _Dict[int, Exception] = {}
+        for alliance_id, result in zip(alliance_ids, results):
+            if isinstance(result, Exception):
+                errors[alliance_id] = result
+            else:
+                for fleet in fleets_by_alliance_id[alliance_id]:
+                    fleet.__alliance = result
+        return errors
+    
+    @classmethod
+    async def update_fleet_names(cls, fleets: _Iterable['Fleet']) -> bool:
+        """
+        Writes the names of the fleets to the database in a single statement.
+        """
+        fleets = list(fleets)
+        if not fleets:
+            return True
+        query = (
+            f'UPDATE {cls.TABLE_NAME} AS f SET fleet_name = c.fleet_name, modified_at = CURRENT_TIMESTAMP '
+            f'FROM unnest($1::bigint[], $2::text[]) AS c({cls.ID_COLUMN_NAME}, fleet_name) '
+            f'WHERE f.{cls.ID_COLUMN_NAME} = c.{cls.ID_COLUMN_NAME}'
+        )
+        success, _ = await _database.try_execute(query, [[fleet.id for fleet in fleets], [fleet.fleet_name for fleet in fleets]])
+        return success
+    
     @classmethod
     def get_alliance_search_description(cls, alliance: _pssapi.entities.Alliance) -> str:
         return f'{alliance.alliance_name} (ID: {alliance.id}, rank {alliance.ranking} at {alliance.trophy} 🏆)'
@@ -0,0 +1,391 @@
+import asyncio as _asyncio
+from datetime import datetime as _datetime
+from datetime import timedelta as _timedelta
+from datetime import timezone as _timezone
+from typing import Any as _Any
+from typing import Awaitable as _Awaitable
+from typing import Callable as _Callable
+from typing import Dict as _Dict
+from typing import Iterable as _Iterable
+from typing import List as _List
+from typing import Optional as _Optional
+from typing import Set as _Set
+from typing import Tuple as _Tuple
+
+import asyncpg as _asyncpg
+import pssapi as _pssapi
+
+from . import database as _database
+from . import fleet as _fleet
+from . import fleet_rollup as _fleet_rollup
+from .. import utils as _utils
+
+
+
+# ---------- Constants ----------
+
+TABLE_NAME_FLEET_SNAPSHOT: str = 'fleet_snapshot'
+TABLE_NAME_FLEET_SNAPSHOT_LATEST: str = 'fleet_snapshot_latest'
+TABLE_NAME_MEMBER_SNAPSHOT: str = 'fleet_member_snapshot'
+TABLE_NAME_MEMBER_SNAPSHOT_LATEST: str = 'fleet_member_snapshot_latest'
+
+FLEET_VALUE_NAMES: _Tuple[str, ...] = ('trophy', 'ranking', 'member_count', 'score')
+MEMBER_VALUE_NAMES: _Tuple[str, ...] = ('trophy', 'alliance_score', 'crew_donated', 'crew_received', 'pvp_attack_wins', 'pvp_defence_wins')
+
+MEMBER_PAGE_SIZE: int = 100
+"""Number of members of an alliance requested at once. Alliances have 100 members at most."""
+
+__FLEET_VALUE_COLUMNS: str = ', '.join(f'{value_name} INTEGER NOT NULL' for value_name in FLEET_VALUE_NAMES)
+__MEMBER_VALUE_COLUMNS: str = ', '.join(f'{value_name} INTEGER NOT NULL' for value_name in MEMBER_VALUE_NAMES)
+
+QUERY_CREATE_TABLES: _List[str] = [
+    f'CREATE TABLE IF NOT EXISTS {TABLE_NAME_FLEET_SNAPSHOT} (alliance_id BIGINT NOT NULL, collected_at TIMESTAMPTZ NOT NULL, is_keyframe BOOLEAN NOT NULL, {__FLEET_VALUE_COLUMNS}, PRIMARY KEY (alliance_id, collected_at)) PARTITION BY RANGE (collected_at)',
+    f'CREATE TABLE IF NOT EXISTS {TABLE_NAME_MEMBER_SNAPSHOT} (alliance_id BIGINT NOT NULL, user_id BIGINT NOT NULL, collected_at TIMESTAMPTZ NOT NULL, is_keyframe BOOLEAN NOT NULL, {__MEMBER_VALUE_COLUMNS}, PRIMARY KEY (alliance_id, user_id, collected_at)) PARTITION BY RANGE (collected_at)',
+    f'CREATE TABLE IF NOT EXISTS {TABLE_NAME_FLEET_SNAPSHOT_LATEST} (alliance_id BIGINT PRIMARY KEY, collected_at TIMESTAMPTZ NOT NULL, alliance_name TEXT, {__FLEET_VALUE_COLUMNS})',
+    f'CREATE TABLE IF NOT EXISTS {TABLE_NAME_MEMBER_SNAPSHOT_LATEST} (alliance_id BIGINT NOT NULL, user_id BIGINT NOT NULL, collected_at TIMESTAMPTZ NOT NULL, user_name TEXT, {__MEMBER_VALUE_COLUMNS}, PRIMARY KEY (alliance_id, user_id))',
+]
+"""The snapshot tables are append-only and partitioned by month. Every row holds the differences to the previous snapshot of the same alliance or member, unless it's a keyframe holding the absolute values. The first snapshot of an alliance or member in every month is a keyframe, so that every partition can be read on its own and old partitions can be dropped. Members whose values didn't change since the previous snapshot get no row, apart from keyframes. The latest absolute values are kept in separate tables."""
+
+__ADVISORY_LOCK_KEY: int = 0x466c6565  # Serializes writers across bot processes
+__CREATED_PARTITIONS: _Set[str] = set()
+
+
+
+
+
+# ---------- Classes ----------
+
+class FleetSnapshot():
+    """
+    The state of an alliance and its members at a point in time, as retrieved from the PSS API.
+    """
+    def __init__(self, alliance: _pssapi.entities.Alliance, members: _Optional[_List[_pssapi.entities.User]]) -> None:
+        self.alliance_id: int = alliance.id
+        self.alliance_name: str = alliance.alliance_name
+        self.values: _Tuple[int, ...] = (alliance.trophy or 0, alliance.ranking or 0, alliance.number_of_members or 0, alliance.score or 0)
+        self.members: _Optional[_Dict[int, _Tuple[str, _Tuple[int, ...]]]] = None
+        if members is not None:
+            self.members = {
+                member.id: (member.name, tuple(getattr(member, value_name) or 0 for value_name in MEMBER_VALUE_NAMES))
+                for member in members
+                if member.id
+            }
+
+
+
+
+
+# ---------- Functions ----------
+
+async def fetch_snapshots(pssapi_call: _Callable[..., _Awaitable[_Any]], pssapi_client: _pssapi.PssApiClient, alliance_ids: _Iterable[int], max_concurrent_requests: int, timeout: float) -> _Tuple[_List[FleetSnapshot], _Dict[int, Exception]]:
+    """
+    Retrieves the current state of the alliances and their members from the PSS API, `max_concurrent_requests` alliances at a time and bypassing any cache. Alliances, whose members couldn't be retrieved, get snapshotted without members. Returns the snapshots and the errors by alliance ID for the alliances that could not be retrieved within `timeout` seconds.
+    """
+    semaphore = _asyncio.Semaphore(max(max_concurrent_requests, 1))
+
+    async def fetch_snapshot(alliance_id: int) -> FleetSnapshot:
+        async with semaphore:
+            alliance = await _asyncio.wait_for(pssapi_call(pssapi_client.alliance_service.get_alliance, alliance_id), timeout)
+            try:
+                _, members = await _asyncio.wait_for(pssapi_call(pssapi_client.alliance_service.list_users, alliance_id, 0, MEMBER_PAGE_SIZE), timeout)
+            except (_pssapi.utils.exceptions.PssApiError, _asyncio.TimeoutError) as error:
+                if isinstance(error, _pssapi.utils.exceptions.ServerMaintenanceError):
+                    raise
+                members = None
+            return FleetSnapshot(alliance, members)
+
+    alliance_ids = list(alliance_ids)
+    results = await _asyncio.gather(*[fetch_snapshot(alliance_id) for alliance_id in alliance_ids], return_exceptions=True)
+    snapshots: _List[FleetSnapshot] = []
+    errors: _Dict[int, Exception] = {}
+    for alliance_id, result in zip(alliance_ids, results):
+        if isinstance(result, Exception):
+            errors[alliance_id] = result
+        elif result.alliance_id:
+            snapshots.append(result)
+    return snapshots, errors
+
+
+async def get_collected_alliance_ids(collected_at: _datetime) -> _Set[int]:
+    """
+    Returns the IDs of the alliances that have already been snapshotted at or after the given time.
+    """
+    records = await _database.fetchall(f'SELECT alliance_id FROM {TABLE_NAME_FLEET_SNAPSHOT_LATEST} WHERE collected_at >= $1', [collected_at])
+    return {record[0] for record in (records or [])}
+
+
+async def store_snapshots(collected_at: _datetime, snapshots: _Iterable[FleetSnapshot]) -> int:
+    """
+    Appends delta encoded snapshots of the alliances and their members and updates the latest values. Members without changes are left out of the snapshots. Alliances that have already been snapshotted at or after `collected_at`, possibly by another process, are skipped. Returns the number of alliances stored or -1, if the database couldn't be written.
+    """
+    snapshots = {snapshot.alliance_id: snapshot for snapshot in snapshots}
+    if not snapshots:
+        return 0
+
+    fleet_value_names = ', '.join(FLEET_VALUE_NAMES)
+    member_value_names = ', '.join(MEMBER_VALUE_NAMES)
+    query_insert_fleets = (
+        f'INSERT INTO {TABLE_NAME_FLEET_SNAPSHOT} (alliance_id, collected_at, is_keyframe, {fleet_value_names}) '
+        f'SELECT r.alliance_id, $2, r.is_keyframe, {", ".join(f"r.{value_name}" for value_name in FLEET_VALUE_NAMES)} '
+        f'FROM unnest($1::bigint[], $3::boolean[], {", ".join(f"${i}::int[]" for i in range(4, 4 + len(FLEET_VALUE_NAMES)))}) AS r(alliance_id, is_keyframe, {fleet_value_names}) '
+        f'ON CONFLICT DO NOTHING'
+    )
+    query_upsert_latest_fleets = (
+        f'INSERT INTO {TABLE_NAME_FLEET_SNAPSHOT_LATEST} (alliance_id, collected_at, alliance_name, {fleet_value_names}) '
+        f'SELECT r.alliance_id, $2, r.alliance_name, {", ".join(f"r.{value_name}" for value_name in FLEET_VALUE_NAMES)} '
+        f'FROM unnest($1::bigint[], $3::text[], {", ".join(f"${i}::int[]" for i in range(4, 4 + len(FLEET_VALUE_NAMES)))}) AS r(alliance_id, alliance_name, {fleet_value_names}) '
+        f'ON CONFLICT (alliance_id) DO UPDATE SET collected_at = EXCLUDED.collected_at, alliance_name = EXCLUDED.alliance_name, '
+        + ', '.join(f'{value_name} = EXCLUDED.{value_name}' for value_name in FLEET_VALUE_NAMES)
+    )
+    query_insert_members = (
+        f'INSERT INTO {TABLE_NAME_MEMBER_SNAPSHOT} (alliance_id, user_id, collected_at, is_keyframe, {member_value_names}) '
+        f'SELECT r.alliance_id, r.user_id, $3, r.is_keyframe, {", ".join(f"r.{value_name}" for value_name in MEMBER_VALUE_NAMES)} '
+        f'FROM unnest($1::bigint[], $2::bigint[], $4::boolean[], {", ".join(f"${i}::int[]" for i in range(5, 5 + len(MEMBER_VALUE_NAMES)))}) AS r(alliance_id, user_id, is_keyframe, {member_value_names}) '
+        f'ON CONFLICT DO NOTHING'
+    )
+    query_delete_latest_members = f'DELETE FROM {TABLE_NAME_MEMBER_SNAPSHOT_LATEST} WHERE alliance_id = ANY($1)'
+    query_insert_latest_members = (
+        f'INSERT INTO {TABLE_NAME_MEMBER_SNAPSHOT_LATEST} (alliance_id, user_id, collected_at, user_name, {member_value_names}) '
+        f'SELECT r.alliance_id, r.user_id, $3, r.user_name, {", ".join(f"r.{value_name}" for value_name in MEMBER_VALUE_NAMES)} '
+        f'FROM unnest($1::bigint[], $2::bigint[], $4::text[], {", ".join(f"${i}::int[]" for i in range(5, 5 + len(MEMBER_VALUE_NAMES)))}) AS r(alliance_id, user_id, user_name, {member_value_names})'
+    )
+
+    try:
+        connection = await _database.acquire_connection()
+        try:
+            await _create_partitions(connection, [collected_at])
+            async with connection.transaction():
+                await connection.execute('SELECT pg_advisory_xact_lock($1)', __ADVISORY_LOCK_KEY)
+                latest_fleets = {
+                    record['alliance_id']: record
+                    for record in await connection.fetch(f'SELECT * FROM {TABLE_NAME_FLEET_SNAPSHOT_LATEST} WHERE alliance_id = ANY($1)', list(snapshots.keys()))
+                }
+                snapshots = {
+                    alliance_id: snapshot
+                    for alliance_id, snapshot in snapshots.items()
+                    if alliance_id not in latest_fleets or latest_fleets[alliance_id]['collected_at'] < collected_at
+                }
+                if not snapshots:
+                    return 0
+
+                fleet_rows = []
+                for alliance_id, snapshot in snapshots.items():
+                    is_keyframe, values = _encode(latest_fleets.get(alliance_id), FLEET_VALUE_NAMES, snapshot.values, collected_at)
+                    fleet_rows.append((alliance_id, is_keyframe, snapshot.alliance_name, snapshot.values, values))
+                await connection.execute(
+                    query_insert_fleets,
+                    [row[0] for row in fleet_rows],
+                    collected_at,
+                    [row[1] for row in fleet_rows],
+                    *[[row[4][i] for row in fleet_rows] for i in range(len(FLEET_VALUE_NAMES))],
+                )
+                await _fleet_rollup.update_rollups(
+                    connection,
+                    collected_at,
+                    [(row[0], _get_values(latest_fleets.get(row[0]), FLEET_VALUE_NAMES), row[3]) for row in fleet_rows],
+                )
+                await connection.execute(
+                    query_upsert_latest_fleets,
+                    [row[0] for row in fleet_rows],
+                    collected_at,
+                    [row[2] for row in fleet_rows],
+                    *[[row[3][i] for row in fleet_rows] for i in range(len(FLEET_VALUE_NAMES))],
+                )
+
+                # Members are only replaced for alliances, whose members could be retrieved
+                member_alliance_ids = [alliance_id for alliance_id, snapshot in snapshots.items() if snapshot.members is not None]
+                if member_alliance_ids:
+                    latest_members = {
+                        (record['alliance_id'], record['user_id']): record
+                        for record in await connection.fetch(f'SELECT * FROM {TABLE_NAME_MEMBER_SNAPSHOT_LATEST} WHERE alliance_id = ANY($1)', member_alliance_ids)
+                    }
+                    member_rows = []
+                    for alliance_id in member_alliance_ids:
+                        for user_id, (user_name, member_values) in snapshots[alliance_id].members.items():
+                            is_keyframe, values = _encode(latest_members.get((alliance_id, user_id)), MEMBER_VALUE_NAMES, member_values, collected_at)
+                            member_rows.append((alliance_id, user_id, is_keyframe, user_name, member_values, values))
+                    changed_member_rows = [row for row in member_rows if row[2] or any(row[5])]
+                    if changed_member_rows:
+                        await connection.execute(
+                            query_insert_members,
+                            [row[0] for row in changed_member_rows],
+                            [row[1] for row in changed_member_rows],
+                            collected_at,
+                            [row[2] for row in changed_member_rows],
+                            *[[row[5][i] for row in changed_member_rows] for i in range(len(MEMBER_VALUE_NAMES))],
+                        )
+                    await connection.execute(query_delete_latest_members, member_alliance_ids)
+                    await connection.execute(
+                        query_insert_latest_members,
+                        [row[0] for row in member_rows],
+                        [row[1] for row in member_rows],
+                        collected_at,
+                        [row[3] for row in member_rows],
+                        *[[row[4][i] for row in member_rows] for i in range(len(MEMBER_VALUE_NAMES))],
+                    )
+        finally:
+            await _database.release_connection(connection)
+    except (_asyncpg.PostgresError, OSError, ConnectionError) as error:
+        _database.print_db_query_error('store_snapshots', query_insert_fleets, None, error)
+        return -1
+    return len(snapshots)
+
+
+async def get_latest(alliance_ids: _Iterable[int]) -> _Dict[int, _asyncpg.Record]:
+    """
+    Returns the latest snapshotted values of the alliances by alliance ID.
+    """
+    records = await _database.fetchall(f'SELECT * FROM {TABLE_NAME_FLEET_SNAPSHOT_LATEST} WHERE alliance_id = ANY($1)', [list(alliance_ids)])
+    return {record['alliance_id']: record for record in (records or [])}
+
+
+async def get_fleet_history(alliance_id: int, since: _datetime, until: _datetime = None) -> _List[_asyncpg.Record]:
+    """
+    Returns the decoded snapshots of an alliance between `since` and `until`, oldest first.
+    """
+    query = _get_decode_query(TABLE_NAME_FLEET_SNAPSHOT, ['alliance_id'], FLEET_VALUE_NAMES)
+    return await _database.fetchall(query, [[alliance_id], _get_month_start(since), since, until or _get_far_future()]) or []
+
+
+async def get_member_history(alliance_id: int, since: _datetime, until: _datetime = None) -> _List[_asyncpg.Record]:
+    """
+    Returns the decoded snapshots of the members of an alliance between `since` and `until`, ordered by member and then oldest first. Since members without changes get no snapshot, the last snapshot of every member before `since` is returned, too.
+    """
+    query = _get_decode_query(TABLE_NAME_MEMBER_SNAPSHOT, ['alliance_id', 'user_id'], MEMBER_VALUE_NAMES, include_previous=True)
+    return await _database.fetchall(query, [[alliance_id], _get_month_start(since), since, until or _get_far_future()]) or []
+
+
+async def get_latest_members(alliance_id: int) -> _Dict[int, _asyncpg.Record]:
+    """
+    Returns the latest snapshotted values of the current members of an alliance by user ID.
+    """
+    records = await _database.fetchall(f'SELECT * FROM {TABLE_NAME_MEMBER_SNAPSHOT_LATEST} WHERE alliance_id = $1', [alliance_id])
+    return {record['user_id']: record for record in (records or [])}
+
+
+async def drop_expired_partitions(retention: _timedelta) -> _List[str]:
+    """
+    Drops the monthly partitions of the snapshot tables that only hold snapshots older than `retention`. Returns the names of the dropped partitions.
+    """
+    cutoff = _get_month_start(_utils.datetime.get_utc_now() - retention)
+    query = (
+        'SELECT child.relname FROM pg_inherits i '
+        'JOIN pg_class parent ON parent.oid = i.inhparent JOIN pg_class child ON child.oid = i.inhrelid '
+        'WHERE parent.relname = ANY($1)'
+    )
+    records = await _database.fetchall(query, [[TABLE_NAME_FLEET_SNAPSHOT, TABLE_NAME_MEMBER_SNAPSHOT]]) or []
+    result = []
+    for record in records:
+        partition_name = record[0]
+        month_start = _parse_partition_name(partition_name)
+        if month_start is not None and month_start < cutoff:
+            success, _ = await _database.try_execute(f'DROP TABLE IF EXISTS {partition_name}')
+            if success:
+                __CREATED_PARTITIONS.discard(partition_name)
+                result.append(partition_name)
+    return result
+
+
+async def get_tracked_alliance_ids() -> _Set[int]:
+    """
+    Returns the IDs of all alliances configured as a fleet on any server.
+    """
+    records = await _database.fetchall(f'SELECT DISTINCT {_fleet.Fleet.ID_COLUMN_NAME} FROM {_fleet.Fleet.TABLE_NAME}')
+    return {record[0] for record in (records or [])}
+
+
+def get_collection_time(utc_now: _datetime, interval: int) -> _datetime:
+    """
+    Returns the start of the snapshot interval `utc_now` falls into.
+    """
+    timestamp = int(utc_now.timestamp())
+    return _datetime.fromtimestamp(timestamp - timestamp % max(interval, 1), _timezone.utc)
+
+
+async def rebuild_rollups() -> bool:
+    """
+    Creates the daily and weekly rollups missing for the stored fleet snapshots, e.g. for the snapshots collected before rollups were introduced.
+    """
+    query = _get_decode_query(TABLE_NAME_FLEET_SNAPSHOT, ['alliance_id'], FLEET_VALUE_NAMES)
+    since = _datetime(1970, 1, 1, tzinfo=_timezone.utc)
+    try:
+        connection = await _database.acquire_connection()
+        try:
+            async with connection.transaction():
+                await connection.execute('SELECT pg_advisory_xact_lock($1)', __ADVISORY_LOCK_KEY)
+                alliance_ids = [record[0] for record in await connection.fetch(f'SELECT alliance_id FROM {TABLE_NAME_FLEET_SNAPSHOT_LATEST}')]
+                await _fleet_rollup.rebuild_rollups(connection, query, [alliance_ids, since, since, _get_far_future()])
+        finally:
+            await _database.release_connection(connection)
+    except (_asyncpg.PostgresError, OSError, ConnectionError) as error:
+        _database.print_db_query_error('rebuild_rollups', query, None, error)
+        return False
+    return True
+
+
+def _encode(latest: _Optional[_asyncpg.Record], value_names: _Tuple[str, ...], values: _Tuple[int, ...], collected_at: _datetime) -> _Tuple[bool, _Tuple[int, ...]]:
+    if latest is None or _get_month_start(latest['collected_at']) != _get_month_start(collected_at):
+        return (True, values)
+    return (False, tuple(value - latest[value_name] for value_name, value in zip(value_names, values)))
+
+
+def _get_decode_query(table_name: str, key_column_names: _List[str], value_names: _Tuple[str, ...], include_previous: bool = False) -> str:
+    # Every keyframe starts a new run of deltas, which get summed up to the absolute values. Reading starts at the beginning of a month, since that's where the first keyframe is.
+    # With `include_previous`, the last snapshot before `$3` is returned, too, unless there's one at `$3`, since rows without changes aren't stored.
+    key_columns = ', '.join(key_column_names)
+    value_columns = ', '.join(value_names)
+    since_condition = 'collected_at >= $3 OR next_collected_at IS NULL OR next_collected_at > $3' if include_previous else 'collected_at >= $3'
+    return (
+        f'SELECT {key_columns}, collected_at, {value_columns} FROM ('
+        f'SELECT {key_columns}, collected_at, lead(collected_at) OVER (PARTITION BY {key_columns} ORDER BY collected_at) AS next_collected_at, {", ".join(f"sum({value_name}) OVER run AS {value_name}" for value_name in value_names)} FROM ('
+        f'SELECT *, count(*) FILTER (WHERE is_keyframe) OVER (PARTITION BY {key_columns} ORDER BY collected_at) AS run_number FROM {table_name} '
+        f'WHERE alliance_id = ANY($1) AND collected_at >= $2 AND collected_at <= $4'
+        f') s WINDOW run AS (PARTITION BY {key_columns}, run_number ORDER BY collected_at)'
+        f') d WHERE {since_condition} ORDER BY {key_columns}, collected_at'
+    )
+
+
+async def _create_partitions(connection: _asyncpg.Connection, collected_ats: _Iterable[_datetime]) -> None:
+    # Partitions get created in a transaction of their own, so that they're only remembered as created, once they've been committed
+    queries: _Dict[str, str] = {}
+    for month_start in {_get_month_start(collected_at) for collected_at in collected_ats}:
+        next_month_start = month_start.replace(year=month_start.year + month_start.month // 12, month=month_start.month % 12 + 1)
+        for table_name in (TABLE_NAME_FLEET_SNAPSHOT, TABLE_NAME_MEMBER_SNAPSHOT):
+            partition_name = _get_partition_name(table_name, month_start)
+            if partition_name not in __CREATED_PARTITIONS:
+                queries[partition_name] = f'CREATE TABLE IF NOT EXISTS {partition_name} PARTITION OF {table_name} FOR VALUES FROM (\'{month_start.isoformat()}\') TO (\'{next_month_start.isoformat()}\')'
+    if not queries:
+        return
+    async with connection.transaction():
+        await connection.execute('SELECT pg_advisory_xact_lock($1)', __ADVISORY_LOCK_KEY)
+        for query in queries.values():
+            await connection.execute(query)
+    __CREATED_PARTITIONS.update(queries.keys())
+
+
+def _get_far_future() -> _datetime:
+    return _datetime(9999, 1, 1, tzinfo=_timezone.utc)
+
+
+def _get_month_start(value: _datetime) -> _datetime:
+    value = value.astimezone(_timezone.utc)
+    return _datetime(value.year, value.month, 1, tzinfo=_timezone.utc)
+
+
+def _get_partition_name(table_name: str, month_start: _datetime) -> str:
+    return f'{table_name}_y{month_start.year}m{month_start.month:02d}'
+
+
+def _get_values(record: _Optional[_asyncpg.Record], value_names: _Tuple[str, ...]) -> _Optional[_Tuple[int, ...]]:
+    if record is None:
+        return None
+    return tuple(record[value_name] for value_name in value_names)
+
+
+def _parse_partition_name(partition_name: str) -> _Optional[_datetime]:
+    try:
+        year_month = partition_name.rsplit('_y', 1)[1]
+        year, month = year_month.split('m')
+        return _datetime(int(year), int(month), 1, tzinfo=_timezone.utc)
+    except (IndexError, ValueError):
+        return None
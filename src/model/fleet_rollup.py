@@ -0,0 +1,169 @@
+from datetime import date as _date
+from datetime import datetime as _datetime
+from datetime import timedelta as _timedelta
+from datetime import timezone as _timezone
+from typing import Dict as _Dict
+from typing import Iterable as _Iterable
+from typing import List as _List
+from typing import Optional as _Optional
+from typing import Tuple as _Tuple
+
+import asyncpg as _asyncpg
+
+from . import database as _database
+from .. import utils as _utils
+
+
+
+# ---------- Constants ----------
+
+PERIOD_DAY: str = 'day'
+PERIOD_WEEK: str = 'week'
+
+TABLE_NAMES: _Dict[str, str] = {
+    PERIOD_DAY: 'fleet_rollup_daily',
+    PERIOD_WEEK: 'fleet_rollup_weekly',
+}
+PERIOD_ALIASES: _Dict[str, str] = {
+    'd': PERIOD_DAY,
+    'day': PERIOD_DAY,
+    'daily': PERIOD_DAY,
+    'w': PERIOD_WEEK,
+    'week': PERIOD_WEEK,
+    'weekly': PERIOD_WEEK,
+}
+PERIOD_START_EXPRESSIONS: _Dict[str, str] = {
+    PERIOD_DAY: '(collected_at AT TIME ZONE \'UTC\')::date',
+    PERIOD_WEEK: 'date_trunc(\'week\', collected_at AT TIME ZONE \'UTC\')::date',
+}
+"""SQL expressions deriving the start of the period from the column `collected_at`. Weeks start on Monday."""
+
+COLUMN_NAMES: _Tuple[str, ...] = (
+    'alliance_id', 'period_start', 'first_collected_at', 'last_collected_at', 'snapshot_count',
+    'trophy_open', 'trophy_close', 'trophy_min', 'trophy_max',
+    'ranking_open', 'ranking_close', 'ranking_best', 'ranking_worst',
+    'member_count_open', 'member_count_close', 'score_close',
+)
+"""The `*_open` values are the ones of the snapshot preceding the period, so that the changes of consecutive periods add up."""
+
+QUERY_CREATE_TABLES: _List[str] = [
+    f'''CREATE TABLE IF NOT EXISTS {table_name} (
+    alliance_id BIGINT NOT NULL,
+    period_start DATE NOT NULL,
+    first_collected_at TIMESTAMPTZ NOT NULL,
+    last_collected_at TIMESTAMPTZ NOT NULL,
+    snapshot_count INTEGER NOT NULL,
+    trophy_open INTEGER NOT NULL,
+    trophy_close INTEGER NOT NULL,
+    trophy_min INTEGER NOT NULL,
+    trophy_max INTEGER NOT NULL,
+    ranking_open INTEGER NOT NULL,
+    ranking_close INTEGER NOT NULL,
+    ranking_best INTEGER NOT NULL,
+    ranking_worst INTEGER NOT NULL,
+    member_count_open INTEGER NOT NULL,
+    member_count_close INTEGER NOT NULL,
+    score_close INTEGER NOT NULL,
+    PRIMARY KEY (alliance_id, period_start)
+)'''
+    for table_name in TABLE_NAMES.values()
+]
+
+
+
+
+
+# ---------- Functions ----------
+
+async def update_rollups(connection: _asyncpg.Connection, collected_at: _datetime, changes: _Iterable[_Tuple[int, _Optional[_Tuple[int, ...]], _Tuple[int, ...]]]) -> None:
+    """
+    Folds new fleet snapshots into the daily and weekly rollups. `changes` holds the alliance ID, the values of the previous snapshot, if any, and the values of the new snapshot, both ordered like `fleet_history.FLEET_VALUE_NAMES`. Must be called once per snapshot and in the transaction storing the snapshots.
+    """
+    changes = list(changes)
+    if not changes:
+        return
+    args = [
+        [alliance_id for alliance_id, _, _ in changes],
+        None,
+        collected_at,
+        *[[(previous_values or values)[i] for _, previous_values, values in changes] for i in range(3)],
+        *[[values[i] for _, _, values in changes] for i in range(4)],
+    ]
+    for period, table_name in TABLE_NAMES.items():
+        args[1] = get_period_start(collected_at, period)
+        query = (
+            f'INSERT INTO {table_name} ({", ".join(COLUMN_NAMES)}) '
+            f'SELECT r.alliance_id, $2, $3, $3, 1, r.trophy_open, r.trophy, r.trophy, r.trophy, r.ranking_open, r.ranking, r.ranking, r.ranking, r.member_count_open, r.member_count, r.score '
+            f'FROM unnest($1::bigint[], $4::int[], $5::int[], $6::int[], $7::int[], $8::int[], $9::int[], $10::int[]) AS r(alliance_id, trophy_open, ranking_open, member_count_open, trophy, ranking, member_count, score) '
+            f'ON CONFLICT (alliance_id, period_start) DO UPDATE SET '
+            f'last_collected_at = EXCLUDED.last_collected_at, snapshot_count = {table_name}.snapshot_count + 1, '
+            f'trophy_close = EXCLUDED.trophy_close, trophy_min = LEAST({table_name}.trophy_min, EXCLUDED.trophy_min), trophy_max = GREATEST({table_name}.trophy_max, EXCLUDED.trophy_max), '
+            f'ranking_close = EXCLUDED.ranking_close, ranking_best = LEAST({table_name}.ranking_best, EXCLUDED.ranking_best), ranking_worst = GREATEST({table_name}.ranking_worst, EXCLUDED.ranking_worst), '
+            f'member_count_close = EXCLUDED.member_count_close, score_close = EXCLUDED.score_close '
+            f'WHERE {table_name}.last_collected_at < EXCLUDED.last_collected_at'
+        )
+        await connection.execute(query, *args)
+
+
+async def rebuild_rollups(connection: _asyncpg.Connection, decoded_snapshots_query: str, args: _List) -> None:
+    """
+    Creates the rollups missing for the snapshots returned by `decoded_snapshots_query`, which must return the absolute values of fleet snapshots.
+    """
+    for period, table_name in TABLE_NAMES.items():
+        query = (
+            f'WITH d AS ({decoded_snapshots_query}), '
+            f'p AS (SELECT *, '
+            f'coalesce(lag(trophy) OVER w, trophy) AS trophy_open, coalesce(lag(ranking) OVER w, ranking) AS ranking_open, coalesce(lag(member_count) OVER w, member_count) AS member_count_open '
+            f'FROM d WINDOW w AS (PARTITION BY alliance_id ORDER BY collected_at)) '
+            f'INSERT INTO {table_name} ({", ".join(COLUMN_NAMES)}) '
+            f'SELECT alliance_id, {PERIOD_START_EXPRESSIONS[period]}, min(collected_at), max(collected_at), count(*), '
+            f'(array_agg(trophy_open ORDER BY collected_at))[1], (array_agg(trophy ORDER BY collected_at DESC))[1], min(trophy), max(trophy), '
+            f'(array_agg(ranking_open ORDER BY collected_at))[1], (array_agg(ranking ORDER BY collected_at DESC))[1], min(ranking), max(ranking), '
+            f'(array_agg(member_count_open ORDER BY collected_at))[1], (array_agg(member_count ORDER BY collected_at DESC))[1], (array_agg(score ORDER BY collected_at DESC))[1] '
+            f'FROM p GROUP BY 1, 2 '
+            f'ON CONFLICT (alliance_id, period_start) DO NOTHING'
+        )
+        await connection.execute(query, *args)
+
+
+async def get_rollups(alliance_id: int, period: str, since: _date) -> _List[_asyncpg.Record]:
+    """
+    Returns the rollups of an alliance for the periods starting at or after `since`, oldest first.
+    """
+    query = f'SELECT * FROM {TABLE_NAMES[period]} WHERE alliance_id = $1 AND period_start >= $2 ORDER BY period_start'
+    return await _database.fetchall(query, [alliance_id, since]) or []
+
+
+async def get_current_rollups(alliance_ids: _Iterable[int], period: str) -> _Dict[int, _asyncpg.Record]:
+    """
+    Returns the rollups of the current period by alliance ID. Alliances that haven't been snapshotted in the current period are left out.
+    """
+    query = f'SELECT * FROM {TABLE_NAMES[period]} WHERE alliance_id = ANY($1) AND period_start = $2'
+    records = await _database.fetchall(query, [list(alliance_ids), get_period_start(_utils.datetime.get_utc_now(), period)])
+    return {record['alliance_id']: record for record in (records or [])}
+
+
+async def delete_expired_rollups(retention: _timedelta) -> bool:
+    """
+    Deletes the daily rollups older than `retention`. Weekly rollups are kept, since they are small and hold the long term trends.
+    """
+    cutoff = get_period_start(_utils.datetime.get_utc_now() - retention, PERIOD_DAY)
+    success, _ = await _database.try_execute(f'DELETE FROM {TABLE_NAMES[PERIOD_DAY]} WHERE period_start < $1', [cutoff])
+    return success
+
+
+def get_period_start(value: _datetime, period: str) -> _date:
+    result = value.astimezone(_timezone.utc).date()
+    if period == PERIOD_WEEK:
+        result -= _timedelta(days=result.weekday())
+    return result
+
+
+def parse_period(period: str) -> str:
+    """
+    Returns the period matching the given name or abbreviation. Raises a `ValueError`, if there's none.
+    """
+    result = PERIOD_ALIASES.get((period or '').strip().lower())
+    if result:
+        return result
+    raise ValueError(f'The period must be one of: {", ".join(TABLE_NAMES.keys())}')
@@ -1,6 +1,14 @@
 import os as _os
 
 
+DATABASE_DELTA_EXPORT_OVERLAP: float = float(_os.environ.get('DATABASE_DELTA_EXPORT_OVERLAP', '300'))
+"""Seconds a delta export reaches back before the previous export, to include rows stamped by clocks running behind the database server"""
+DATABASE_EXPORT_BATCH_SIZE: int = int(_os.environ.get('DATABASE_EXPORT_BATCH_SIZE', '1000'))
+DATABASE_POOL_MAX_IDLE_TIME: float = float(_os.environ.get('DATABASE_POOL_MAX_IDLE_TIME', '300'))
+DATABASE_POOL_MAX_LIFETIME: float = float(_os.environ.get('DATABASE_POOL_MAX_LIFETIME', '3600'))
+DATABASE_POOL_MAX_SIZE: int = int(_os.environ.get('DATABASE_POOL_MAX_SIZE', '10'))
+DATABASE_POOL_MIN_SIZE: int = int(_os.environ.get('DATABASE_POOL_MIN_SIZE', '1'))
 DATABASE_SSL_MODE: str = _os.environ.get('DATABASE_SSL_MODE', 'require')
 DATABASE_URL: str = f'{_os.environ.get("DATABASE_URL")}?sslmode={DATABASE_SSL_MODE}'.replace('postgres://', 'postgresql://')
+DATABASE_STATEMENT_TIMEOUT: int = int(_os.environ.get('DATABASE_STATEMENT_TIMEOUT', '60000'))
 PRINT_DEBUG_DB: bool = bool(int(_os.environ.get('PRINT_DEBUG_DB', '0')))
\ No newline at end of file
@@ -6,21 +6,66 @@ from typing import TypeVar as _TypeVar
 from typing import Type as _Type
 
 import sqlalchemy as _sqlalchemy
+from sqlalchemy.dialects.postgresql.asyncpg import AsyncAdapt_asyncpg_connection as _AsyncAdapt_asyncpg_connection
+from sqlalchemy.dialects.postgresql.asyncpg import PGDialect_asyncpg as _PGDialect_asyncpg
+from sqlalchemy.ext.asyncio import AsyncSession as _AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine as _create_async_engine
 from sqlalchemy.ext.declarative import declarative_base as _declarative_base
-from sqlalchemy.orm.query import Query as _Query
-from sqlalchemy.orm.scoping import scoped_session as _scoped_session
+from sqlalchemy.pool import NullPool as _NullPool
+from sqlalchemy.sql import Select as _Select
+from sqlalchemy.util import await_only as _await_only
 
-from .database import DATABASE_URL
+from . import database as _database
 
 
 
 # ---------- Constants ----------
 
-_ENGINE: _sqlalchemy.engine.Engine = _sqlalchemy.create_engine(
-    DATABASE_URL
-)
-_SESSION_MAKER: _sqlalchemy.orm.sessionmaker = _sqlalchemy.orm.sessionmaker(autocommit=False, autoflush=False, bind=_ENGINE)
-ScopedSession = _scoped_session
+class _PooledAsyncpgConnection(_AsyncAdapt_asyncpg_connection):
+    """
+    Wraps a connection acquired from the asyncpg pool in `database`. Closing or terminating it hands the connection back to that pool.
+    """
+    __slots__ = ()
+
+    def close(self):
+        self.rollback()
+        self.await_(_database.release_connection(self._connection))
+
+    def terminate(self):
+        # Called instead of `close` on invalidation and cancelled checkouts. The pool only frees the slot, once the connection has been released.
+        self._connection.terminate()
+        self.await_(_database.release_connection(self._connection))
+
+
+class _PooledAsyncpgDialect(_PGDialect_asyncpg):
+    supports_statement_cache = True
+
+    def on_connect(self):
+        # Pooled connections are reused, so don't re-register the JSON type codecs on every checkout.
+        return None
+
+
+def _create_pooled_connection() -> _PooledAsyncpgConnection:
+    connection = _await_only(_database.acquire_connection())
+    return _PooledAsyncpgConnection(_ASYNC_ENGINE.sync_engine.dialect.dbapi, connection)
+
+
+_sqlalchemy.dialects.registry.register('postgresql.pooled_asyncpg', __name__, _PooledAsyncpgDialect.__name__)
+
+_ASYNC_ENGINE: _sqlalchemy.ext.asyncio.AsyncEngine = None
+_ASYNC_SESSION_MAKER: _sqlalchemy.orm.sessionmaker = None
+
+
+def _get_async_session_maker() -> _sqlalchemy.orm.sessionmaker:
+    global _ASYNC_ENGINE, _ASYNC_SESSION_MAKER
+    if _ASYNC_SESSION_MAKER is None:
+        _ASYNC_ENGINE = _create_async_engine(
+            'postgresql+pooled_asyncpg://',
+            creator=_create_pooled_connection,
+            poolclass=_NullPool,
+        )
+        _ASYNC_SESSION_MAKER = _sqlalchemy.orm.sessionmaker(autocommit=False, autoflush=False, bind=_ASYNC_ENGINE, class_=_AsyncSession)
+    return _ASYNC_SESSION_MAKER
 
 
 
@@ -42,26 +87,21 @@ class ModelBase(_Record, _Generic[_T]):
     modified_at = _sqlalchemy.Column(MODIFIED_AT_COLUMN_NAME, _sqlalchemy.DateTime, default=_datetime.utcnow, onupdate=_datetime.utcnow)
 
 
-    def create(self, session: _scoped_session, commit: bool = True) -> _T:
+    async def create_async(self, session: _AsyncSession, commit: bool = True) -> _T:
         session.add(self)
         if commit:
-            session.commit()
+            await session.commit()
         return self
 
 
-    def delete(self, session: _scoped_session, commit: bool = True) -> None:
-        session.delete(self)
+    async def delete_async(self, session: _AsyncSession, commit: bool = True) -> None:
+        await session.delete(self)
         if commit:
-            session.commit()
-
-
-    def reset_changes(self, session: _scoped_session) -> _T:
-        session.rollback()
-        return self
+            await session.commit()
 
 
-    def save(self, session: _scoped_session) -> _T:
-        session.commit()
+    async def save_async(self, session: _AsyncSession) -> _T:
+        await session.commit()
         return self
 
 
@@ -70,29 +110,32 @@ class ModelBase(_Record, _Generic[_T]):
 
 # ---------- Helper ----------
 
-def create_session() -> _scoped_session:
-    return _SESSION_MAKER(expire_on_commit=False)
+def create_async_session() -> _AsyncSession:
+    return _get_async_session_maker()(expire_on_commit=False)
 
 
-def get_all(cls: _Type[_T], session: _scoped_session) -> _List[_T]:
-    return get_query(cls, session).all()
+async def get_all_async(cls: _Type[_T], session: _AsyncSession) -> _List[_T]:
+    result = await session.execute(get_select(cls))
+    return result.unique().scalars().all()
 
 
-def get_by_id(cls: _Type[_T], session: _scoped_session, id: int) -> _Optional[_T]:
-    return get_query(cls, session).get(id)
+async def get_by_id_async(cls: _Type[_T], session: _AsyncSession, id: int) -> _Optional[_T]:
+    return await session.get(cls, id)
 
 
-def get_all_filtered_by(cls: _Type[_T], session: _scoped_session, **kwargs) -> _List[_T]:
-    return get_query(cls, session).filter_by(**kwargs).all()
+async def get_all_filtered_by_async(cls: _Type[_T], session: _AsyncSession, **kwargs) -> _List[_T]:
+    result = await session.execute(get_select(cls).filter_by(**kwargs))
+    return result.unique().scalars().all()
 
 
-def get_first_filtered_by(cls: _Type[_T], session: _scoped_session, **kwargs) -> _Optional[_T]:
-    return get_query(cls, session).filter_by(**kwargs).first()
+async def get_first_filtered_by_async(cls: _Type[_T], session: _AsyncSession, **kwargs) -> _Optional[_T]:
+    result = await session.execute(get_select(cls).filter_by(**kwargs).limit(1))
+    return result.unique().scalars().first()
 
 
-def get_query(cls: _Type[_T], session: _scoped_session) -> _Query:
-    return session.query(cls)
+def get_select(cls: _Type[_T]) -> _Select:
+    return _sqlalchemy.select(cls)
 
 
-def merge(session: _scoped_session, instance: _T) -> _T:
-    return session.merge(instance)
\ No newline at end of file
+async def merge_async(session: _AsyncSession, instance: _T) -> _T:
+    return await session.merge(instance)
\ No newline at end of file
@@ -1,14 +1,25 @@
-import math as _math
+import time as _time
+from typing import Awaitable as _Awaitable
+from typing import Callable as _Callable
 from typing import Optional as _Optional
+from typing import TypeVar as _TypeVar
 
 import discord as _discord
 import discord.ext.commands as _commands
 import pssapi as _pssapi
 from .. import bot_settings as _bot_settings
+from . import access_token_manager as _access_token_manager
+from . import alliance_cache as _alliance_cache
+from . import device_pool as _device_pool
+from . import fake_pssapi as _fake_pssapi
 from . import settings as _settings
+from . import setup as _setup
 from .. import utils as _utils
 
 
+_T = _TypeVar('_T')
+
+
 class PssApiDiscordBot(_commands.Bot):
     def __init__(self, *args, device_type: _pssapi.enums.DeviceType = None, language_key: _pssapi.enums.LanguageKey = None, production_server: str = None, **kwargs):
         super().__init__(
@@ -18,26 +29,115 @@ class PssApiDiscordBot(_commands.Bot):
             *args,
             **kwargs
         )
-        self.__pssapi_client: _pssapi.PssApiClient = _pssapi.PssApiClient(
-            device_type=device_type,
-            language_key=language_key,
-            production_server=production_server
+        if _settings.PSS_API_FAKE:
+            self.__pssapi_client: _pssapi.PssApiClient = _fake_pssapi.create_client_from_settings(
+                device_type=device_type,
+                language_key=language_key,
+                production_server=production_server
+            )
+        else:
+            self.__pssapi_client: _pssapi.PssApiClient = _pssapi.PssApiClient(
+                device_type=device_type,
+                language_key=language_key,
+                production_server=production_server
+            )
+        self.__device_pool: _device_pool.DevicePool = _device_pool.DevicePool(
+            _settings.DEVICE_IDS or [_settings.DEVICE_ID],
+            _settings.PSS_DEVICE_FAILURE_THRESHOLD,
+            _settings.PSS_DEVICE_QUARANTINE_DURATION,
+            _settings.PSS_DEVICE_MAX_QUARANTINE_DURATION,
+        )
+        self.__access_token_manager: _access_token_manager.AccessTokenManager = _access_token_manager.AccessTokenManager(
+            self.__device_login,
+            self.__get_device_id,
+            _settings.PSS_ACCESS_TOKEN_LIFETIME,
+            _settings.PSS_ACCESS_TOKEN_REFRESH_MARGIN,
+        )
+        self.__alliance_cache: _alliance_cache.AllianceCache = _alliance_cache.AllianceCache(
+            self.pssapi_call,
+            self.__pssapi_client,
+            _settings.ALLIANCE_CACHE_TTL,
+            _settings.ALLIANCE_CACHE_NEGATIVE_TTL,
+            _settings.ALLIANCE_CACHE_MAX_SIZE,
         )
     
     @property
     def pssapi_client(self) -> _pssapi.PssApiClient:
         return self.__pssapi_client
-    
+
+    @property
+    def alliance_cache(self) -> _alliance_cache.AllianceCache:
+        return self.__alliance_cache
+
+    @property
+    def device_pool(self) -> _device_pool.DevicePool:
+        return self.__device_pool
+
+    async def close(self) -> None:
+        await super().close()
+        await _setup.teardown()
+
     async def pssapi_login(self) -> _Optional[str]:
+        """
+        Returns a valid access token. Logs in, if the cached access token expired. If logging in fails, the next healthy device gets tried.
+        """
+        for _ in range(self.__device_pool.device_count):
+            try:
+                return await self.__access_token_manager.get_access_token()
+            except _pssapi.utils.exceptions.ServerMaintenanceError:
+                raise
+            except Exception:
+                if not self.__device_pool.has_available_device():
+                    raise
+        return await self.__access_token_manager.get_access_token()
+
+    async def pssapi_call(self, func: _Callable[..., _Awaitable[_T]], *args, **kwargs) -> _T:
+        """
+        Calls `func` with an access token as the first argument. Logs in again and retries once, if the access token is rejected.
+        """
+        access_token = await self.pssapi_login()
+        try:
+            return await self.__call_with_device(func, access_token, *args, **kwargs)
+        except _pssapi.utils.exceptions.ServerMaintenanceError:
+            raise
+        except _pssapi.utils.exceptions.PssApiError as error:
+            if not _access_token_manager.is_authorization_error(error):
+                raise
+        self.__access_token_manager.invalidate(access_token)
+        access_token = await self.pssapi_login()
+        return await self.__call_with_device(func, access_token, *args, **kwargs)
+
+    async def __call_with_device(self, func: _Callable[..., _Awaitable[_T]], access_token: str, *args, **kwargs) -> _T:
+        device_id = self.__access_token_manager.device_id
+        started_at = _time.monotonic()
+        try:
+            result = await func(access_token, *args, **kwargs)
+        except _pssapi.utils.exceptions.PssApiError as error:
+            if _device_pool.is_device_error(error):
+                self.__device_pool.record_failure(device_id, error, _time.monotonic() - started_at)
+            raise
+        self.__device_pool.record_success(device_id, _time.monotonic() - started_at)
+        return result
+
+    def __get_device_id(self) -> _Optional[str]:
+        return self.__device_pool.get_device_id()
+
+    async def __device_login(self, device_id: str) -> str:
+        # All devices are quarantined, if the pool hands out a quarantined one, so don't hammer the login
+        quarantined_until = self.__device_pool.get_quarantined_until(device_id)
+        if quarantined_until:
+            raise _pssapi.utils.exceptions.PssApiError(f'All login devices are quarantined. The next one will be available at {quarantined_until.isoformat()}.')
+
         utc_now = _pssapi.utils.get_utc_now()
-        if _settings.DEVICE_IDS:
-            device_count = len(_settings.DEVICE_IDS)
-            device_index = _math.floor(utc_now.hour / (24 / device_count))
-            device_id = _settings.DEVICE_IDS[device_index]
-        elif _settings.DEVICE_ID:
-            device_id = _settings.DEVICE_ID
         checksum = self.pssapi_client.user_service.utils.create_device_login_checksum(device_id, self.pssapi_client.device_type, utc_now, _settings.PSS_DEVICE_LOGIN_CHECKSUM_KEY)
-        user_login = await self.pssapi_client.user_service.device_login_11(checksum, utc_now, device_id, self.pssapi_client.device_type, self.pssapi_client.language_key)
+        started_at = _time.monotonic()
+        try:
+            user_login = await self.pssapi_client.user_service.device_login_11(checksum, utc_now, device_id, self.pssapi_client.device_type, self.pssapi_client.language_key)
+        except _pssapi.utils.exceptions.ServerMaintenanceError:
+            raise
+        except Exception as error:
+            self.__device_pool.record_failure(device_id, error, _time.monotonic() - started_at, quarantine=True)
+            raise
+        self.__device_pool.record_success(device_id, _time.monotonic() - started_at)
 
         return user_login.access_token
-        
\ No newline at end of file
@@ -26,8 +26,8 @@ class ReactionRole(_orm.ModelBase):
     message_id = _db.Column('message_id', _db.Integer, nullable=False)
     name = _db.Column('name', _db.Text, nullable=False)
     reaction = _db.Column('reaction', _db.Text, nullable=False)
-    role_changes: _Iterable['ReactionRoleChange'] = _db.orm.relationship('ReactionRoleChange', back_populates='reaction_role', cascade='all, delete', lazy='joined')
-    role_requirements: _Iterable['ReactionRoleRequirement'] = _db.orm.relationship('ReactionRoleRequirement', back_populates='reaction_role', cascade='all, delete', lazy='joined')
+    role_changes: _Iterable['ReactionRoleChange'] = _db.orm.relationship('ReactionRoleChange', back_populates='reaction_role', cascade='all, delete-orphan', lazy='joined')
+    role_requirements: _Iterable['ReactionRoleRequirement'] = _db.orm.relationship('ReactionRoleRequirement', back_populates='reaction_role', cascade='all, delete-orphan', lazy='joined')
 
 
     def __repr__(self) -> str:
@@ -87,8 +87,8 @@ class ReactionRole(_orm.ModelBase):
                 if role_change and change.message_channel_id and (change.message_content or change.message_embed):
                     channel = member.guild.get_channel(change.message_channel_id)
                     messages_to_post.append((channel, change.message_content, change.message_embed, role))
-        await member.add_roles(*roles_to_add)
-        await member.remove_roles(*roles_to_remove)
+        await _utils.discord.add_roles(member, *roles_to_add, priority=_utils.discord.PRIORITY_INTERACTIVE)
+        await _utils.discord.remove_roles(member, *roles_to_remove, priority=_utils.discord.PRIORITY_INTERACTIVE)
         for channel, text, embed_definition, role in messages_to_post:
             substitutions = _utils.discord.create_substitutions(guild=member.guild, role=role, member=member)
             if text:
@@ -99,7 +99,10 @@ class ReactionRole(_orm.ModelBase):
                 embed = await _utils.discord.get_embed_from_definition_or_url(embed_definition)
             else:
                 embed = None
-            await channel.send(text, embed=embed)
+            if embed:
+                await _utils.discord.send_to_channel(channel, text, priority=_utils.discord.PRIORITY_BACKGROUND, embed=embed)
+            else:
+                await _utils.discord.send_to_channel(channel, text, priority=_utils.discord.PRIORITY_BACKGROUND, coalesce=True)
 
 
     async def apply_remove(self,
@@ -115,8 +118,8 @@ class ReactionRole(_orm.ModelBase):
                         roles_to_remove.append(role)
                     else:
                         roles_to_add.append(role)
-        await member.add_roles(*roles_to_add)
-        await member.remove_roles(*roles_to_remove)
+        await _utils.discord.add_roles(member, *roles_to_add, priority=_utils.discord.PRIORITY_INTERACTIVE)
+        await _utils.discord.remove_roles(member, *roles_to_remove, priority=_utils.discord.PRIORITY_INTERACTIVE)
 
 
     def remove_change(self,
@@ -124,7 +127,8 @@ class ReactionRole(_orm.ModelBase):
     ) -> None:
         for change in self.role_changes:
             if change.id == role_change_id:
-                change.delete()
+                # Gets deleted as an orphan, when the Reaction Role is saved
+                self.role_changes.remove(change)
                 return
         raise Exception(f'There is no role change with ID \'{role_change_id}\' related to the Reaction Role {self}.')
 
@@ -134,7 +138,7 @@ class ReactionRole(_orm.ModelBase):
     ) -> None:
         for requirement in self.role_requirements:
             if requirement.id == role_requirement_id:
-                requirement.delete()
+                self.role_requirements.remove(requirement)
                 return
         raise Exception(f'There is no role requirement with ID \'{role_requirement_id}\' related to the Reaction Role {self}.')
 
@@ -0,0 +1,123 @@
+from typing import Dict as _Dict
+from typing import Iterable as _Iterable
+from typing import List as _List
+from typing import Tuple as _Tuple
+
+from discord import PartialEmoji as _PartialEmoji
+
+from . import orm as _orm
+from .reaction_role import ReactionRole as _ReactionRole
+
+
+
+# ---------- Typehints ----------
+
+_IndexKey = _Tuple[int, int, str]
+
+
+
+
+
+# ---------- Classes ----------
+
+class ReactionRoleIndex():
+    """
+    Keeps all active Reaction Roles in memory, keyed by (guild_id, message_id, reaction), so that reaction events don't need to query the database.
+    """
+    def __init__(self) -> None:
+        self.__reaction_roles: _Dict[_IndexKey, _Dict[int, _ReactionRole]] = {}
+        self.__keys_by_id: _Dict[int, _IndexKey] = {}
+        self.__loaded: bool = False
+
+
+    @property
+    def loaded(self) -> bool:
+        return self.__loaded
+
+
+    async def get(self, guild_id: int, message_id: int, emoji: _PartialEmoji) -> _List[_ReactionRole]:
+        """
+        Returns the active Reaction Roles configured for the given message and emoji.
+        """
+        if not self.__loaded:
+            await self.load()
+
+        result: _List[_ReactionRole] = []
+        for reaction in get_reactions(emoji):
+            reaction_roles = self.__reaction_roles.get((guild_id, message_id, reaction))
+            if reaction_roles:
+                result.extend(reaction_roles.values())
+        return result
+
+
+    async def load(self) -> None:
+        """
+        (Re-)Loads all active Reaction Roles from the database.
+        """
+        async with _orm.create_async_session() as session:
+            reaction_roles = await _orm.get_all_filtered_by_async(_ReactionRole, session, is_active=True)
+        self.__reaction_roles = {}
+        self.__keys_by_id = {}
+        self.__add(reaction_roles)
+        self.__loaded = True
+
+
+    async def refresh(self, *reaction_role_ids: int) -> None:
+        """
+        Reloads the Reaction Roles with the given IDs from the database. Reaction Roles that have been deleted or deactivated are removed from the index.
+        """
+        if not self.__loaded:
+            await self.load()
+            return
+
+        reaction_role_ids = set(reaction_role_ids)
+        if not reaction_role_ids:
+            return
+
+        query = _orm.get_select(_ReactionRole).where(_ReactionRole.id.in_(reaction_role_ids))
+        async with _orm.create_async_session() as session:
+            reaction_roles = (await session.execute(query)).unique().scalars().all()
+        for reaction_role_id in reaction_role_ids:
+            self.__remove(reaction_role_id)
+        self.__add(reaction_role for reaction_role in reaction_roles if reaction_role.is_active)
+
+
+    def __add(self, reaction_roles: _Iterable[_ReactionRole]) -> None:
+        for reaction_role in reaction_roles:
+            key = (reaction_role.guild_id, reaction_role.message_id, reaction_role.reaction)
+            self.__reaction_roles.setdefault(key, {})[reaction_role.id] = reaction_role
+            self.__keys_by_id[reaction_role.id] = key
+
+
+    def __remove(self, reaction_role_id: int) -> None:
+        key = self.__keys_by_id.pop(reaction_role_id, None)
+        if key is None:
+            return
+        reaction_roles = self.__reaction_roles.get(key)
+        if reaction_roles is not None:
+            reaction_roles.pop(reaction_role_id, None)
+            if not reaction_roles:
+                self.__reaction_roles.pop(key)
+
+
+
+
+
+# ---------- Functions ----------
+
+def get_reactions(emoji: _PartialEmoji) -> _List[str]:
+    """
+    Returns the values of `ReactionRole.reaction` that match the given emoji.
+    """
+    result = [emoji.name]
+    if emoji.id:
+        result.append(f'<:{emoji.name}:{emoji.id}>')
+    return result
+
+
+
+
+
+# ---------- Initialization ----------
+
+REACTION_ROLE_INDEX: ReactionRoleIndex = ReactionRoleIndex()
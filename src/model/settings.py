@@ -1,12 +1,52 @@
 import json as _json
 import os as _os
 from typing import List as _List
+from typing import Optional as _Optional
 
 
 ACCESS_TOKEN: str = _os.environ.get('PSS_ACCESS_TOKEN')
 
 
+ALLIANCE_CACHE_MAX_SIZE: int = int(_os.environ.get('ALLIANCE_CACHE_MAX_SIZE', '2000'))
+"""Number of alliances and of search results kept in memory at most"""
+ALLIANCE_CACHE_NEGATIVE_TTL: float = float(_os.environ.get('ALLIANCE_CACHE_NEGATIVE_TTL', '60'))
+"""Seconds to remember alliances that don't exist and searches without results"""
+ALLIANCE_CACHE_TTL: float = float(_os.environ.get('ALLIANCE_CACHE_TTL', '300'))
+"""Seconds alliances and search results are served from memory"""
+
+
+CHAT_LOG_BUSY_MESSAGE_COUNT: int = int(_os.environ.get('CHAT_LOG_BUSY_MESSAGE_COUNT', '10'))
+"""Number of new messages per poll, above which a channel key gets polled more often"""
+CHAT_LOG_DELIVERY_BATCH_SIZE: int = int(_os.environ.get('CHAT_LOG_DELIVERY_BATCH_SIZE', '100'))
+CHAT_LOG_DELIVERY_INTERVAL: float = float(_os.environ.get('CHAT_LOG_DELIVERY_INTERVAL', '2'))
+CHAT_LOG_DELIVERY_MAX_ATTEMPTS: int = int(_os.environ.get('CHAT_LOG_DELIVERY_MAX_ATTEMPTS', '10'))
+CHAT_LOG_DELIVERY_MAX_RETRY_DELAY: float = float(_os.environ.get('CHAT_LOG_DELIVERY_MAX_RETRY_DELAY', '600'))
+CHAT_LOG_DELIVERY_RETRY_DELAY: float = float(_os.environ.get('CHAT_LOG_DELIVERY_RETRY_DELAY', '5'))
+CHAT_LOG_FULL_PAGE_MESSAGE_COUNT: int = int(_os.environ.get('CHAT_LOG_FULL_PAGE_MESSAGE_COUNT', '100'))
+"""Number of messages returned per poll by the PSS API at most"""
+CHAT_LOG_LEASE_DURATION: float = float(_os.environ.get('CHAT_LOG_LEASE_DURATION', '60'))
+"""Seconds after which the channel keys of a bot process that stopped polling get taken over by other processes"""
+CHAT_LOG_POLL_INTERVAL_MAX: float = float(_os.environ.get('CHAT_LOG_POLL_INTERVAL_MAX', '600'))
+CHAT_LOG_POLL_INTERVAL_MIN: float = float(_os.environ.get('CHAT_LOG_POLL_INTERVAL_MIN', '10'))
+CHAT_LOG_REQUESTS_PER_MINUTE: int = int(_os.environ.get('CHAT_LOG_REQUESTS_PER_MINUTE', '60'))
+CHAT_LOG_SEARCH_PAGE_SIZE: int = int(_os.environ.get('CHAT_LOG_SEARCH_PAGE_SIZE', '10'))
+
+
+FLEET_SNAPSHOT_INTERVAL: int = int(_os.environ.get('FLEET_SNAPSHOT_INTERVAL', '3600'))
+"""Seconds between snapshots of the tracked fleets. Snapshots get aligned to multiples of this interval."""
+FLEET_SNAPSHOT_RETENTION_DAYS: int = int(_os.environ.get('FLEET_SNAPSHOT_RETENTION_DAYS', '186'))
+"""Days the fleet snapshots are kept for. Snapshots get deleted by the month."""
+FLEET_UPDATE_MAX_CONCURRENT_REQUESTS: int = int(_os.environ.get('FLEET_UPDATE_MAX_CONCURRENT_REQUESTS', '5'))
+FLEET_UPDATE_TIMEOUT: float = float(_os.environ.get('FLEET_UPDATE_TIMEOUT', '15'))
+"""Seconds to wait for the alliance of a single fleet during `fleet update`"""
+
+
 PSS_DEVICE_LOGIN_CHECKSUM_KEY: str = _os.environ.get('PSS_DEVICE_LOGIN_CHECKSUM_KEY')
+PSS_DEVICE_FAILURE_THRESHOLD: int = int(_os.environ.get('PSS_DEVICE_FAILURE_THRESHOLD', '3'))
+"""Number of failed requests in a row, after which a login device gets quarantined. Failed logins quarantine a device immediately."""
+PSS_DEVICE_MAX_QUARANTINE_DURATION: float = float(_os.environ.get('PSS_DEVICE_MAX_QUARANTINE_DURATION', '3600'))
+PSS_DEVICE_QUARANTINE_DURATION: float = float(_os.environ.get('PSS_DEVICE_QUARANTINE_DURATION', '60'))
+"""Seconds a login device gets quarantined for the first time. Doubles with every further quarantine in a row."""
 
 
 DEFAULT_PSS_PRODUCTION_SERVER: str = 'https://api.pixelstarships.com/'
@@ -19,6 +59,26 @@ DEVICE_TYPE: str = 'DeviceTypeAndroid'
 LANGUAGE_KEY: str = 'en'
 
 
+PSS_ACCESS_TOKEN_LIFETIME: float = float(_os.environ.get('PSS_ACCESS_TOKEN_LIFETIME', '3600'))
+PSS_ACCESS_TOKEN_REFRESH_MARGIN: float = float(_os.environ.get('PSS_ACCESS_TOKEN_REFRESH_MARGIN', '300'))
+PSS_API_FAKE: bool = bool(int(_os.environ.get('PSS_API_FAKE', '0')))
+"""Serve synthetic data from a local stand-in instead of calling the PSS production server. For load tests and benchmarks only."""
+PSS_API_FAKE_ALLIANCE_COUNT: int = int(_os.environ.get('PSS_API_FAKE_ALLIANCE_COUNT', '500'))
+PSS_API_FAKE_ERROR_RATE: float = float(_os.environ.get('PSS_API_FAKE_ERROR_RATE', '0'))
+"""Share of requests to the stand-in failing with an API error, between 0 and 1"""
+PSS_API_FAKE_LATENCY: float = float(_os.environ.get('PSS_API_FAKE_LATENCY', '0.2'))
+"""Mean response time of the stand-in in seconds"""
+PSS_API_FAKE_MAINTENANCE_DURATION: float = float(_os.environ.get('PSS_API_FAKE_MAINTENANCE_DURATION', '0'))
+PSS_API_FAKE_MAINTENANCE_INTERVAL: float = float(_os.environ.get('PSS_API_FAKE_MAINTENANCE_INTERVAL', '0'))
+"""Seconds between maintenance windows of the stand-in. Maintenance is disabled, if this or the duration is 0."""
+PSS_API_FAKE_MESSAGES_PER_MINUTE: float = float(_os.environ.get('PSS_API_FAKE_MESSAGES_PER_MINUTE', '30'))
+"""Messages per minute generated by the stand-in for each channel key"""
+PSS_API_FAKE_SEED: _Optional[int] = int(_os.environ['PSS_API_FAKE_SEED']) if _os.environ.get('PSS_API_FAKE_SEED') else None
+PSS_API_MAX_CONCURRENT_REQUESTS: int = int(_os.environ.get('PSS_API_MAX_CONCURRENT_REQUESTS', '5'))
+PSS_API_RATE_LIMIT: float = float(_os.environ.get('PSS_API_RATE_LIMIT', '10'))
+"""Requests per second to the PSS production server"""
+
+
 OVERWRITE_PSS_PRODUCTION_SERVER: str = _os.environ.get('PSS_PRODUCTION_SERVER')
 
 
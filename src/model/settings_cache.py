@@ -0,0 +1,168 @@
+import asyncio as _asyncio
+import time as _time
+from datetime import datetime as _datetime
+from typing import Any as _Any
+from typing import Dict as _Dict
+from typing import List as _List
+from typing import Optional as _Optional
+from typing import Set as _Set
+from typing import Tuple as _Tuple
+
+import asyncpg as _asyncpg
+
+from . import database as _database
+from .. import utils as _utils
+
+
+
+# ---------- Typehints ----------
+
+_Setting = _Tuple[_Any, _Optional[_datetime]]
+
+
+
+
+
+# ---------- Classes ----------
+
+class SettingsCache():
+    """
+    Keeps the contents of the table `bot_settings` in memory. Writes go to the database first and update the cache on success. Changes made by other processes are picked up via `LISTEN/NOTIFY`. If the subscription can't be established, the settings read last are served and reloading gets retried with an increasing delay.
+    """
+    __LOAD_RETRY_DELAY_MIN: float = 5.0
+    __LOAD_RETRY_DELAY_MAX: float = 300.0
+
+    def __init__(self) -> None:
+        self.__settings: _Dict[str, _Setting] = {}
+        self.__listener_connection: _asyncpg.Connection = None
+        self.__refresh_tasks: _Dict[str, _asyncio.Task] = {}
+        self.__outdated_setting_names: _Set[str] = set()
+        self.__loaded: bool = False
+        self.__load_lock: _asyncio.Lock = _asyncio.Lock()
+        self.__load_retry_delay: float = 0.0
+        self.__next_load_at: float = 0.0
+
+
+    @property
+    def loaded(self) -> bool:
+        return self.__loaded
+
+
+    async def get(self, setting_name: str) -> _Setting:
+        """
+        Returns the value of a setting and the date it was last modified at. Returns (None, None), if the setting doesn't exist.
+        """
+        await self.__ensure_loaded()
+        return self.__settings.get(setting_name, (None, None))
+
+
+    async def get_many(self, setting_names: _List[str]) -> _Dict[str, _Setting]:
+        await self.__ensure_loaded()
+        return {setting_name: self.__settings.get(setting_name, (None, None)) for setting_name in setting_names}
+
+
+    async def set(self, setting_name: str, value: _Any) -> bool:
+        """
+        Writes a setting to the database and updates the cache, if the write succeeded.
+        """
+        await self.__ensure_loaded()
+
+        current_value, _ = self.__settings.get(setting_name, (None, None))
+        if current_value is not None and type(current_value) == type(value) and current_value == value:
+            return True
+
+        utc_now = _utils.datetime.get_utc_now()
+        success = await _database.set_setting(setting_name, value, utc_now=utc_now)
+        if success:
+            self.__settings[setting_name] = (value, utc_now)
+        return success
+
+
+    async def load(self) -> None:
+        """
+        (Re-)Loads all settings from the database and subscribes to changes.
+        """
+        async with self.__load_lock:
+            await self.__load()
+
+
+    async def close(self) -> None:
+        self.__loaded = False
+        for task in list(self.__refresh_tasks.values()):
+            task.cancel()
+        if self.__listener_connection is not None:
+            await self.__listener_connection.close()
+            self.__listener_connection = None
+
+
+    async def __ensure_loaded(self) -> None:
+        if self.__loaded:
+            return
+        async with self.__load_lock:
+            # Another caller may have loaded the settings while waiting for the lock
+            if not self.__loaded and _time.monotonic() >= self.__next_load_at:
+                await self.__load()
+
+
+    async def __load(self) -> None:
+        if self.__listener_connection is None or self.__listener_connection.is_closed():
+            try:
+                self.__listener_connection = await _database.listen(_database.CHANNEL_NAME_BOT_SETTINGS, self.__on_notification, self.__on_listener_terminated)
+            except (_asyncpg.PostgresError, OSError) as error:
+                print(f'[SettingsCache.load] {error.__class__.__name__} occurred while subscribing to setting changes: {error}')
+                self.__listener_connection = None
+
+        try:
+            self.__settings = await _database.get_settings()
+        except _asyncpg.UndefinedTableError:
+            # The table doesn't exist before the initial schema got created
+            self.__settings = {}
+            self.__loaded = False
+            return
+        # Without a subscription, the cache can't be kept coherent, so it'll be reloaded on access, once the retry delay passed
+        self.__loaded = self.__listener_connection is not None
+        if self.__loaded:
+            self.__load_retry_delay = 0.0
+        else:
+            self.__load_retry_delay = min(max(self.__load_retry_delay * 2, SettingsCache.__LOAD_RETRY_DELAY_MIN), SettingsCache.__LOAD_RETRY_DELAY_MAX)
+        self.__next_load_at = _time.monotonic() + self.__load_retry_delay
+
+
+    async def __refresh(self, setting_name: str) -> None:
+        """
+        Reloads a setting until no further notification arrived for it while it was being reloaded, so that an older read can't overwrite a newer one. If the setting can't be read, the cached value is kept and all settings get reloaded on next access.
+        """
+        try:
+            while setting_name in self.__outdated_setting_names:
+                self.__outdated_setting_names.discard(setting_name)
+                try:
+                    setting = (await _database.get_settings([setting_name]))[setting_name]
+                except (_asyncpg.PostgresError, OSError, ConnectionError) as error:
+                    print(f'[SettingsCache.refresh] {error.__class__.__name__} occurred while reloading the setting \'{setting_name}\': {error}')
+                    self.__loaded = False
+                    return
+                if setting == (None, None):
+                    self.__settings.pop(setting_name, None)
+                else:
+                    self.__settings[setting_name] = setting
+        finally:
+            self.__refresh_tasks.pop(setting_name, None)
+
+
+    def __on_listener_terminated(self, connection: _asyncpg.Connection) -> None:
+        self.__loaded = False
+        self.__listener_connection = None
+
+
+    def __on_notification(self, connection: _asyncpg.Connection, pid: int, channel: str, setting_name: str) -> None:
+        self.__outdated_setting_names.add(setting_name)
+        if setting_name not in self.__refresh_tasks:
+            self.__refresh_tasks[setting_name] = _asyncio.create_task(self.__refresh(setting_name))
+
+
+
+
+
+# ---------- Initialization ----------
+
+SETTINGS_CACHE: SettingsCache = SettingsCache()
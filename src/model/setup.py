@@ -2,9 +2,17 @@ import asyncio as _asyncio
 from typing import Callable as _Callable
 
 from . import database as _database
+from . import chat_alert as _chat_alert
+from . import chat_alert_index as _chat_alert_index
+from . import chat_archive as _chat_archive
 from . import chat_log as _chat_log
+from . import chat_log_lease as _chat_log_lease
 from . import fleet as _fleet
+from . import fleet_history as _fleet_history
+from . import fleet_rollup as _fleet_rollup
 from . import reaction_role as _reaction_role
+from . import reaction_role_index as _reaction_role_index
+from . import settings_cache as _settings_cache
 from .. import utils as _utils
 
 
@@ -13,6 +21,18 @@ from .. import utils as _utils
 async def setup() -> None:
     await _database.init()
     await __setup_db_schema()
+    await _settings_cache.SETTINGS_CACHE.load()
+    await _reaction_role_index.REACTION_ROLE_INDEX.load()
+    await _chat_alert_index.CHAT_ALERT_INDEX.load()
+
+
+async def teardown() -> None:
+    """
+    Closes the subscriptions of the in-memory caches and the connection pool.
+    """
+    await _settings_cache.SETTINGS_CACHE.close()
+    await _chat_alert_index.CHAT_ALERT_INDEX.close()
+    await _database.disconnect()
 
 
 
@@ -28,6 +48,16 @@ async def __setup_db_schema() -> None:
         ('0.4.0', __update_db_schema_0_4_0),
         ('0.7.0', __update_db_schema_0_7_0),
         ('0.7.1', __update_db_schema_0_7_1),
+        ('0.8.0', __update_db_schema_0_8_0),
+        ('0.9.0', __update_db_schema_0_9_0),
+        ('0.9.1', __update_db_schema_0_9_1),
+        ('0.9.2', __update_db_schema_0_9_2),
+        ('0.9.3', __update_db_schema_0_9_3),
+        ('0.9.4', __update_db_schema_0_9_4),
+        ('0.9.5', __update_db_schema_0_9_5),
+        ('0.9.6', __update_db_schema_0_9_6),
+        ('0.9.7', __update_db_schema_0_9_7),
+        ('0.9.8', __update_db_schema_0_9_8),
     ]
     for version, callable in init_functions:
         if not (await __update_schema(version, callable)):
@@ -36,11 +66,363 @@ async def __setup_db_schema() -> None:
     print('DB initialization succeeded')
 
 
+async def __get_schema_version() -> str:
+    schema_version, _ = await _settings_cache.SETTINGS_CACHE.get(_database.SETTING_NAME_SCHEMA_VERSION)
+    return schema_version or ''
+
+
+async def __try_set_schema_version(version: str) -> bool:
+    return await _settings_cache.SETTINGS_CACHE.set(_database.SETTING_NAME_SCHEMA_VERSION, version)
+
+
+async def __update_db_schema_0_9_8() -> bool:
+    target_version = '0.9.8'
+
+    schema_version = await __get_schema_version()
+    if schema_version:
+        compare_0_9_8 = _utils.compare_versions(schema_version, target_version)
+        if compare_0_9_8 < 1:
+            return True
+
+    print(f'[update_schema_0_9_8] Updating to database schema v{target_version}')
+
+    for query_create_table in _fleet_rollup.QUERY_CREATE_TABLES:
+        success_table, _ = await _database.try_execute(query_create_table)
+        if not success_table:
+            print(f'[update_schema_0_9_8] Could not create the fleet rollup tables')
+            return False
+
+    success_rollups = await _fleet_history.rebuild_rollups()
+    if not success_rollups:
+        print(f'[update_schema_0_9_8] Could not create the fleet rollups from the stored fleet snapshots')
+        return False
+
+    success = await __try_set_schema_version(target_version)
+    return success
+
+
+async def __update_db_schema_0_9_7() -> bool:
+    target_version = '0.9.7'
+
+    schema_version = await __get_schema_version()
+    if schema_version:
+        compare_0_9_7 = _utils.compare_versions(schema_version, target_version)
+        if compare_0_9_7 < 1:
+            return True
+
+    print(f'[update_schema_0_9_7] Updating to database schema v{target_version}')
+
+    for query_create_table in _fleet_history.QUERY_CREATE_TABLES:
+        success_table, _ = await _database.try_execute(query_create_table)
+        if not success_table:
+            print(f'[update_schema_0_9_7] Could not create the fleet snapshot tables')
+            return False
+
+    success = await __try_set_schema_version(target_version)
+    return success
+
+
+async def __update_db_schema_0_9_6() -> bool:
+    target_version = '0.9.6'
+    column_definitions_chat_alert_rule = [
+        _database.ColumnDefinition(_chat_alert.ChatAlertRule.ID_COLUMN_NAME, _database.ColumnType.AUTO_INCREMENT, True, True),
+        _database.ColumnDefinition('created_at', _database.ColumnType.DATETIME, False, True, default='CURRENT_TIMESTAMP'),
+        _database.ColumnDefinition('modified_at', _database.ColumnType.DATETIME, False, True, default='CURRENT_TIMESTAMP'),
+        _database.ColumnDefinition('guild_id', _database.ColumnType.INT, False, True),
+        _database.ColumnDefinition('channel_id', _database.ColumnType.INT, False, True),
+        _database.ColumnDefinition('role_id', _database.ColumnType.INT, False, False),
+        _database.ColumnDefinition('keyword', _database.ColumnType.STRING, False, True),
+    ]
+    table_name = _chat_alert.ChatAlertRule.TABLE_NAME
+    query_create_function = f'''
+CREATE OR REPLACE FUNCTION notify_chat_alert_rules_changed() RETURNS TRIGGER AS
+$$
+BEGIN
+   PERFORM pg_notify('{_chat_alert.CHANNEL_NAME_CHAT_ALERT_RULES}', COALESCE(NEW.{_chat_alert.ChatAlertRule.ID_COLUMN_NAME}, OLD.{_chat_alert.ChatAlertRule.ID_COLUMN_NAME})::text);
+   RETURN NULL;
+END
+$$ LANGUAGE plpgsql'''
+    query_drop_trigger = f'DROP TRIGGER IF EXISTS {table_name}_notify_changed ON {table_name}'
+    query_create_trigger = f'CREATE TRIGGER {table_name}_notify_changed AFTER INSERT OR UPDATE OR DELETE ON {table_name} FOR EACH ROW EXECUTE FUNCTION notify_chat_alert_rules_changed()'
+    query_drop_trigger_deleted_row = f'DROP TRIGGER IF EXISTS {table_name}_record_deleted_row ON {table_name}'
+    query_create_trigger_deleted_row = f'CREATE TRIGGER {table_name}_record_deleted_row AFTER DELETE ON {table_name} FOR EACH ROW EXECUTE FUNCTION record_deleted_row(\'{_chat_alert.ChatAlertRule.ID_COLUMN_NAME}\')'
+
+    schema_version = await __get_schema_version()
+    if schema_version:
+        compare_0_9_6 = _utils.compare_versions(schema_version, target_version)
+        if compare_0_9_6 < 1:
+            return True
+
+    print(f'[update_schema_0_9_6] Updating to database schema v{target_version}')
+
+    success_chat_alert_rule = await _database.try_create_table(table_name, column_definitions_chat_alert_rule)
+    if not success_chat_alert_rule:
+        print(f'[update_schema_0_9_6] Could not create table \'{table_name}\'')
+        return False
+
+    success_index, _ = await _database.try_execute(f'CREATE INDEX IF NOT EXISTS {table_name}_guild_id_idx ON {table_name} (guild_id)')
+    if not success_index:
+        print(f'[update_schema_0_9_6] Could not create index on table \'{table_name}\'')
+        return False
+
+    success_function, _ = await _database.try_execute(query_create_function)
+    if not success_function:
+        print(f'[update_schema_0_9_6] Could not create function \'notify_chat_alert_rules_changed\'')
+        return False
+
+    success_trigger = (await _database.try_execute(query_drop_trigger))[0] and (await _database.try_execute(query_create_trigger))[0]
+    success_trigger = success_trigger and (await _database.try_execute(query_drop_trigger_deleted_row))[0] and (await _database.try_execute(query_create_trigger_deleted_row))[0]
+    if not success_trigger:
+        print(f'[update_schema_0_9_6] Could not create triggers on table \'{table_name}\'')
+        return False
+
+    success = await __try_set_schema_version(target_version)
+    return success
+
+
+async def __update_db_schema_0_9_5() -> bool:
+    target_version = '0.9.5'
+
+    schema_version = await __get_schema_version()
+    if schema_version:
+        compare_0_9_5 = _utils.compare_versions(schema_version, target_version)
+        if compare_0_9_5 < 1:
+            return True
+
+    print(f'[update_schema_0_9_5] Updating to database schema v{target_version}')
+
+    for query_create_table in _chat_log_lease.QUERY_CREATE_TABLES:
+        success_table, _ = await _database.try_execute(query_create_table)
+        if not success_table:
+            print(f'[update_schema_0_9_5] Could not create the tables \'{_chat_log_lease.TABLE_NAME_WORKER}\' and \'{_chat_log_lease.TABLE_NAME_LEASE}\'')
+            return False
+
+    success = await __try_set_schema_version(target_version)
+    return success
+
+
+async def __update_db_schema_0_9_4() -> bool:
+    target_version = '0.9.4'
+    column_definitions_pss_chat_log_outbox = [
+        _database.ColumnDefinition('message_count', _database.ColumnType.INT, False, True, default='0'),
+        _database.ColumnDefinition('last_pss_message_date', _database.ColumnType.DATETIME, False, False),
+    ]
+    table_name = _chat_log.PssChatLogDelivery.TABLE_NAME
+
+    schema_version = await __get_schema_version()
+    if schema_version:
+        compare_0_9_4 = _utils.compare_versions(schema_version, target_version)
+        if compare_0_9_4 < 1:
+            return True
+
+    print(f'[update_schema_0_9_4] Updating to database schema v{target_version}')
+
+    for column_definition in column_definitions_pss_chat_log_outbox:
+        success_outbox = await _database.try_add_column(table_name, *column_definition)
+        if not success_outbox:
+            print(f'[update_schema_0_9_4] Could not update table \'{table_name}\'')
+            return False
+
+    success = await __try_set_schema_version(target_version)
+    return success
+
+
+async def __update_db_schema_0_9_3() -> bool:
+    target_version = '0.9.3'
+    column_definition_chat_log_use_webhook = _database.ColumnDefinition('use_webhook', _database.ColumnType.BOOLEAN, False, True, default='FALSE')
+    column_definitions_pss_chat_log_webhook = [
+        _database.ColumnDefinition(_chat_log.PssChatLogWebhook.ID_COLUMN_NAME, _database.ColumnType.INT, True, True),
+        _database.ColumnDefinition('created_at', _database.ColumnType.DATETIME, False, True, default='CURRENT_TIMESTAMP'),
+        _database.ColumnDefinition('modified_at', _database.ColumnType.DATETIME, False, True, default='CURRENT_TIMESTAMP'),
+        _database.ColumnDefinition('webhook_id', _database.ColumnType.INT, False, True),
+        _database.ColumnDefinition('webhook_token', _database.ColumnType.STRING, False, True),
+    ]
+
+    schema_version = await __get_schema_version()
+    if schema_version:
+        compare_0_9_3 = _utils.compare_versions(schema_version, target_version)
+        if compare_0_9_3 < 1:
+            return True
+
+    print(f'[update_schema_0_9_3] Updating to database schema v{target_version}')
+
+    success_chat_log = await _database.try_add_column(_chat_log.PssChatLogger.TABLE_NAME, *column_definition_chat_log_use_webhook)
+    if not success_chat_log:
+        print(f'[update_schema_0_9_3] Could not update table \'{_chat_log.PssChatLogger.TABLE_NAME}\'')
+        return False
+
+    success_webhook = await _database.try_create_table(_chat_log.PssChatLogWebhook.TABLE_NAME, column_definitions_pss_chat_log_webhook)
+    if not success_webhook:
+        print(f'[update_schema_0_9_3] Could not create table \'{_chat_log.PssChatLogWebhook.TABLE_NAME}\'')
+        return False
+
+    success = await __try_set_schema_version(target_version)
+    return success
+
+
+async def __update_db_schema_0_9_2() -> bool:
+    target_version = '0.9.2'
+
+    schema_version = await __get_schema_version()
+    if schema_version:
+        compare_0_9_2 = _utils.compare_versions(schema_version, target_version)
+        if compare_0_9_2 < 1:
+            return True
+
+    print(f'[update_schema_0_9_2] Updating to database schema v{target_version}')
+
+    success_archive, _ = await _database.try_execute(_chat_archive.QUERY_CREATE_TABLE)
+    if not success_archive:
+        print(f'[update_schema_0_9_2] Could not create table \'{_chat_archive.TABLE_NAME}\'')
+        return False
+
+    for query_create_index in _chat_archive.QUERY_CREATE_INDEXES:
+        success_index, _ = await _database.try_execute(query_create_index)
+        if not success_index:
+            print(f'[update_schema_0_9_2] Could not create index on table \'{_chat_archive.TABLE_NAME}\'')
+            return False
+
+    success = await __try_set_schema_version(target_version)
+    return success
+
+
+async def __update_db_schema_0_9_1() -> bool:
+    target_version = '0.9.1'
+    column_definitions_pss_chat_log_outbox = [
+        _database.ColumnDefinition(_chat_log.PssChatLogDelivery.ID_COLUMN_NAME, _database.ColumnType.AUTO_INCREMENT, True, True),
+        _database.ColumnDefinition('created_at', _database.ColumnType.DATETIME, False, True, default='CURRENT_TIMESTAMP'),
+        _database.ColumnDefinition(_chat_log.PssChatLogger.ID_COLUMN_NAME, _database.ColumnType.INT, False, True),
+        _database.ColumnDefinition('first_pss_message_id', _database.ColumnType.INT, False, True),
+        _database.ColumnDefinition('last_pss_message_id', _database.ColumnType.INT, False, True),
+        _database.ColumnDefinition('posts', _database.ColumnType.STRING, False, True),
+        _database.ColumnDefinition('delivered_post_count', _database.ColumnType.INT, False, True, default='0'),
+        _database.ColumnDefinition('attempt_count', _database.ColumnType.INT, False, True, default='0'),
+        _database.ColumnDefinition('next_attempt_at', _database.ColumnType.DATETIME, False, True, default='CURRENT_TIMESTAMP'),
+    ]
+    table_name = _chat_log.PssChatLogDelivery.TABLE_NAME
+
+    schema_version = await __get_schema_version()
+    if schema_version:
+        compare_0_9_1 = _utils.compare_versions(schema_version, target_version)
+        if compare_0_9_1 < 1:
+            return True
+
+    print(f'[update_schema_0_9_1] Updating to database schema v{target_version}')
+
+    success_outbox = await _database.try_create_table(table_name, column_definitions_pss_chat_log_outbox)
+    if not success_outbox:
+        print(f'[update_schema_0_9_1] Could not create table \'{table_name}\'')
+        return False
+
+    success_index, _ = await _database.try_execute(f'CREATE INDEX IF NOT EXISTS {table_name}_next_attempt_at_idx ON {table_name} (next_attempt_at)')
+    if not success_index:
+        print(f'[update_schema_0_9_1] Could not create index on table \'{table_name}\'')
+        return False
+
+    success = await __try_set_schema_version(target_version)
+    return success
+
+
+async def __update_db_schema_0_9_0() -> bool:
+    target_version = '0.9.0'
+    query_create_function = f'''
+CREATE OR REPLACE FUNCTION notify_bot_settings_changed() RETURNS TRIGGER AS
+$$
+BEGIN
+   PERFORM pg_notify('{_database.CHANNEL_NAME_BOT_SETTINGS}', COALESCE(NEW.setting_name, OLD.setting_name));
+   RETURN NULL;
+END
+$$ LANGUAGE plpgsql'''
+    query_drop_trigger = f'DROP TRIGGER IF EXISTS {_database.TABLE_NAME_BOT_SETTINGS}_notify_changed ON {_database.TABLE_NAME_BOT_SETTINGS}'
+    query_create_trigger = f'CREATE TRIGGER {_database.TABLE_NAME_BOT_SETTINGS}_notify_changed AFTER INSERT OR UPDATE OR DELETE ON {_database.TABLE_NAME_BOT_SETTINGS} FOR EACH ROW EXECUTE FUNCTION notify_bot_settings_changed()'
+
+    schema_version = await __get_schema_version()
+    if schema_version:
+        compare_0_9_0 = _utils.compare_versions(schema_version, target_version)
+        if compare_0_9_0 < 1:
+            return True
+
+    print(f'[update_schema_0_9_0] Updating to database schema v{target_version}')
+
+    success_function, _ = await _database.try_execute(query_create_function)
+    if not success_function:
+        print(f'[update_schema_0_9_0] Could not create function \'notify_bot_settings_changed\'')
+        return False
+
+    success_trigger = (await _database.try_execute(query_drop_trigger))[0] and (await _database.try_execute(query_create_trigger))[0]
+    if not success_trigger:
+        print(f'[update_schema_0_9_0] Could not create trigger on table \'{_database.TABLE_NAME_BOT_SETTINGS}\'')
+        return False
+
+    success = await __try_set_schema_version(target_version)
+    return success
+
+
+async def __update_db_schema_0_8_0() -> bool:
+    target_version = '0.8.0'
+    column_definitions_deleted_row = [
+        _database.ColumnDefinition('deleted_row_id', _database.ColumnType.AUTO_INCREMENT, True, True),
+        _database.ColumnDefinition('table_name', _database.ColumnType.STRING, False, True),
+        _database.ColumnDefinition('row_id', _database.ColumnType.STRING, False, True),
+        _database.ColumnDefinition('deleted_at', _database.ColumnType.DATETIME, False, True, default='CURRENT_TIMESTAMP'),
+    ]
+    id_column_names = {
+        _database.TABLE_NAME_BOT_SETTINGS: 'setting_name',
+        _fleet.Fleet.TABLE_NAME: _fleet.Fleet.ID_COLUMN_NAME,
+        _chat_log.PssChatLogger.TABLE_NAME: _chat_log.PssChatLogger.ID_COLUMN_NAME,
+        _reaction_role.ReactionRole.TABLE_NAME: _reaction_role.ReactionRole.ID_COLUMN_NAME,
+        _reaction_role.ReactionRoleChange.TABLE_NAME: _reaction_role.ReactionRoleChange.ID_COLUMN_NAME,
+        _reaction_role.ReactionRoleRequirement.TABLE_NAME: _reaction_role.ReactionRoleRequirement.ID_COLUMN_NAME,
+    }
+    query_create_function = f'''
+CREATE OR REPLACE FUNCTION record_deleted_row() RETURNS TRIGGER AS
+$$
+BEGIN
+   INSERT INTO {_database.TABLE_NAME_DELETED_ROW} (table_name, row_id) VALUES (TG_TABLE_NAME, to_jsonb(OLD) ->> TG_ARGV[0]);
+   RETURN OLD;
+END
+$$ LANGUAGE plpgsql'''
+
+    schema_version = await __get_schema_version()
+    if schema_version:
+        compare_0_8_0 = _utils.compare_versions(schema_version, target_version)
+        if compare_0_8_0 < 1:
+            return True
+
+    print(f'[update_schema_0_8_0] Updating to database schema v{target_version}')
+
+    success_deleted_row = await _database.try_create_table(_database.TABLE_NAME_DELETED_ROW, column_definitions_deleted_row)
+    if not success_deleted_row:
+        print(f'[update_schema_0_8_0] Could not create table \'{_database.TABLE_NAME_DELETED_ROW}\'')
+        return False
+
+    success_index, _ = await _database.try_execute(f'CREATE INDEX IF NOT EXISTS {_database.TABLE_NAME_DELETED_ROW}_deleted_at_idx ON {_database.TABLE_NAME_DELETED_ROW} (deleted_at)')
+    if not success_index:
+        print(f'[update_schema_0_8_0] Could not create index on table \'{_database.TABLE_NAME_DELETED_ROW}\'')
+        return False
+
+    success_function, _ = await _database.try_execute(query_create_function)
+    if not success_function:
+        print(f'[update_schema_0_8_0] Could not create function \'record_deleted_row\'')
+        return False
+
+    for table_name, id_column_name in id_column_names.items():
+        query_drop_trigger = f'DROP TRIGGER IF EXISTS {table_name}_record_deleted_row ON {table_name}'
+        query_create_trigger = f'CREATE TRIGGER {table_name}_record_deleted_row AFTER DELETE ON {table_name} FOR EACH ROW EXECUTE FUNCTION record_deleted_row(\'{id_column_name}\')'
+        success_trigger = (await _database.try_execute(query_drop_trigger))[0] and (await _database.try_execute(query_create_trigger))[0]
+        if not success_trigger:
+            print(f'[update_schema_0_8_0] Could not create trigger on table \'{table_name}\'')
+            return False
+
+    success = await __try_set_schema_version(target_version)
+    return success
+
+
 async def __update_db_schema_0_7_1() -> bool:
     target_version = '0.7.1'
     column_definition_fleet_fleet_name = _database.ColumnDefinition('fleet_name', _database.ColumnType.STRING, False, False)
 
-    schema_version = await _database.get_schema_version()
+    schema_version = await __get_schema_version()
     if schema_version:
         compare_0_7_1 = _utils.compare_versions(schema_version, target_version)
         if compare_0_7_1 < 1:
@@ -53,7 +435,7 @@ async def __update_db_schema_0_7_1() -> bool:
         print(f'[update_schema_0_7_1] Could not update table \'{_fleet.Fleet.TABLE_NAME}\'')
         return False
 
-    success = await _database.try_set_schema_version(target_version)
+    success = await __try_set_schema_version(target_version)
     return success
 
 
@@ -67,7 +449,7 @@ async def __update_db_schema_0_7_0() -> bool:
         _database.ColumnDefinition('short_name', _database.ColumnType.STRING, False, False),
     ]
 
-    schema_version = await _database.get_schema_version()
+    schema_version = await __get_schema_version()
     if schema_version:
         compare_0_7_0 = _utils.compare_versions(schema_version, target_version)
         if compare_0_7_0 < 1:
@@ -80,7 +462,7 @@ async def __update_db_schema_0_7_0() -> bool:
         print(f'[update_schema_0_7_0] Could not create table \'{_fleet.Fleet.TABLE_NAME}\'')
         return False
 
-    success = await _database.try_set_schema_version(target_version)
+    success = await __try_set_schema_version(target_version)
     return success
 
 
@@ -97,7 +479,7 @@ async def __update_db_schema_0_4_0() -> bool:
         _database.ColumnDefinition('name', _database.ColumnType.STRING, False, True),
     ]
 
-    schema_version = await _database.get_schema_version()
+    schema_version = await __get_schema_version()
     if schema_version:
         compare_0_4_0 = _utils.compare_versions(schema_version, target_version)
         if compare_0_4_0 < 1:
@@ -110,7 +492,7 @@ async def __update_db_schema_0_4_0() -> bool:
         print(f'[update_schema_0_4_0] Could not create table \'{_chat_log.PssChatLogger.TABLE_NAME}\'')
         return False
 
-    success = await _database.try_set_schema_version(target_version)
+    success = await __try_set_schema_version(target_version)
     return success
 
 
@@ -118,7 +500,7 @@ async def __update_db_schema_0_3_0() -> bool:
     target_version = '0.3.0'
     column_definition = _database.ColumnDefinition('message_embed', 'TEXT', False, False)
 
-    schema_version = await _database.get_schema_version()
+    schema_version = await __get_schema_version()
     if schema_version:
         compare_0_3_0 = _utils.compare_versions(schema_version, target_version)
         if compare_0_3_0 < 1:
@@ -131,7 +513,7 @@ async def __update_db_schema_0_3_0() -> bool:
         print(f'[update_schema_0_3_0] Could not add column \'{column_definition[0]}\' to table \'{_reaction_role.ReactionRoleChange.TABLE_NAME}\'')
         return False
 
-    success = await _database.try_set_schema_version(target_version)
+    success = await __try_set_schema_version(target_version)
     return success
 
 
@@ -167,7 +549,7 @@ async def __update_db_schema_0_2_0() -> bool:
         _database.ColumnDefinition('role_id', _database.ColumnType.INT, False, True),
     ]
 
-    schema_version = await _database.get_schema_version()
+    schema_version = await __get_schema_version()
     if schema_version:
         compare_0_2_0 = _utils.compare_versions(schema_version, target_version)
         if compare_0_2_0 < 1:
@@ -193,7 +575,7 @@ async def __update_db_schema_0_2_0() -> bool:
         await _database.drop_table(_reaction_role.ReactionRoleChange.TABLE_NAME)
         return False
 
-    success = await _database.try_set_schema_version(target_version)
+    success = await __try_set_schema_version(target_version)
     return success
 
 
@@ -210,7 +592,7 @@ async def __create_db_schema() -> bool:
         _database.ColumnDefinition('setting_timestamp', _database.ColumnType.DATETIME, False, False),
     ]
 
-    schema_version = await _database.get_schema_version()
+    schema_version = await __get_schema_version()
     if schema_version:
         compare_0_1_0 = _utils.compare_versions(schema_version, target_version)
         if compare_0_1_0 < 1:
@@ -223,7 +605,7 @@ async def __create_db_schema() -> bool:
         print(f'[create_schema] Could not create table \'{_database.TABLE_NAME_BOT_SETTINGS}\'')
         return False
 
-    success = await _database.try_set_schema_version(target_version)
+    success = await __try_set_schema_version(target_version)
     return success
 
 
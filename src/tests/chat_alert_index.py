@@ -0,0 +1,54 @@
+from ..model.chat_alert import ChatAlertRule as _ChatAlertRule
+from ..model.chat_alert_index import build_keyword_trie as _build_keyword_trie
+from ..model.chat_alert_index import ChatAlertIndex as _ChatAlertIndex
+from ..model.chat_alert_index import find_keywords as _find_keywords
+
+def test() -> None:
+    assert _build_keyword_trie([]) is None
+    assert _build_keyword_trie(['']) is None
+
+    trie = _build_keyword_trie(['vivi', 'vivid', 'star trek', 'c++'])
+    assert _find_keywords(trie, 'vivi and vivid like star trek, not vivian or c++') == ['vivi', 'vivid', 'star trek', 'c++']
+    assert _find_keywords(trie, 'vivian') == []
+    assert _find_keywords(trie, 'startrek') == []
+
+    # Keywords being prefixes of or overlapping each other all match
+    trie = _build_keyword_trie(['fleet', 'fleet helper', 'helper now', 'now'])
+    assert _find_keywords(trie, 'join fleet helper now') == ['fleet', 'fleet helper', 'helper now', 'now']
+    assert _find_keywords(trie, 'fleethelper') == []
+
+    index = _ChatAlertIndex()
+    assert index.get_matching_rules('Vivi') == {}
+
+    rule_1 = _ChatAlertRule.make(1, 10, 'Vivi')
+    rule_1.id = 1
+    rule_2 = _ChatAlertRule.make(2, 20, 'vivi', role_id=200)
+    rule_2.id = 2
+    rule_3 = _ChatAlertRule.make(1, 10, 'Fleet  Helper')
+    rule_3.id = 3
+    rule_4 = _ChatAlertRule.make(2, 20, 'fleet')
+    rule_4.id = 4
+    index.replace([], [rule_1, rule_2, rule_3, rule_4])
+
+    matching_rules = index.get_matching_rules('Player', 'The Fleet', 'hi VIVI, fleet   helper here')
+    assert set(matching_rules.keys()) == {'vivi', 'fleet', 'fleet helper'}
+    assert sorted(rule.id for rule in matching_rules['vivi']) == [1, 2]
+    assert matching_rules['fleet helper'] == [rule_3]
+    # One server's keyword must not hide the keyword of another server starting the same way
+    assert matching_rules['fleet'] == [rule_4]
+
+    # Keywords must not match across fields
+    assert set(index.get_matching_rules('Fleet', 'Helper').keys()) == {'fleet'}
+    assert index.get_matching_rules(None, '', 'vivian') == {}
+
+    # A changed keyword replaces the old one, a deleted rule gets removed
+    rule_1_changed = _ChatAlertRule.make(1, 10, 'recruit')
+    rule_1_changed.id = 1
+    index.replace([1, 3, 4], [rule_1_changed])
+    matching_rules = index.get_matching_rules('vivi fleet helper recruit')
+    assert set(matching_rules.keys()) == {'vivi', 'recruit'}
+    assert matching_rules['vivi'] == [rule_2]
+    assert matching_rules['recruit'] == [rule_1_changed]
+
+    index.replace([1, 2], [])
+    assert index.get_matching_rules('vivi recruit') == {}
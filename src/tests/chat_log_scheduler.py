@@ -0,0 +1,47 @@
+from datetime import datetime as _datetime
+from datetime import timedelta as _timedelta
+from datetime import timezone as _timezone
+
+from ..model.chat_log_scheduler import ChatLogScheduler as _ChatLogScheduler
+
+def test() -> None:
+    scheduler = _ChatLogScheduler(
+        min_interval=10.0,
+        max_interval=80.0,
+        requests_per_minute=3,
+        initial_interval=20.0,
+        busy_message_count=5,
+        full_page_message_count=20
+    )
+    utc_now = _datetime(2023, 1, 1, tzinfo=_timezone.utc)
+
+    assert scheduler.get_due(['a', 'b'], utc_now) == ['a', 'b']
+    assert scheduler.get_interval('a') == 20.0
+
+    scheduler.record('a', 0, 3, utc_now)
+    assert scheduler.get_interval('a') == 40.0
+    scheduler.record('a', 0, 3, utc_now)
+    scheduler.record('a', 0, 3, utc_now)
+    assert scheduler.get_interval('a') == 80.0
+
+    scheduler.record('a', 5, 10, utc_now)
+    assert scheduler.get_interval('a') == 40.0
+    scheduler.record('a', 20, 20, utc_now)
+    assert scheduler.get_interval('a') == 10.0
+    scheduler.record('a', 2, 10, utc_now)
+    assert scheduler.get_interval('a') == 10.0
+
+    scheduler.record_failure('b', utc_now)
+    assert scheduler.get_interval('b') == 40.0
+
+    assert scheduler.get_due(['a', 'b'], utc_now + _timedelta(seconds=9)) == []
+    assert scheduler.get_due(['a', 'b'], utc_now + _timedelta(seconds=10)) == ['a']
+
+    # 3 requests within the last minute exhaust the budget
+    assert scheduler.get_due(['a', 'b', 'c'], utc_now + _timedelta(seconds=50)) == []
+    assert scheduler.get_due(['a', 'b', 'c'], utc_now + _timedelta(seconds=61)) == ['a', 'b']
+
+    # Channel keys not passed in are forgotten
+    scheduler.record('c', 0, 0, utc_now)
+    scheduler.get_due(['a'], utc_now)
+    assert scheduler.get_interval('c') == 20.0
@@ -0,0 +1,60 @@
+import contextlib as _contextlib
+from datetime import timedelta as _timedelta
+import io as _io
+
+from ..model.device_pool import DevicePool as _DevicePool
+from .. import utils as _utils
+
+def test() -> None:
+    with _contextlib.redirect_stdout(_io.StringIO()):
+        __test()
+
+
+def __test() -> None:
+    pool = _DevicePool(['device-1', 'device-2'], 2, 60.0, 150.0)
+    first_device_id = pool.get_device_id()
+    other_device_id = 'device-2' if first_device_id == 'device-1' else 'device-1'
+
+    # The current device is kept until it fails too many requests in a row
+    pool.record_failure(first_device_id, Exception('Failed'))
+    assert pool.get_device_id() == first_device_id
+    assert pool.get_quarantined_until(first_device_id) is None
+    pool.record_success(first_device_id)
+    pool.record_failure(first_device_id, Exception('Failed'))
+    assert pool.get_device_id() == first_device_id
+    pool.record_failure(first_device_id, Exception('Failed'))
+    quarantined_until = pool.get_quarantined_until(first_device_id)
+    assert quarantined_until is not None
+    assert _timedelta(seconds=59) < quarantined_until - _utils.datetime.get_utc_now() <= _timedelta(seconds=60)
+    assert pool.get_device_id() == other_device_id
+    assert pool.has_available_device()
+
+    # Failed logins quarantine the device right away, further quarantines last twice as long up to the maximum
+    pool.record_failure(other_device_id, Exception('Failed'), quarantine=True)
+    assert pool.get_quarantined_until(other_device_id) is not None
+    assert not pool.has_available_device()
+    # If all devices are quarantined, the one released first gets used
+    assert pool.get_device_id() == first_device_id
+
+    pool.release(first_device_id)
+    pool.record_failure(first_device_id, Exception('Failed'), quarantine=True)
+    assert pool.get_quarantined_until(first_device_id) - _utils.datetime.get_utc_now() <= _timedelta(seconds=60)
+    pool._DevicePool__devices[first_device_id].quarantined_until = None
+    pool.record_failure(first_device_id, Exception('Failed'), quarantine=True)
+    assert _timedelta(seconds=119) < pool.get_quarantined_until(first_device_id) - _utils.datetime.get_utc_now() <= _timedelta(seconds=120)
+    pool._DevicePool__devices[first_device_id].quarantined_until = None
+    pool.record_failure(first_device_id, Exception('Failed'), quarantine=True)
+    assert _timedelta(seconds=149) < pool.get_quarantined_until(first_device_id) - _utils.datetime.get_utc_now() <= _timedelta(seconds=150)
+
+    # A success or a release lifts the quarantine
+    pool.record_success(other_device_id)
+    assert pool.get_quarantined_until(other_device_id) is None
+    assert pool.get_device_id() == other_device_id
+    assert pool.release(first_device_id)
+    assert pool.get_quarantined_until(first_device_id) is None
+    assert not pool.release('unknown-device')
+
+    snapshot = pool.snapshot()
+    assert sorted(device_info['number'] for device_info in snapshot) == [1, 2]
+    assert [device_info['is_current'] for device_info in snapshot].count(True) == 1
+    assert all('device-' not in device_info['device'] for device_info in snapshot)
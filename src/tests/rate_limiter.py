@@ -0,0 +1,46 @@
+import asyncio as _asyncio
+import time as _time
+
+from ..utils.rate_limiter import RateLimiter as _RateLimiter
+
+def test() -> None:
+    _asyncio.run(__test())
+
+
+async def __test() -> None:
+    rate_limiter = _RateLimiter(2, 0.2)
+    assert rate_limiter.is_idle
+
+    started_at = _time.monotonic()
+    await rate_limiter.acquire()
+    await rate_limiter.acquire()
+    assert _time.monotonic() - started_at < 0.05
+    assert not rate_limiter.is_idle
+    await rate_limiter.acquire()
+    assert _time.monotonic() - started_at >= 0.09
+
+    # Waiters with a lower priority value go first, the others in order of arrival
+    order = []
+    async def acquire(name: str, priority: int) -> None:
+        await rate_limiter.acquire(priority=priority)
+        order.append(name)
+    tasks = [_asyncio.create_task(acquire('background 1', 1)), _asyncio.create_task(acquire('background 2', 1))]
+    await _asyncio.sleep(0)
+    tasks.append(_asyncio.create_task(acquire('interactive', 0)))
+    await _asyncio.gather(*tasks)
+    assert order == ['interactive', 'background 1', 'background 2'], order
+
+    # Taking more tokens than the bucket holds is possible, when it's full, but leaves the bucket in debt
+    await _asyncio.sleep(0.2)
+    assert rate_limiter.is_idle
+    started_at = _time.monotonic()
+    await rate_limiter.acquire(3)
+    assert _time.monotonic() - started_at < 0.05
+    await rate_limiter.acquire()
+    assert _time.monotonic() - started_at >= 0.19
+
+    # A cancelled waiter doesn't block the ones behind it
+    task = _asyncio.create_task(rate_limiter.acquire(priority=0))
+    await _asyncio.sleep(0)
+    task.cancel()
+    await _asyncio.wait_for(rate_limiter.acquire(priority=1), 1.0)
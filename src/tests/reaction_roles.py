@@ -3,58 +3,44 @@ from ..model.reaction_role import ReactionRole as _ReactionRole
 def test() -> None:
     rr = _ReactionRole.make(
         guild_id=896010670909304863,
-        channel_id=896010670909304863,
+        message_channel_id=896010670909304863,
         message_id=896010670909304863,
         name='RR1234',
         reaction='🙂'
     )
 
-    try:
-        rr.message_id = 896806211058532452
-        rr.name = 'RR1345'
-        rr.reaction = '🙃'
-        rr.is_active = True
-        rr.save()
-    except Exception as e:
-        rr.delete()
-        raise e
+    rr.message_id = 896806211058532452
+    rr.name = 'RR1345'
+    rr.reaction = '🙃'
+    rr.is_active = True
 
-    try:
-        ch_1 = rr.add_change(680621105853242345, True, False)
-    except Exception as e:
-        rr.delete()
-        raise e
+    ch_1 = rr.add_change(680621105853242345, True, False)
+    assert ch_1.reaction_role is rr and ch_1 in rr.role_changes
 
-    try:
-        ch_1.role_id = 680621105853242456
-        ch_1.add = False
-        ch_1.allow_toggle = True
-        ch_1.message_channel_id = 3456
-        ch_1.message_content = 'Test'
-        ch_1.save()
-    except Exception as e:
-        rr.delete()
-        raise e
+    ch_1.id = 1
+    ch_1.role_id = 680621105853242456
+    ch_1.add = False
+    ch_1.allow_toggle = True
+    ch_1.message_channel_id = 3456
+    ch_1.message_content = 'Test'
 
-    try:
-        rr.remove_change(ch_1.id)
-    except Exception as e:
-        rr.delete()
-        raise e
+    rr.remove_change(ch_1.id)
+    assert ch_1 not in rr.role_changes
 
-    try:
-        req_1 = rr.add_requirement(76211058532452)
-    except Exception as e:
-        rr.delete()
-        raise e
+    req_1 = rr.add_requirement(76211058532452)
+    assert req_1.reaction_role is rr and req_1 in rr.role_requirements
 
-    try:
-        rr.remove_requirement(req_1.id)
-    except Exception as e:
-        rr.delete()
-        raise e
+    req_1.id = 1
+    rr.remove_requirement(req_1.id)
+    assert req_1 not in rr.role_requirements
 
     ch_2 = rr.add_change(2345, True, False)
     req_2 = rr.add_requirement(6789)
+    assert list(rr.role_changes) == [ch_2] and list(rr.role_requirements) == [req_2]
 
-    rr.delete()
+    try:
+        rr.remove_change(12345)
+    except Exception:
+        pass
+    else:
+        raise AssertionError('Removing an unknown role change must fail.')
@@ -0,0 +1,78 @@
+import asyncio as _asyncio
+
+from ..utils.ttl_cache import TtlCache as _TtlCache
+
+def test() -> None:
+    _asyncio.run(__test())
+
+
+async def __test() -> None:
+    calls = []
+    def make_fetch(key: str, result, delay: float = 0.0):
+        async def fetch():
+            calls.append(key)
+            await _asyncio.sleep(delay)
+            if isinstance(result, Exception):
+                raise result
+            return result
+        return fetch
+
+    # Results expire after the TTL
+    cache = _TtlCache(0.1, 0.05, 2)
+    assert await cache.get('a', make_fetch('a', 1)) == 1
+    assert await cache.get('a', make_fetch('a', 2)) == 1
+    assert calls == ['a']
+    await _asyncio.sleep(0.12)
+    assert await cache.get('a', make_fetch('a', 2)) == 2
+    assert calls == ['a', 'a']
+
+    # The least recently used entry gets evicted
+    calls.clear()
+    cache = _TtlCache(10.0, 10.0, 2)
+    await cache.get('a', make_fetch('a', 1))
+    await cache.get('b', make_fetch('b', 2))
+    await cache.get('a', make_fetch('a', 1))
+    await cache.get('c', make_fetch('c', 3))
+    assert len(cache) == 2
+    await cache.get('a', make_fetch('a', 1))
+    await cache.get('b', make_fetch('b', 2))
+    assert calls == ['a', 'b', 'c', 'b'], calls
+
+    # Negative results and errors expire after the negative TTL, other errors don't get cached
+    calls.clear()
+    cache = _TtlCache(10.0, 0.05, 10, is_negative_error=lambda error: isinstance(error, KeyError))
+    assert await cache.get('none', make_fetch('none', None)) is None
+    assert await cache.get('none', make_fetch('none', 1)) is None
+    for _ in range(2):
+        try:
+            await cache.get('missing', make_fetch('missing', KeyError('missing')))
+        except KeyError:
+            pass
+        else:
+            raise AssertionError('A cached error must be raised again.')
+        try:
+            await cache.get('failing', make_fetch('failing', ValueError('failing')))
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('An error must be raised.')
+    assert calls == ['none', 'missing', 'failing', 'failing'], calls
+    await _asyncio.sleep(0.07)
+    assert await cache.get('none', make_fetch('none', 1)) == 1
+    assert await cache.get('missing', make_fetch('missing', 2)) == 2
+    assert calls == ['none', 'missing', 'failing', 'failing', 'none', 'missing'], calls
+
+    # Concurrent requests share a single call, even if one of the callers gets cancelled
+    calls.clear()
+    cache = _TtlCache(10.0, 10.0, 10)
+    tasks = [_asyncio.create_task(cache.get('a', make_fetch('a', 1, 0.05))) for _ in range(3)]
+    await _asyncio.sleep(0.01)
+    tasks[0].cancel()
+    results = await _asyncio.gather(*tasks[1:])
+    assert results == [1, 1]
+    assert calls == ['a']
+    stats = cache.get_stats()
+    assert stats['miss_count'] == 1 and stats['coalesced_count'] == 2, stats
+
+    cache.invalidate('a')
+    assert len(cache) == 0
@@ -5,8 +5,12 @@ from . import discord
 from . import format
 from . import json
 from . import parse
+from . import rate_limiter
 from . import settings
+from . import ttl_cache
 from . import web
 from .confirmator import Confirmator
+from .rate_limiter import RateLimiter
+from .ttl_cache import TtlCache
 from .miscellaneous import *
 from .selector import Selector
\ No newline at end of file
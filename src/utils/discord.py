@@ -1,7 +1,11 @@
 from aiohttp import InvalidURL as _InvalidURL
+import asyncio as _asyncio
 from asyncio import TimeoutError as _TimeoutError
 from datetime import datetime as _datetime
 from datetime import timedelta as _timedelta
+from functools import partial as _partial
+import heapq as _heapq
+from itertools import count as _count
 from json import dumps as _json_dumps
 from json import loads as _json_loads
 from json import JSONEncoder as _JSONEncoder
@@ -9,8 +13,12 @@ from json import JSONDecodeError as _JSONDecodeError
 from json import JSONDecoder as _JSONDecoder
 import os as _os
 import re as _re
+import time as _time
 from typing import Any as _Any
+from typing import Awaitable as _Awaitable
+from typing import Callable as _Callable
 from typing import Dict as _Dict
+from typing import Hashable as _Hashable
 from typing import List as _List
 from typing import Optional as _Optional
 from typing import Protocol as _Protocol
@@ -36,6 +44,7 @@ import emoji as _emoji
 
 from . import settings
 from . import web as _web
+from .rate_limiter import RateLimiter as _RateLimiter
 from . import datetime as _utils_datetime
 from . import format as _utils_format
 
@@ -57,6 +66,9 @@ __DEFAULT_FALSE_VALUES: _List[str] = ['no', 'n', 'false', '0', '👎']
 __DEFAULT_TRUE_VALUES: _List[str] = ['yes', 'y', 'true', '1', '👍']
 DEFAULT_INQUIRE_TIMEOUT: float = 120.0
 
+PRIORITY_INTERACTIVE: int = 0
+PRIORITY_BACKGROUND: int = 1
+
 __RX_CHANNEL_MENTION: _re.Pattern = _re.compile('<#(\d+)>')
 __RX_EMOJI: _re.Pattern = _re.compile('<a?:\w+:(\d+)>')
 __RX_MESSAGE_LINK: _re.Pattern = _re.compile('https://discord(app)?.com/channels/(\d+)/(\d+)/(\d+)/?')
@@ -203,8 +215,141 @@ class EmbedLeovoelDecoder(_JSONDecoder):
 
 
 
+# ---------- Send Scheduler ----------
+
+class _ScheduledCall():
+    def __init__(self, func: _Callable[..., _Awaitable[_Any]], content: _Optional[str], coalesce: bool, request_count: int, kwargs: _Dict[str, _Any]) -> None:
+        self.func: _Callable[..., _Awaitable[_Any]] = func
+        self.content: _Optional[str] = content
+        self.coalesce: bool = coalesce and not kwargs
+        self.request_count: int = request_count
+        self.kwargs: _Dict[str, _Any] = kwargs
+        self.future: _asyncio.Future = _asyncio.get_running_loop().create_future()
+
+
+class SendScheduler():
+    """
+    Queues outgoing requests to Discord per route (e.g. a channel) and sends them, highest priority first, no faster than the route's and the global rate limits allow. The global rate limit is handed out by priority across all routes, too. Queued messages for the same channel may be coalesced into fewer posts.
+    """
+    __RATE_LIMITER_EVICTION_INTERVAL: float = 60.0
+
+    def __init__(self, global_rate_limit: _Tuple[float, float], route_rate_limits: _Dict[str, _Tuple[float, float]], char_limit: int) -> None:
+        self.__global_rate_limiter: _RateLimiter = _RateLimiter(*global_rate_limit)
+        self.__route_rate_limits: _Dict[str, _Tuple[float, float]] = route_rate_limits
+        self.__char_limit: int = char_limit
+        self.__rate_limiters: _Dict[_Hashable, _RateLimiter] = {}
+        self.__queues: _Dict[_Hashable, _List[_Tuple[int, int, _ScheduledCall]]] = {}
+        self.__workers: _Dict[_Hashable, _asyncio.Task] = {}
+        self.__sequence = _count()
+        self.__rate_limiters_evicted_at: float = _time.monotonic()
+
+
+    async def schedule(self, route: _Tuple[str, int], func: _Callable[..., _Awaitable[_Any]], priority: int = PRIORITY_INTERACTIVE, content: _Optional[str] = None, coalesce: bool = False, request_count: int = 1, **kwargs) -> _Any:
+        """
+        Queues a call of `func` on the given route and waits for its result. `route` is a tuple of the route type (a key of `route_rate_limits`) and an ID, e.g. ('channel', channel.id).
+        If `content` is specified, it'll be passed as keyword argument `content`. Queued calls with `coalesce` set, no other keyword arguments and the same priority will be merged by joining their contents, as long as they fit into a single post. All of them receive the same result.
+        `request_count` is the number of requests `func` sends to Discord, e.g. one per role for `Member.add_roles`.
+        """
+        call = _ScheduledCall(func, content, coalesce, request_count, kwargs)
+        _heapq.heappush(self.__queues.setdefault(route, []), (priority, next(self.__sequence), call))
+        worker = self.__workers.get(route)
+        if worker is None or worker.done():
+            self.__workers[route] = _asyncio.create_task(self.__work(route))
+        return await call.future
+
+
+    async def __work(self, route: _Tuple[str, int]) -> None:
+        queue = self.__queues[route]
+        rate_limiter = self.__get_rate_limiter(route)
+        while queue:
+            priority, _, next_call = queue[0]
+            await rate_limiter.acquire(next_call.request_count)
+            await self.__global_rate_limiter.acquire(next_call.request_count, priority)
+            if not queue:
+                break
+            calls = self.__pop_calls(queue)
+            if not calls:
+                continue
+            call = calls[0]
+            try:
+                if call.content is not None:
+                    content = '\n'.join(coalesced_call.content for coalesced_call in calls)
+                    result = await call.func(content=content, **call.kwargs)
+                else:
+                    result = await call.func(**call.kwargs)
+            except Exception as error:
+                for coalesced_call in calls:
+                    if not coalesced_call.future.done():
+                        coalesced_call.future.set_exception(error)
+            else:
+                for coalesced_call in calls:
+                    if not coalesced_call.future.done():
+                        coalesced_call.future.set_result(result)
+        self.__queues.pop(route, None)
+        self.__workers.pop(route, None)
+        self.__evict_idle_rate_limiters()
+
+
+    def __evict_idle_rate_limiters(self) -> None:
+        """
+        Forgets the rate limiters of routes without queued calls, whose buckets have refilled completely, at most once per `__RATE_LIMITER_EVICTION_INTERVAL` seconds.
+        """
+        now = _time.monotonic()
+        if now - self.__rate_limiters_evicted_at < SendScheduler.__RATE_LIMITER_EVICTION_INTERVAL:
+            return
+        self.__rate_limiters_evicted_at = now
+        for route in [route for route, rate_limiter in self.__rate_limiters.items() if route not in self.__workers and rate_limiter.is_idle]:
+            self.__rate_limiters.pop(route)
+
+
+    def __get_rate_limiter(self, route: _Tuple[str, int]) -> _RateLimiter:
+        if route not in self.__rate_limiters:
+            self.__rate_limiters[route] = _RateLimiter(*self.__route_rate_limits[route[0]])
+        return self.__rate_limiters[route]
+
+
+    def __pop_calls(self, queue: _List[_Tuple[int, int, _ScheduledCall]]) -> _List[_ScheduledCall]:
+        priority, _, call = _heapq.heappop(queue)
+        if call.future.cancelled():
+            return []
+        result = [call]
+        if call.coalesce and call.content is not None:
+            length = len(call.content)
+            while queue:
+                next_priority, _, next_call = queue[0]
+                if next_call.future.cancelled():
+                    _heapq.heappop(queue)
+                    continue
+                if next_priority != priority or not next_call.coalesce or next_call.func != call.func or next_call.content is None:
+                    break
+                if length + 1 + len(next_call.content) > self.__char_limit:
+                    break
+                _heapq.heappop(queue)
+                result.append(next_call)
+                length += 1 + len(next_call.content)
+        return result
+
+
+SEND_SCHEDULER: SendScheduler = SendScheduler(
+    settings.DISCORD_RATE_LIMIT_GLOBAL,
+    {
+        'channel': settings.DISCORD_RATE_LIMIT_CHANNEL,
+        'member_roles': settings.DISCORD_RATE_LIMIT_MEMBER_ROLES,
+    },
+    settings.MESSAGE_MAXIMUM_CHARACTER_COUNT,
+)
+
+
+
+
+
 # ---------- Public Functions ----------
 
+async def add_roles(member: _Member, *roles: _Role, reason: _Optional[str] = None, priority: int = PRIORITY_BACKGROUND) -> None:
+    if roles:
+        await SEND_SCHEDULER.schedule(('member_roles', member.guild.id), _partial(member.add_roles, *roles), priority, request_count=len(roles), reason=reason)
+
+
 def check_for_add_remove(message_content: str,
                             allow_abort: bool = True,
                             allow_skip: bool = False
@@ -942,9 +1087,14 @@ async def inquire_for_true_false(ctx: _Context,
     return (await inquire_for_boolean(ctx, prompt_text, timeout=timeout, abort_text=abort_text, skip_text=skip_text))
 
 
+async def remove_roles(member: _Member, *roles: _Role, reason: _Optional[str] = None, priority: int = PRIORITY_BACKGROUND) -> None:
+    if roles:
+        await SEND_SCHEDULER.schedule(('member_roles', member.guild.id), _partial(member.remove_roles, *roles), priority, request_count=len(roles), reason=reason)
+
+
 async def reply(ctx: _Context, content: str, mention_author: bool = False, **kwargs) -> _Message:
     if content or 'embed' in kwargs or 'embeds' in kwargs:
-        return (await ctx.reply(content=content, mention_author=mention_author, **kwargs))
+        return (await SEND_SCHEDULER.schedule(('channel', ctx.channel.id), ctx.reply, content=content, mention_author=mention_author, **kwargs))
 
 
 async def reply_lines(ctx: _Context, content_lines: _List[str], mention_author: bool = False, send_file_if_too_long: bool = False, **kwargs) -> _List[_Message]:
@@ -957,18 +1107,18 @@ async def reply_lines(ctx: _Context, content_lines: _List[str], mention_author:
         with open(file_name, 'w') as fp:
             fp.write(file_contents)
         try:
-            result.append((await ctx.reply(file=_File(file_name))))
+            result.append((await SEND_SCHEDULER.schedule(('channel', ctx.channel.id), ctx.reply, file=_File(file_name))))
         finally:
             _os.remove(file_name)
     else:
         for post in posts:
-            result.append((await ctx.reply(content=post, mention_author=mention_author, **kwargs)))
+            result.append((await SEND_SCHEDULER.schedule(('channel', ctx.channel.id), ctx.reply, content=post, mention_author=mention_author, **kwargs)))
     return result
 
 
 async def send(ctx: _Context, content: str, **kwargs) -> _Message:
     if content or 'embed' in kwargs or 'embeds' in kwargs:
-        return (await ctx.send(content=content, **kwargs))
+        return (await SEND_SCHEDULER.schedule(('channel', ctx.channel.id), ctx.send, content=content, **kwargs))
 
 
 async def send_lines(ctx: _Context, content_lines: _List[str], **kwargs) -> _List[_Message]:
@@ -976,22 +1126,22 @@ async def send_lines(ctx: _Context, content_lines: _List[str], **kwargs) -> _Lis
     result = []
     for post in posts:
         if post:
-            result.append((await ctx.send(content=post, **kwargs)))
+            result.append((await SEND_SCHEDULER.schedule(('channel', ctx.channel.id), ctx.send, content=post, **kwargs)))
     return result
 
 
-async def send_to_channel(channel: _TextChannel, content: str, **kwargs) -> _Message:
+async def send_to_channel(channel: _TextChannel, content: str, priority: int = PRIORITY_INTERACTIVE, coalesce: bool = False, **kwargs) -> _Message:
     if content or 'embed' in kwargs or 'embeds' in kwargs:
-        return (await channel.send(content=content, **kwargs))
+        return (await SEND_SCHEDULER.schedule(('channel', channel.id), channel.send, priority, content=content, coalesce=coalesce, **kwargs))
 
 
-async def send_lines_to_channel(channel: _TextChannel, content_lines: _List[str], **kwargs) -> _List[_Message]:
+async def send_lines_to_channel(channel: _TextChannel, content_lines: _List[str], priority: int = PRIORITY_INTERACTIVE, coalesce: bool = False, **kwargs) -> _List[_Message]:
     posts = create_posts_from_lines(content_lines, settings.MESSAGE_MAXIMUM_CHARACTER_COUNT)
-    result = []
-    for post in posts:
-        if post:
-            result.append((await channel.send(content=post, **kwargs)))
-    return result
+    posts = [post for post in posts if post]
+    return list(await _asyncio.gather(*[
+        SEND_SCHEDULER.schedule(('channel', channel.id), channel.send, priority, content=post, coalesce=coalesce, **kwargs)
+        for post in posts
+    ]))
 
 
 async def try_delete_message(message: _Message) -> bool:
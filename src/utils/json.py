@@ -1,5 +1,6 @@
 from datetime import date as _date
 from datetime import datetime as _datetime
+from datetime import timezone as _timezone
 import json as _json
 
 from . import format as _format
@@ -20,9 +21,12 @@ class ViviDecoder(_json.JSONDecoder):
 class ViviEncoder(_json.JSONEncoder):
     def default(self, obj):
         if isinstance(obj, _datetime):
+            # Naive values are UTC throughout the bot
+            if obj.tzinfo is None:
+                obj = obj.replace(tzinfo=_timezone.utc)
             return {
                 '__type__': 'datetime',
-                '__value__': _format.datetime(obj, include_time=False, include_tz=False, include_tz_brackets=False)
+                '__value__': obj.isoformat()
             }
         if isinstance(obj, _date):
             return {
@@ -39,6 +43,13 @@ class ViviEncoder(_json.JSONEncoder):
 
 def yadc_decoder_object_hook(obj):
     if '__type__' in obj and '__value__' in obj:
+        if obj['__type__'] == 'datetime' and 'T' in obj['__value__']:
+            result = _datetime.fromisoformat(obj['__value__'])
+            if result.tzinfo is None:
+                result = result.replace(tzinfo=_timezone.utc)
+            return result
         if obj['__type__'] in ['date', 'datetime']:
-            return _parse.formatted_datetime(obj['__value__'], include_time=False, include_tz=False, include_tz_brackets=False)
+            # Older exports didn't include the time or the UTC offset of datetime values
+            include_time = len(obj['__value__']) > len('YYYY-MM-DD')
+            return _parse.formatted_datetime(obj['__value__'], include_time=include_time, include_tz=False, include_tz_brackets=False)
     return obj
\ No newline at end of file
@@ -1,5 +1,8 @@
 from datetime import datetime as _datetime
 from datetime import timezone as _timezone
+import re as _re
+from typing import Optional as _Optional
+from typing import Tuple as _Tuple
 
 
 
@@ -17,4 +20,17 @@ def formatted_datetime(date_time: str, include_time: bool = True, include_tz: bo
     result = _datetime.strptime(date_time, format_string)
     if result.tzinfo is None:
         result = result.replace(tzinfo=_timezone.utc)
-    return result
\ No newline at end of file
+    return result
+
+
+def int_option(text: str, option_name: str) -> _Tuple[_Optional[int], str]:
+    """
+    Removes the option `--<option_name> <number>` from the text. Returns the number, if the option was found, and the remaining text.
+    """
+    if not text:
+        return (None, text)
+    match = _re.search(rf'(?:^|\s)--{_re.escape(option_name)}[\s=]+(\d+)(?=\s|$)', text)
+    if not match:
+        return (None, text)
+    remaining_text = ' '.join(part for part in (text[:match.start()].strip(), text[match.end():].strip()) if part)
+    return (int(match.group(1)), remaining_text)
\ No newline at end of file
@@ -0,0 +1,95 @@
+import asyncio as _asyncio
+import heapq as _heapq
+from itertools import count as _count
+import time as _time
+from typing import Dict as _Dict
+from typing import List as _List
+from typing import Tuple as _Tuple
+from urllib.parse import urlparse as _urlparse
+
+
+# ---------- Classes ----------
+
+class RateLimiter():
+    """
+    Token bucket allowing up to `rate` acquisitions per `per` seconds. Use it as an async context manager or call `acquire`.
+    """
+    def __init__(self, rate: float, per: float = 1.0) -> None:
+        self.__rate: float = rate
+        self.__per: float = per
+        self.__tokens: float = rate
+        self.__updated_at: float = _time.monotonic()
+        self.__waiters: _List[_Tuple[int, int, _asyncio.Event]] = []
+        self.__sequence = _count()
+
+
+    async def __aenter__(self) -> 'RateLimiter':
+        await self.acquire()
+        return self
+
+
+    async def __aexit__(self, *args) -> None:
+        pass
+
+
+    @property
+    def is_idle(self) -> bool:
+        """
+        Whether nobody waits for a token and the bucket is full, so that replacing this RateLimiter with a new one wouldn't allow any additional acquisitions.
+        """
+        self.__refill()
+        return not self.__waiters and self.__tokens >= self.__rate
+
+
+    async def acquire(self, tokens: float = 1, priority: int = 0) -> None:
+        """
+        Waits until the tokens are available and takes them. Waiters with a lower `priority` get served first, waiters with the same priority in order of arrival. Taking more tokens than the bucket holds leaves it in debt, so that the following acquisitions wait for the excess.
+        """
+        waiter = (priority, next(self.__sequence), _asyncio.Event())
+        _heapq.heappush(self.__waiters, waiter)
+        try:
+            while True:
+                if self.__waiters[0] is not waiter:
+                    waiter[2].clear()
+                    await waiter[2].wait()
+                    continue
+                self.__refill()
+                required_tokens = min(tokens, self.__rate)
+                if self.__tokens >= required_tokens:
+                    self.__tokens -= tokens
+                    return
+                await _asyncio.sleep((required_tokens - self.__tokens) * self.__per / self.__rate)
+        finally:
+            self.__waiters.remove(waiter)
+            _heapq.heapify(self.__waiters)
+            if self.__waiters:
+                self.__waiters[0][2].set()
+
+
+    def __refill(self) -> None:
+        now = _time.monotonic()
+        self.__tokens = min(self.__rate, self.__tokens + (now - self.__updated_at) * self.__rate / self.__per)
+        self.__updated_at = now
+
+
+
+
+
+# ---------- Functions ----------
+
+def get_host_rate_limiter(url: str, rate: float, per: float = 1.0) -> RateLimiter:
+    """
+    Returns the RateLimiter shared by all requests to the host of the given url. The rate is only applied, when the RateLimiter is created.
+    """
+    host = _urlparse(url).netloc or url
+    if host not in __HOST_RATE_LIMITERS:
+        __HOST_RATE_LIMITERS[host] = RateLimiter(rate, per)
+    return __HOST_RATE_LIMITERS[host]
+
+
+
+
+
+# ---------- Initialization ----------
+
+__HOST_RATE_LIMITERS: _Dict[str, RateLimiter] = {}
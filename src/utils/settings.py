@@ -1,3 +1,16 @@
+from typing import Tuple as _Tuple
+
+
+DISCORD_RATE_LIMIT_CHANNEL: _Tuple[float, float] = (5, 5.0)
+"""(requests, seconds) per channel"""
+DISCORD_RATE_LIMIT_GLOBAL: _Tuple[float, float] = (45, 1.0)
+"""(requests, seconds) across all routes, a bit below Discord's global limit"""
+DISCORD_RATE_LIMIT_MEMBER_ROLES: _Tuple[float, float] = (10, 10.0)
+"""(requests, seconds) for role changes per guild"""
+DISCORD_RATE_LIMIT_WEBHOOK: _Tuple[float, float] = (5, 10.0)
+"""(requests, seconds) per webhook, keeping below Discord's limit of 30 webhook messages per minute and channel"""
+
+FILE_MAXIMUM_SIZE: int = 8388608
 MESSAGE_MAXIMUM_CHARACTER_COUNT: int = 1950
 
-TIMESTAMP_FORMAT_PSS = '%Y-%m-%dT%H:%M:%S'
\ No newline at end of file
+TIMESTAMP_FORMAT_PSS = '%Y-%m-%dT%H:%M:%S'
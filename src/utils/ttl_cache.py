@@ -0,0 +1,111 @@
+import asyncio as _asyncio
+from collections import OrderedDict as _OrderedDict
+import time as _time
+from typing import Any as _Any
+from typing import Awaitable as _Awaitable
+from typing import Callable as _Callable
+from typing import Dict as _Dict
+from typing import Generic as _Generic
+from typing import Hashable as _Hashable
+from typing import Optional as _Optional
+from typing import Tuple as _Tuple
+from typing import TypeVar as _TypeVar
+
+
+_T = _TypeVar('_T')
+
+
+# ---------- Classes ----------
+
+class TtlCache(_Generic[_T]):
+    """
+    In-memory cache for the results of coroutines. Results expire after `ttl` seconds. Negative results, as determined by `is_negative_result` and `is_negative_error`, expire after `negative_ttl` seconds; cached errors get raised again. If there are more than `max_size` entries, the least recently used ones get evicted. Concurrent requests for a key that isn't cached share a single call.
+    """
+    def __init__(self,
+                 ttl: float,
+                 negative_ttl: float,
+                 max_size: int,
+                 is_negative_result: _Callable[[_T], bool] = None,
+                 is_negative_error: _Callable[[Exception], bool] = None,
+    ) -> None:
+        self.__ttl: float = ttl
+        self.__negative_ttl: float = negative_ttl
+        self.__max_size: int = max(max_size, 1)
+        self.__is_negative_result: _Callable[[_T], bool] = is_negative_result or (lambda result: result is None)
+        self.__is_negative_error: _Callable[[Exception], bool] = is_negative_error or (lambda error: False)
+        self.__entries: '_OrderedDict[_Hashable, _Tuple[float, _Optional[_T], _Optional[Exception]]]' = _OrderedDict()
+        self.__pending: _Dict[_Hashable, _asyncio.Task] = {}
+        self.__hit_count: int = 0
+        self.__miss_count: int = 0
+        self.__coalesced_count: int = 0
+
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+
+    async def get(self, key: _Hashable, fetch: _Callable[[], _Awaitable[_T]]) -> _T:
+        """
+        Returns the cached result for the key or awaits `fetch` to retrieve it.
+        """
+        entry = self.__entries.get(key)
+        if entry is not None:
+            expires_at, result, error = entry
+            if expires_at > _time.monotonic():
+                self.__entries.move_to_end(key)
+                self.__hit_count += 1
+                if error is not None:
+                    raise error
+                return result
+            self.__entries.pop(key)
+
+        task = self.__pending.get(key)
+        if task is None:
+            self.__miss_count += 1
+            task = _asyncio.create_task(self.__fetch(key, fetch))
+            self.__pending[key] = task
+            task.add_done_callback(lambda _: self.__pending.pop(key, None))
+        else:
+            self.__coalesced_count += 1
+        # Shielded, so that a cancelled caller doesn't cancel the request for everyone else waiting for it
+        return await _asyncio.shield(task)
+
+
+    def invalidate(self, key: _Hashable = None) -> None:
+        """
+        Removes the entry for the key or all entries, if no key is specified.
+        """
+        if key is None:
+            self.__entries.clear()
+        else:
+            self.__entries.pop(key, None)
+
+
+    def get_stats(self) -> _Dict[str, _Any]:
+        return {
+            'size': len(self.__entries),
+            'max_size': self.__max_size,
+            'hit_count': self.__hit_count,
+            'miss_count': self.__miss_count,
+            'coalesced_count': self.__coalesced_count,
+        }
+
+
+    async def __fetch(self, key: _Hashable, fetch: _Callable[[], _Awaitable[_T]]) -> _T:
+        try:
+            result = await fetch()
+        except Exception as error:
+            if self.__is_negative_error(error):
+                self.__set(key, None, error, self.__negative_ttl)
+            raise
+        self.__set(key, result, None, self.__negative_ttl if self.__is_negative_result(result) else self.__ttl)
+        return result
+
+
+    def __set(self, key: _Hashable, result: _Optional[_T], error: _Optional[Exception], ttl: float) -> None:
+        if ttl <= 0:
+            return
+        self.__entries[key] = (_time.monotonic() + ttl, result, error)
+        self.__entries.move_to_end(key)
+        while len(self.__entries) > self.__max_size:
+            self.__entries.popitem(last=False)
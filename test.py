@@ -1,4 +1,9 @@
+from src.tests import chat_alert_index
+from src.tests import chat_log_scheduler
+from src.tests import device_pool
+from src.tests import rate_limiter
 from src.tests import reaction_roles
+from src.tests import ttl_cache
 
 
 def test_reaction_roles() -> bool:
@@ -12,9 +17,69 @@ def test_reaction_roles() -> bool:
     return success
 
 
+def test_chat_log_scheduler() -> bool:
+    try:
+        chat_log_scheduler.test()
+        success = True
+    except Exception as e:
+        print(repr(e))
+        success = False
+    print(f'Chat Log Scheduler test: {"success" if success else "fail"}')
+    return success
+
+
+def test_rate_limiter() -> bool:
+    try:
+        rate_limiter.test()
+        success = True
+    except Exception as e:
+        print(repr(e))
+        success = False
+    print(f'Rate Limiter test: {"success" if success else "fail"}')
+    return success
+
+
+def test_chat_alert_index() -> bool:
+    try:
+        chat_alert_index.test()
+        success = True
+    except Exception as e:
+        print(repr(e))
+        success = False
+    print(f'Chat Alert Index test: {"success" if success else "fail"}')
+    return success
+
+
+def test_ttl_cache() -> bool:
+    try:
+        ttl_cache.test()
+        success = True
+    except Exception as e:
+        print(repr(e))
+        success = False
+    print(f'TTL Cache test: {"success" if success else "fail"}')
+    return success
+
+
+def test_device_pool() -> bool:
+    try:
+        device_pool.test()
+        success = True
+    except Exception as e:
+        print(repr(e))
+        success = False
+    print(f'Device Pool test: {"success" if success else "fail"}')
+    return success
+
+
 def test_all() -> None:
     test_reaction_roles()
+    test_chat_log_scheduler()
+    test_rate_limiter()
+    test_chat_alert_index()
+    test_ttl_cache()
+    test_device_pool()
 
 
 if __name__ == '__main__':
-    test_all()
\ No newline at end of file
+    test_all()